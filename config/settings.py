@@ -27,12 +27,21 @@ APP_DATA_JSON_DIR = os.path.join(SHARED_DATA_BASE_PATH, "data_json")
 REMBOURSEMENTS_BASE_DIR = os.path.join(SHARED_DATA_BASE_PATH, "remboursements")
 REMBOURSEMENTS_JSON_DIR = os.path.join(REMBOURSEMENTS_BASE_DIR, "data")
 REMBOURSEMENTS_ATTACHMENTS_DIR = os.path.join(REMBOURSEMENTS_BASE_DIR, "fichiers")
+REMBOURSEMENTS_INDEX_FILE = os.path.join(REMBOURSEMENTS_BASE_DIR, "index_demandes.json")
+REMBOURSEMENTS_JOURNAL_FILE = os.path.join(REMBOURSEMENTS_BASE_DIR, "journal_demandes.jsonl")
 PROFILE_PICTURES_DIR = os.path.join(SHARED_DATA_BASE_PATH, "assets", "profile_pictures")
+# Fichiers '.lock' de tous les fichiers partagés, tenus hors des dossiers de données.
+LOCKS_DIR = os.path.join(SHARED_DATA_BASE_PATH, "verrous")
 
 # --- Dossiers d'archives ---
 REMBOURSEMENTS_ARCHIVE_JSON_DIR = os.path.join(REMBOURSEMENTS_BASE_DIR, "archive", "data")
 REMBOURSEMENTS_ARCHIVE_ATTACHMENTS_DIR = os.path.join(REMBOURSEMENTS_BASE_DIR, "archive", "fichiers")
 
+# --- Cache local du poste (jamais sur le partage réseau) ---
+LOCAL_CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"),
+                               "Remboursement")
+RENDER_CACHE_DIR = os.path.join(LOCAL_CACHE_DIR, "rendus")
+
 # --- Fichiers de configuration ---
 USER_DATA_FILE = os.path.join(APP_DATA_JSON_DIR, "utilisateurs.json")
 RESET_CODES_FILE = os.path.join(APP_DATA_JSON_DIR, "codes_reset.json")
@@ -148,7 +157,8 @@ def ensure_shared_dirs_exist():
         REMBOURSEMENTS_ATTACHMENTS_DIR,
         PROFILE_PICTURES_DIR,
         REMBOURSEMENTS_ARCHIVE_JSON_DIR,
-        REMBOURSEMENTS_ARCHIVE_ATTACHMENTS_DIR
+        REMBOURSEMENTS_ARCHIVE_ATTACHMENTS_DIR,
+        LOCKS_DIR
     ]
     for directory in dirs_to_create:
         os.makedirs(directory, exist_ok=True)
@@ -1,8 +1,6 @@
 import customtkinter as ctk
 import os
 import sys
-import threading
-import queue
 import tkinter
 from tkinter import messagebox
 from views.login_view import LoginView
@@ -12,6 +10,11 @@ from controllers.remboursement_controller import RemboursementController
 from controllers.password_reset_controller import PasswordResetController
 from models import user_model
 from utils.ui_utils import LoadingOverlay, ToastManager
+from utils.ui_messages import show_recovery_summary
+from utils.recovery_events import prendre_recuperations
+from utils.task_scheduler import PlanificateurTaches, PRIORITE_INTERFACE, PRIORITE_ARRIERE_PLAN
+
+INTERVALLE_RECUPERATIONS_MS = 500
 
 
 class AppController:
@@ -26,9 +29,13 @@ class AppController:
 
         self.loading_overlay = LoadingOverlay(self.root)
         self.toast_manager = ToastManager(self.root)
+        self.planificateur = PlanificateurTaches(self.root)
+        self._nb_taches_avec_overlay = 0
+        self._overlay_show_job = None
 
         self._run_startup_tasks()
         self.show_login_view()
+        self._surveiller_recuperations()
 
     def _run_startup_tasks(self):
         def task():
@@ -37,8 +44,16 @@ class AppController:
             rc_temp.archive_old_requests()
             print("Tâches de démarrage terminées.")
 
-        startup_thread = threading.Thread(target=task, daemon=True)
-        startup_thread.start()
+        self.run_threaded_task(task, lambda _: None, priorite=PRIORITE_ARRIERE_PLAN, show_overlay=False)
+
+    def _surveiller_recuperations(self):
+        """Affiche depuis le thread principal un seul message pour les fichiers récupérés par la couche données."""
+        recuperations = {}
+        for bloc in prendre_recuperations():
+            recuperations.update(bloc)
+        if recuperations:
+            show_recovery_summary(list(recuperations.items()))
+        self.root.after(INTERVALLE_RECUPERATIONS_MS, self._surveiller_recuperations)
 
     def _remboursement_controller_factory(self, nom_utilisateur: str) -> RemboursementController:
         if self.remboursement_controller is None:
@@ -47,39 +62,39 @@ class AppController:
             self.remboursement_controller.utilisateur_actuel = nom_utilisateur
         return self.remboursement_controller
 
-    def run_threaded_task(self, task_function, on_complete):
-        overlay_show_job = self.root.after(250, self.loading_overlay.show)
-
-        task_queue = queue.Queue()
-
-        def worker():
-            try:
-                result = task_function()
-                task_queue.put(result)
-            except Exception as e:
-                task_queue.put(e)
-
-        def check_queue():
-            try:
-                result = task_queue.get_nowait()
-
-                try:
-                    self.root.after_cancel(overlay_show_job)
-                except tkinter.TclError:
-                    pass
-
-                self.loading_overlay.hide()
-
-                if isinstance(result, Exception):
-                    print(f"Erreur dans le thread: {result}")
-                    self.show_toast(f"Une erreur est survenue durant l'opération:\n{result}", "error")
-                else:
-                    on_complete(result)
-            except queue.Empty:
-                self.root.after(100, check_queue)
-
-        threading.Thread(target=worker, daemon=True).start()
-        self.root.after(100, check_queue)
+    def run_threaded_task(self, task_function, on_complete, priorite: int = PRIORITE_INTERFACE,
+                          cle: str | None = None, show_overlay: bool = True):
+        """
+        Exécute task_function dans le pool de workers partagé puis on_complete(résultat) dans le thread Tk.
+        Une tâche de même clé encore en cours est annulée (on_complete n'est pas appelé pour elle).
+        Le voile de chargement n'apparaît qu'après 250 ms et reste affiché tant qu'une tâche qui le demande tourne.
+        """
+        if show_overlay:
+            self._nb_taches_avec_overlay += 1
+            if self._nb_taches_avec_overlay == 1:
+                self._overlay_show_job = self.root.after(250, self.loading_overlay.show)
+
+        def terminer():
+            if show_overlay:
+                self._nb_taches_avec_overlay -= 1
+                if self._nb_taches_avec_overlay == 0:
+                    try:
+                        self.root.after_cancel(self._overlay_show_job)
+                    except tkinter.TclError:
+                        pass
+                    self.loading_overlay.hide()
+
+        def on_succes(result):
+            terminer()
+            on_complete(result)
+
+        def on_erreur(erreur):
+            terminer()
+            print(f"Erreur dans le thread: {erreur}")
+            self.show_toast(f"Une erreur est survenue durant l'opération:\n{erreur}", "error")
+
+        return self.planificateur.soumettre(task_function, on_succes, priorite, cle, on_erreur,
+                                            on_annulation=terminer)
 
     def show_toast(self, message: str, m_type: str = 'success'):
         """Affiche une notification non-bloquante via le ToastManager."""
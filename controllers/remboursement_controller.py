@@ -1,4 +1,5 @@
 from models import remboursement_model
+from models.remboursement_repository import RemboursementRepository
 from utils import pdf_utils, archive_utils
 from tkinter import filedialog
 import os
@@ -17,12 +18,19 @@ from config.settings import (
 class RemboursementController:
     def __init__(self, utilisateur_actuel: str):
         self.utilisateur_actuel = utilisateur_actuel
+        self.depot = RemboursementRepository()
+
+    def _apres_ecriture(self, ids_demandes: list[str], resultat):
+        """Garde le dépôt en mémoire cohérent avec les écritures faites par ce contrôleur."""
+        self.depot.rafraichir(ids_demandes)
+        return resultat
 
     def archive_old_requests(self):
         """Lance la tâche système d'archivage des anciennes demandes."""
         count = remboursement_model.archiver_les_vieilles_demandes()
         if count > 0:
             print(f"{count} demande(s) ont été archivée(s).")
+            self.depot.invalider()
 
     def extraire_info_facture_pdf(self, chemin_pdf: str) -> dict:
         if not chemin_pdf or not os.path.exists(chemin_pdf):
@@ -62,45 +70,84 @@ class RemboursementController:
             chemin_facture_source, chemin_rib_source, self.utilisateur_actuel, description
         )
         if nouvelle_demande:
+            self.depot.rafraichir([nouvelle_demande.get("id_demande")])
             return True, f"Demande pour {prenom.title()} {nom.upper()} créée."
         else:
             return False, "Erreur lors de la création de la demande."
 
     def get_demande_by_id(self, demande_id: str) -> dict | None:
-        return remboursement_model.obtenir_demande_par_id(demande_id)
+        return self.depot.obtenir(demande_id)
 
     def get_toutes_les_demandes_formatees(self, include_archives: bool = False) -> list[dict]:
-        return remboursement_model.obtenir_toutes_les_demandes(include_archives)
+        return self.depot.lister(include_archives)
+
+    def get_demandes_par_statut(self, statut: str) -> list[dict]:
+        return self.depot.par_statut(statut)
+
+    def invalider_depot(self):
+        """Le prochain accès aux demandes les relira depuis le disque."""
+        self.depot.invalider()
+
+    def lire_changements(self) -> tuple[list[str], bool]:
+        return self.depot.lire_changements()
+
+    def rafraichir_demandes(self, ids_demandes: list[str]) -> dict:
+        return self.depot.rafraichir(ids_demandes)
 
     def selectionner_fichier_document_ou_image(self, titre_dialogue="Sélectionner un fichier"):
         filetypes = (("Tous les fichiers", "*.*"), ("Documents PDF", "*.pdf"), ("Images", "*.png *.jpg *.jpeg"))
         return filedialog.askopenfilename(title=titre_dialogue, filetypes=filetypes)
 
     def supprimer_demande(self, id_demande: str) -> tuple[bool, str]:
-        return remboursement_model.supprimer_demande_par_id(id_demande)
+        return self._apres_ecriture([id_demande], remboursement_model.supprimer_demande_par_id(id_demande))
 
     def admin_purge_archives(self, age_en_annees: int) -> tuple[int, list[str]]:
-        return remboursement_model.admin_supprimer_archives_anciennes(age_en_annees)
+        resultat = remboursement_model.admin_supprimer_archives_anciennes(age_en_annees)
+        self.depot.invalider()
+        return resultat
 
     def admin_manual_archive(self, demande_id: str) -> tuple[bool, str]:
-        return remboursement_model.archiver_demande_par_id(demande_id)
-
-    def get_viewable_attachment_path(self, demande_id: str, rel_path: str) -> tuple[str | None, str | None]:
-        demande_data = self.get_demande_by_id(demande_id)
-        if not demande_data: return None, None
-        is_archived = demande_data.get('is_archived', False)
+        return self._apres_ecriture([demande_id], remboursement_model.archiver_demande_par_id(demande_id))
+
+    def _localiser_pieces_jointes(self, demande_id: str) -> tuple[bool, str | None] | None:
+        """(is_archived, reference_facture_dossier) depuis le dépôt en mémoire, sans relire le fichier de la demande."""
+        demande = self.depot.obtenir_resume(demande_id) or self.get_demande_by_id(demande_id)
+        if not demande:
+            return None
+        return demande.get('is_archived', False), demande.get("reference_facture_dossier")
+
+    def lire_piece_jointe(self, demande_id: str, rel_path: str) -> tuple[str | None, bytes | None]:
+        """
+        Retourne (chemin, None) pour une pièce d'une demande active, (None, contenu) pour une pièce archivée :
+        celle-ci est lue en mémoire dans le ZIP, sans extraction dans un dossier temporaire.
+        """
+        localisation = self._localiser_pieces_jointes(demande_id)
+        if not localisation: return None, None
+        is_archived, ref_dossier = localisation
         if not is_archived:
             return remboursement_model.get_chemin_absolu_piece_jointe(rel_path, is_archived=False), None
-        else:
-            ref_dossier = demande_data.get("reference_facture_dossier")
-            if not ref_dossier: return None, None
-            zip_archive_path = remboursement_model.get_chemin_absolu_pj_archive_zip(ref_dossier)
-            file_inside_zip = os.path.basename(rel_path)
-            return archive_utils.extract_file_to_temp(zip_archive_path, file_inside_zip)
-
-    def telecharger_copie_piece_jointe(self, chemin_absolu_pj_source: str, temp_dir_to_clean: str | None) -> tuple[
-        bool, str]:
-        if not chemin_absolu_pj_source or not os.path.exists(chemin_absolu_pj_source):
+        if not ref_dossier: return None, None
+        zip_archive_path = remboursement_model.get_chemin_absolu_pj_archive_zip(ref_dossier)
+        nom_membre = remboursement_model.get_nom_membre_archive(rel_path, ref_dossier)
+        return None, archive_utils.lire_fichier_archive(zip_archive_path, nom_membre)
+
+    def lister_pieces_jointes_archivees(self, demande_id: str) -> list[str] | None:
+        """
+        Chemins relatifs des fichiers du ZIP d'une demande archivée, lus depuis l'index de l'archive
+        sans ouvrir celle-ci. None si la demande n'est pas archivée ou si son archive n'a pas d'index à jour.
+        """
+        localisation = self._localiser_pieces_jointes(demande_id)
+        if not localisation or not localisation[0] or not localisation[1]: return None
+        ref_dossier = localisation[1]
+        zip_archive_path = remboursement_model.get_chemin_absolu_pj_archive_zip(ref_dossier)
+        noms = archive_utils.lister_fichiers_archive(zip_archive_path)
+        if noms is None: return None
+        return [os.path.join(ref_dossier, *nom.split("/")) for nom in noms]
+
+    def telecharger_copie_piece_jointe(self, chemin_absolu_pj_source: str, temp_dir_to_clean: str | None,
+                                       donnees: bytes | None = None) -> tuple[bool, str]:
+        """Avec donnees (pièce archivée lue en mémoire), chemin_absolu_pj_source ne sert qu'à nommer la copie."""
+        if not chemin_absolu_pj_source or (donnees is None and not os.path.exists(chemin_absolu_pj_source)):
             if temp_dir_to_clean: archive_utils.cleanup_temp_dir(temp_dir_to_clean)
             return False, "Fichier source non trouvé ou chemin invalide."
 
@@ -116,7 +163,11 @@ class RemboursementController:
             if temp_dir_to_clean: archive_utils.cleanup_temp_dir(temp_dir_to_clean)
             return False, "Téléchargement annulé par l'utilisateur."
         try:
-            shutil.copy2(chemin_absolu_pj_source, chemin_destination)
+            if donnees is not None:
+                with open(chemin_destination, 'wb') as f:
+                    f.write(donnees)
+            else:
+                shutil.copy2(chemin_absolu_pj_source, chemin_destination)
             return True, f"Fichier enregistré avec succès."
         except Exception as e:
             return False, f"Erreur lors de l'enregistrement du fichier : {e}"
@@ -125,43 +176,55 @@ class RemboursementController:
 
     def mlupo_accepter_constat(self, id_demande: str, chemin_pj_trop_percu_source: str, commentaire: str) -> tuple[
         bool, str]:
-        succes_pj, msg_pj, _ = remboursement_model.ajouter_piece_jointe_trop_percu(
-            id_demande, chemin_pj_trop_percu_source, self.utilisateur_actuel
-        )
-        if not succes_pj:
-            return False, f"Erreur lors de l'ajout de la pièce jointe : {msg_pj}"
-
-        succes_statut, msg_statut = remboursement_model.accepter_constat_trop_percu(
-            id_demande, commentaire, self.utilisateur_actuel
+        resultat = remboursement_model.accepter_constat_trop_percu(
+            id_demande, commentaire, self.utilisateur_actuel, chemin_pj_trop_percu_source
         )
-
-        return (succes_statut, msg_statut)
+        return self._apres_ecriture([id_demande], resultat)
 
     def mlupo_refuser_constat(self, id_demande: str, commentaire: str) -> tuple[bool, str]:
-        return remboursement_model.refuser_constat_trop_percu(id_demande, commentaire, self.utilisateur_actuel)
+        resultat = remboursement_model.refuser_constat_trop_percu(id_demande, commentaire, self.utilisateur_actuel)
+        return self._apres_ecriture([id_demande], resultat)
 
     def pneri_annuler_demande(self, id_demande: str, commentaire: str) -> tuple[bool, str]:
-        return remboursement_model.annuler_demande(id_demande, commentaire, self.utilisateur_actuel)
+        resultat = remboursement_model.annuler_demande(id_demande, commentaire, self.utilisateur_actuel)
+        return self._apres_ecriture([id_demande], resultat)
 
     def jdurousset_valider_demande(self, id_demande: str, commentaire: str | None) -> tuple[bool, str]:
-        return remboursement_model.valider_demande_par_validateur(id_demande, commentaire, self.utilisateur_actuel)
+        resultat = remboursement_model.valider_demande_par_validateur(id_demande, commentaire, self.utilisateur_actuel)
+        return self._apres_ecriture([id_demande], resultat)
 
     def jdurousset_refuser_demande(self, id_demande: str, commentaire: str) -> tuple[bool, str]:
-        return remboursement_model.refuser_demande_par_validateur(id_demande, commentaire, self.utilisateur_actuel)
+        resultat = remboursement_model.refuser_demande_par_validateur(id_demande, commentaire, self.utilisateur_actuel)
+        return self._apres_ecriture([id_demande], resultat)
 
     def pdiop_confirmer_paiement_effectue(self, id_demande: str, commentaire: str | None) -> tuple[bool, str]:
-        return remboursement_model.confirmer_paiement_effectue(id_demande, self.utilisateur_actuel, commentaire)
+        resultat = remboursement_model.confirmer_paiement_effectue(id_demande, self.utilisateur_actuel, commentaire)
+        return self._apres_ecriture([id_demande], resultat)
+
+    def jdurousset_valider_demandes_par_lot(self, ids_demandes: list[str], commentaire: str | None) -> list[
+        tuple[str, bool, str]]:
+        resultats = remboursement_model.valider_demandes_par_lot(ids_demandes, commentaire, self.utilisateur_actuel)
+        return self._apres_ecriture(ids_demandes, resultats)
+
+    def pdiop_confirmer_paiements_par_lot(self, ids_demandes: list[str], commentaire: str | None) -> list[
+        tuple[str, bool, str]]:
+        resultats = remboursement_model.confirmer_paiements_par_lot(ids_demandes, self.utilisateur_actuel, commentaire)
+        return self._apres_ecriture(ids_demandes, resultats)
 
     def pneri_resoumettre_demande_corrigee(self, id_demande: str, commentaire: str, nouveau_chemin_facture: str | None,
                                            nouveau_chemin_rib: str | None) -> tuple[bool, str]:
-        return remboursement_model.pneri_resoumettre_demande_corrigee(id_demande, commentaire, nouveau_chemin_facture,
-                                                                      nouveau_chemin_rib, self.utilisateur_actuel)
+        resultat = remboursement_model.pneri_resoumettre_demande_corrigee(id_demande, commentaire,
+                                                                          nouveau_chemin_facture, nouveau_chemin_rib,
+                                                                          self.utilisateur_actuel)
+        return self._apres_ecriture([id_demande], resultat)
 
     def mlupo_resoumettre_constat_corrige(self, id_demande: str, commentaire: str,
                                           nouveau_chemin_pj_trop_percu: str | None) -> tuple[bool, str]:
-        return remboursement_model.mlupo_resoumettre_constat_corrige(id_demande, commentaire,
-                                                                     nouveau_chemin_pj_trop_percu,
-                                                                     self.utilisateur_actuel)
+        resultat = remboursement_model.mlupo_resoumettre_constat_corrige(id_demande, commentaire,
+                                                                         nouveau_chemin_pj_trop_percu,
+                                                                         self.utilisateur_actuel)
+        return self._apres_ecriture([id_demande], resultat)
 
     def mlupo_refuser_correction(self, id_demande: str, commentaire: str) -> tuple[bool, str]:
-        return remboursement_model.mlupo_refuser_correction(id_demande, commentaire, self.utilisateur_actuel)
\ No newline at end of file
+        resultat = remboursement_model.mlupo_refuser_correction(id_demande, commentaire, self.utilisateur_actuel)
+        return self._apres_ecriture([id_demande], resultat)
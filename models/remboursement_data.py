@@ -4,14 +4,20 @@ import datetime
 import shutil
 import re
 import json
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import ValidationError
 
 from config.settings import REMBOURSEMENTS_ATTACHMENTS_DIR, REMBOURSEMENTS_JSON_DIR, REMBOURSEMENTS_ARCHIVE_JSON_DIR, \
-    REMBOURSEMENTS_ARCHIVE_ATTACHMENTS_DIR
-from utils.data_manager import read_modify_write_json, _save_json_atomically
-from utils.ui_messages import show_recovery_success, show_recovery_error
+    REMBOURSEMENTS_ARCHIVE_ATTACHMENTS_DIR, REMBOURSEMENTS_INDEX_FILE
+from utils.data_manager import read_modify_write_json, _save_json_atomically, load_json_data, deserialiser_json
+from utils import archive_utils
+from utils.recovery_events import RECUPERATION_RESTAUREE, RECUPERATION_BACKUP_INVALIDE, RECUPERATION_SANS_BACKUP, \
+    signaler_recuperation, publier_recuperations
+from . import remboursement_journal
 from .schemas import Remboursement
+from .remboursement_resume import resume_demande
 
 
 def _sanitize_directory_name(name: str) -> str:
@@ -32,13 +38,98 @@ def _sanitize_directory_name(name: str) -> str:
     return sanitized_base_name + ext
 
 
-def _load_and_validate_demande(file_path: str) -> dict | None:
+# --- Cache des demandes chargées ---
+# Cache du processus : chemin -> ((st_mtime_ns, st_size), demande validée). Une entrée n'est
+# réutilisée que si le fichier n'a pas changé depuis sa lecture. La demande en cache est partagée, sans
+# copie : elle ne doit pas être modifiée ; les lecteurs en prennent une copie superficielle pour poser is_archived.
+_cache_demandes = {}
+_cache_verrou = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "validations": 0}
+
+# --- Chargement parallèle ---
+# Sur un lecteur réseau, c'est la latence d'ouverture de chaque fichier qui domine : les fichiers sont lus
+# par un pool de threads borné. Les restaurations depuis .bak sont rassemblées et publiées en une fois.
+NOMBRE_LECTEURS_DEMANDES = 8
+
+
+def _signature_fichier(file_path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _evincer_du_cache(chemins):
+    with _cache_verrou:
+        for chemin in chemins:
+            if _cache_demandes.pop(chemin, None) is not None:
+                _cache_stats["evictions"] += 1
+
+
+def _evincer_fichiers_disparus(directory: str, fichiers_presents: set):
+    with _cache_verrou:
+        chemins_disparus = [chemin for chemin in _cache_demandes
+                            if os.path.dirname(chemin) == directory and chemin not in fichiers_presents]
+    _evincer_du_cache(chemins_disparus)
+
+
+def statistiques_cache_demandes() -> dict:
+    with _cache_verrou:
+        stats = dict(_cache_stats)
+        stats["entrees"] = len(_cache_demandes)
+    return stats
+
+
+def vider_cache_demandes():
+    with _cache_verrou:
+        _cache_demandes.clear()
+
+
+def _lire_demande_json(file_path: str) -> dict:
+    with open(file_path, 'rb') as f:
+        data = deserialiser_json(f.read())
+    demande = Remboursement.model_validate(data).model_dump()
+    with _cache_verrou:
+        _cache_stats["validations"] += 1
+    return demande
+
+
+def _load_and_validate_demande(file_path: str, recuperations: list | None = None) -> dict | None:
+    """
+    Retourne la demande depuis le cache si le fichier n'a pas changé, sinon la recharge.
+    Le dict renvoyé est partagé avec le cache : il doit être traité en lecture seule.
+    Si recuperations est une liste, les restaurations depuis .bak y sont ajoutées au lieu d'être publiées une à une.
+    """
+    signature = _signature_fichier(file_path)
+    if signature is not None:
+        with _cache_verrou:
+            entree = _cache_demandes.get(file_path)
+            if entree is not None and entree[0] == signature:
+                _cache_stats["hits"] += 1
+                return entree[1]
+            _cache_stats["misses"] += 1
+
+    demande = _load_and_validate_demande_depuis_disque(file_path, recuperations)
+    if demande is None:
+        _evincer_du_cache([file_path])
+    elif signature is not None and _signature_fichier(file_path) == signature:
+        with _cache_verrou:
+            _cache_demandes[file_path] = (signature, demande)
+    return demande
+
+
+def _signaler_recuperation(recuperations: list | None, file_path: str, resultat: str):
+    if recuperations is not None:
+        recuperations.append((file_path, resultat))
+    else:
+        signaler_recuperation(file_path, resultat)
+
+
+def _load_and_validate_demande_depuis_disque(file_path: str, recuperations: list | None = None) -> dict | None:
     """Charge et valide un unique fichier JSON de demande, avec mécanisme de récupération."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            validated_model = Remboursement.model_validate(data)
-            return validated_model.model_dump()
+        return _lire_demande_json(file_path)
     except (json.JSONDecodeError, ValidationError, IOError) as e:
         print(f"ALERTE: Fichier de demande invalide ou corrompu détecté : {file_path}. Erreur : {e}")
         backup_path = file_path + ".bak"
@@ -46,44 +137,178 @@ def _load_and_validate_demande(file_path: str) -> dict | None:
             try:
                 print(f"Tentative de restauration depuis {backup_path}...")
                 shutil.copy2(backup_path, file_path)
-                with open(file_path, 'r', encoding='utf-8') as f_bak:
-                    data_bak = json.load(f_bak)
-                    validated_data = Remboursement.model_validate(data_bak).model_dump()
+                validated_data = _lire_demande_json(file_path)
                 print("Restauration réussie.")
-                show_recovery_success(file_path)
+                _signaler_recuperation(recuperations, file_path, RECUPERATION_RESTAUREE)
                 return validated_data
             except (json.JSONDecodeError, ValidationError, IOError):
                 print(f"ERREUR: Le fichier de backup {backup_path} est aussi invalide.")
-                show_recovery_error(file_path, backup_exists=True)
+                _signaler_recuperation(recuperations, file_path, RECUPERATION_BACKUP_INVALIDE)
                 return None
         else:
             print("ERREUR: Aucun fichier de backup trouvé.")
-            show_recovery_error(file_path, backup_exists=False)
+            _signaler_recuperation(recuperations, file_path, RECUPERATION_SANS_BACKUP)
             return None
     return None
 
 
-def charger_toutes_les_demandes_data(include_archives: bool = False) -> list:
-    demandes = []
-
-    def read_from_dir(directory, is_archived_flag):
-        if not os.path.exists(directory):
-            return []
-        loaded_demandes = []
-        for filename in os.listdir(directory):
-            if filename.endswith('.json') and not filename.endswith('.bak'):
-                file_path = os.path.join(directory, filename)
-                demande_data = _load_and_validate_demande(file_path)
+def _lister_fichiers_demandes(directory: str) -> list[str]:
+    if not os.path.exists(directory):
+        return []
+    fichiers = [os.path.join(directory, filename) for filename in os.listdir(directory)
+                if filename.endswith('.json') and not filename.endswith('.bak')]
+    _evincer_fichiers_disparus(directory, set(fichiers))
+    return sorted(fichiers)
+
+
+def _lire_dossiers_demandes(dossiers: list[tuple[str, bool]]) -> list[list]:
+    """
+    Lit les demandes de plusieurs dossiers [(dossier, is_archived)] avec un pool de NOMBRE_LECTEURS_DEMANDES threads.
+    Les dossiers sont lus en même temps ; le résultat suit l'ordre des dossiers puis des noms de fichiers.
+    Les restaurations depuis .bak sont publiées en un seul bloc, à la fin du chargement.
+    """
+    recuperations = []
+    with ThreadPoolExecutor(max_workers=max(1, NOMBRE_LECTEURS_DEMANDES), thread_name_prefix="lecture_demandes") as pool:
+        fichiers_par_dossier = list(pool.map(_lister_fichiers_demandes, [directory for directory, _ in dossiers]))
+        fichiers = [file_path for liste in fichiers_par_dossier for file_path in liste]
+        lues = iter(pool.map(lambda file_path: _load_and_validate_demande(file_path, recuperations), fichiers))
+        demandes_par_dossier = []
+        for (_, is_archived_flag), liste in zip(dossiers, fichiers_par_dossier):
+            demandes = []
+            for _ in liste:
+                demande_data = next(lues)
                 if demande_data:
-                    demande_data['is_archived'] = is_archived_flag
-                    loaded_demandes.append(demande_data)
-        return loaded_demandes
+                    demandes.append(dict(demande_data, is_archived=is_archived_flag))
+            demandes_par_dossier.append(demandes)
+    publier_recuperations(recuperations)
+    return demandes_par_dossier
 
-    demandes.extend(read_from_dir(REMBOURSEMENTS_JSON_DIR, is_archived_flag=False))
+
+def charger_toutes_les_demandes_data(include_archives: bool = False) -> list:
+    dossiers = [(REMBOURSEMENTS_JSON_DIR, False)]
     if include_archives:
-        demandes.extend(read_from_dir(REMBOURSEMENTS_ARCHIVE_JSON_DIR, is_archived_flag=True))
+        dossiers.append((REMBOURSEMENTS_ARCHIVE_JSON_DIR, True))
+    return [demande for demandes in _lire_dossiers_demandes(dossiers) for demande in demandes]
+
+
+# --- Index des demandes ---
+# Le fichier d'index contient un résumé compact de chaque demande (clé : id_demande) ainsi que
+# la date de modification (st_mtime_ns) de chaque dossier de données au moment de sa dernière
+# mise à jour. Si un dossier a été modifié sans que l'index suive, l'index est considéré comme
+# périmé et reconstruit à partir des fichiers. Un index d'une version antérieure est entièrement reconstruit.
 
-    return demandes
+VERSION_INDEX = 2
+_CLE_DOSSIER_ACTIF = "actif"
+_CLE_DOSSIER_ARCHIVE = "archive"
+
+
+def _mtime_dossier(directory: str) -> int | None:
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _etat_dossiers() -> dict:
+    return {
+        _CLE_DOSSIER_ACTIF: _mtime_dossier(REMBOURSEMENTS_JSON_DIR),
+        _CLE_DOSSIER_ARCHIVE: _mtime_dossier(REMBOURSEMENTS_ARCHIVE_JSON_DIR)
+    }
+
+
+def _resume_demande_ecrite(demande: dict, is_archived: bool) -> dict:
+    """Résumé d'une demande qui vient d'être écrite, calculé sur les valeurs validées que donnera sa relecture."""
+    try:
+        demande = Remboursement.model_validate(demande).model_dump()
+    except ValidationError as e:
+        print(f"AVERTISSEMENT: La demande {demande.get('id_demande')} écrite n'est pas conforme au schéma : {e}")
+    return resume_demande(demande, is_archived)
+
+
+def _mettre_a_jour_index(modifications: dict, etat_avant: dict):
+    """
+    Applique des modifications à l'index (id_demande -> résumé, ou None pour retirer l'entrée).
+    L'horodatage d'un dossier n'est avancé que si l'index était à jour avant l'écriture,
+    pour ne jamais masquer une modification faite par un autre poste sans mise à jour de l'index.
+    """
+
+    def modification(index: dict) -> bool:
+        entrees = index.setdefault("demandes", {})
+        etat_index = index.setdefault("etat_dossiers", {})
+        for id_demande, resume in modifications.items():
+            if resume is None:
+                entrees.pop(id_demande, None)
+            else:
+                entrees[id_demande] = resume
+        etat_actuel = _etat_dossiers()
+        for cle, mtime_avant in etat_avant.items():
+            if etat_index.get(cle) is not None and etat_index.get(cle) == mtime_avant:
+                etat_index[cle] = etat_actuel[cle]
+        return True
+
+    try:
+        read_modify_write_json(REMBOURSEMENTS_INDEX_FILE, modification, compact=True)
+    except (IOError, OSError, TimeoutError) as e:
+        print(f"AVERTISSEMENT: Impossible de mettre à jour l'index des demandes : {e}")
+
+
+def _reconstruire_index_dossiers(dossiers_perimes: list[tuple[str, str, bool]]) -> dict:
+    """Relit en parallèle les dossiers [(clé, dossier, is_archived)] et réécrit leurs résumés dans l'index en une fois."""
+    mtimes_avant_scan = {cle_dossier: _mtime_dossier(directory) for cle_dossier, directory, _ in dossiers_perimes}
+    demandes_par_dossier = _lire_dossiers_demandes([(directory, flag) for _, directory, flag in dossiers_perimes])
+    resumes_par_dossier = {
+        cle_dossier: [resume_demande(d, is_archived_flag) for d in demandes]
+        for (cle_dossier, _, is_archived_flag), demandes in zip(dossiers_perimes, demandes_par_dossier)
+    }
+
+    def modification(index: dict) -> bool:
+        if index.get("version") != VERSION_INDEX:
+            # Les résumés des autres dossiers sont à l'ancien format : ils seront reconstruits à leur tour.
+            index["etat_dossiers"] = {}
+            index["version"] = VERSION_INDEX
+        entrees = index.setdefault("demandes", {})
+        for cle_dossier, _, is_archived_flag in dossiers_perimes:
+            for id_demande in [i for i, r in entrees.items() if r.get("is_archived", False) == is_archived_flag]:
+                del entrees[id_demande]
+            for resume in resumes_par_dossier[cle_dossier]:
+                entrees[resume["id_demande"]] = resume
+            index.setdefault("etat_dossiers", {})[cle_dossier] = mtimes_avant_scan[cle_dossier]
+        return True
+
+    try:
+        read_modify_write_json(REMBOURSEMENTS_INDEX_FILE, modification, compact=True)
+    except (IOError, OSError, TimeoutError) as e:
+        print(f"AVERTISSEMENT: Impossible d'enregistrer l'index des demandes : {e}")
+    return resumes_par_dossier
+
+
+def charger_index_demandes_data(include_archives: bool = False) -> list:
+    """Retourne les résumés des demandes depuis l'index, en ne rescannant que les dossiers périmés."""
+    index = load_json_data(REMBOURSEMENTS_INDEX_FILE)
+    entrees = index.get("demandes", {}) if isinstance(index, dict) else {}
+    etat_index = index.get("etat_dossiers", {}) if isinstance(index, dict) else {}
+    if isinstance(index, dict) and index.get("version") != VERSION_INDEX:
+        etat_index = {}
+
+    dossiers = [(_CLE_DOSSIER_ACTIF, REMBOURSEMENTS_JSON_DIR, False)]
+    if include_archives:
+        dossiers.append((_CLE_DOSSIER_ARCHIVE, REMBOURSEMENTS_ARCHIVE_JSON_DIR, True))
+
+    resumes_par_dossier = {}
+    dossiers_perimes = []
+    for cle_dossier, directory, is_archived_flag in dossiers:
+        mtime_actuel = _mtime_dossier(directory)
+        if mtime_actuel is None:
+            continue
+        if etat_index.get(cle_dossier) == mtime_actuel:
+            resumes_par_dossier[cle_dossier] = [r for r in entrees.values()
+                                                if r.get("is_archived", False) == is_archived_flag]
+        else:
+            print(f"Index des demandes périmé pour '{cle_dossier}', reconstruction...")
+            dossiers_perimes.append((cle_dossier, directory, is_archived_flag))
+    if dossiers_perimes:
+        resumes_par_dossier.update(_reconstruire_index_dossiers(dossiers_perimes))
+    return [resume for cle_dossier, _, _ in dossiers for resume in resumes_par_dossier.get(cle_dossier, [])]
 
 
 def creer_demande_data(nouvelle_demande_dict: dict) -> dict | None:
@@ -92,11 +317,14 @@ def creer_demande_data(nouvelle_demande_dict: dict) -> dict | None:
         return None
 
     file_path = os.path.join(REMBOURSEMENTS_JSON_DIR, f"{id_demande}.json")
+    etat_avant = _etat_dossiers()
     try:
         _save_json_atomically(file_path, nouvelle_demande_dict)
     except IOError as e:
         print(f"Erreur critique lors de la sauvegarde de la nouvelle demande {id_demande}: {e}")
         return None
+    _mettre_a_jour_index({id_demande: _resume_demande_ecrite(nouvelle_demande_dict, False)}, etat_avant)
+    remboursement_journal.enregistrer_evenement(remboursement_journal.OP_CREATION, id_demande)
 
     ref_dossier = nouvelle_demande_dict.get("reference_facture_dossier")
     if ref_dossier:
@@ -116,38 +344,46 @@ def obtenir_demande_par_id_data(id_demande: str) -> dict | None:
     file_path_active = os.path.join(REMBOURSEMENTS_JSON_DIR, f"{id_demande}.json")
     if os.path.exists(file_path_active):
         demande = _load_and_validate_demande(file_path_active)
-        if demande:
-            demande['is_archived'] = False
-        return demande
+        return dict(demande, is_archived=False) if demande else demande
 
     file_path_archive = os.path.join(REMBOURSEMENTS_ARCHIVE_JSON_DIR, f"{id_demande}.json")
     if os.path.exists(file_path_archive):
         demande = _load_and_validate_demande(file_path_archive)
-        if demande:
-            demande['is_archived'] = True
-        return demande
+        return dict(demande, is_archived=True) if demande else demande
 
     return None
 
 
+def _appliquer_mises_a_jour(demande: dict, updates: dict):
+    for cle, valeur in updates.items():
+        if cle in ["chemins_factures_stockees", "chemins_rib_stockes",
+                   "pieces_capture_trop_percu"] and isinstance(valeur, str):
+            if cle not in demande or not isinstance(demande[cle], list):
+                demande[cle] = []
+            demande[cle].append(valeur)
+        else:
+            demande[cle] = valeur
+
+
 def mettre_a_jour_demande_data(id_demande: str, updates: dict) -> bool:
     file_path = os.path.join(REMBOURSEMENTS_JSON_DIR, f"{id_demande}.json")
     if not os.path.exists(file_path):
         return False
 
+    demande_modifiee = {}
+
     def modification(demande: dict) -> bool:
-        for cle, valeur in updates.items():
-            if cle in ["chemins_factures_stockees", "chemins_rib_stockes",
-                       "pieces_capture_trop_percu"] and isinstance(valeur, str):
-                if cle not in demande or not isinstance(demande[cle], list):
-                    demande[cle] = []
-                demande[cle].append(valeur)
-            else:
-                demande[cle] = valeur
+        demande_modifiee["data"] = demande
+        _appliquer_mises_a_jour(demande, updates)
         demande["date_derniere_modification"] = datetime.datetime.now().isoformat()
         return True
 
-    return read_modify_write_json(file_path, modification)
+    etat_avant = _etat_dossiers()
+    succes = read_modify_write_json(file_path, modification)
+    if succes and "data" in demande_modifiee:
+        _mettre_a_jour_index({id_demande: _resume_demande_ecrite(demande_modifiee["data"], False)}, etat_avant)
+        remboursement_journal.enregistrer_evenement(remboursement_journal.OP_MISE_A_JOUR, id_demande)
+    return succes
 
 
 def ajouter_entree_historique_data(id_demande: str, nouvelle_entree: dict) -> bool:
@@ -155,11 +391,71 @@ def ajouter_entree_historique_data(id_demande: str, nouvelle_entree: dict) -> bo
     if not os.path.exists(file_path):
         return False
 
+    demande_modifiee = {}
+
     def modification(demande: dict) -> bool:
+        demande_modifiee["data"] = demande
         demande["historique_statuts"].append(nouvelle_entree)
         return True
 
-    return read_modify_write_json(file_path, modification)
+    etat_avant = _etat_dossiers()
+    succes = read_modify_write_json(file_path, modification)
+    if succes and "data" in demande_modifiee:
+        _mettre_a_jour_index({id_demande: _resume_demande_ecrite(demande_modifiee["data"], False)}, etat_avant)
+        remboursement_journal.enregistrer_evenement(remboursement_journal.OP_HISTORIQUE, id_demande)
+    return succes
+
+
+TRANSITION_OK = "ok"
+TRANSITION_NON_TROUVEE = "non_trouvee"
+TRANSITION_STATUT_INVALIDE = "statut_invalide"
+TRANSITION_ERREUR = "erreur"
+
+
+def transition_demande_data(id_demande: str, statuts_depart: str | list | tuple | None, nouveau_statut: str,
+                            updates: dict, nouvelle_entree: dict) -> tuple[str, dict | None]:
+    """
+    Change le statut d'une demande en une seule transaction : vérification du statut de départ,
+    mise à jour des champs et ajout à l'historique sous un même verrou et en une seule écriture.
+    'statuts_depart' est le statut attendu, une liste de statuts acceptés, ou None pour tout accepter.
+    Retourne (code TRANSITION_*, demande lue) ; la demande est fournie aussi en cas de statut invalide.
+    """
+    file_path = os.path.join(REMBOURSEMENTS_JSON_DIR, f"{id_demande}.json")
+    if not os.path.exists(file_path):
+        return TRANSITION_NON_TROUVEE, None
+    if isinstance(statuts_depart, str):
+        statuts_depart = [statuts_depart]
+
+    demande_lue = {}
+
+    def modification(demande: dict) -> bool:
+        if not demande:
+            return False
+        demande_lue["data"] = demande
+        if statuts_depart is not None and demande.get("statut") not in statuts_depart:
+            return False
+        _appliquer_mises_a_jour(demande, updates)
+        demande["statut"] = nouveau_statut
+        demande["date_derniere_modification"] = updates.get("date_derniere_modification",
+                                                            datetime.datetime.now().isoformat())
+        demande.setdefault("historique_statuts", []).append(nouvelle_entree)
+        return True
+
+    etat_avant = _etat_dossiers()
+    try:
+        succes = read_modify_write_json(file_path, modification)
+    except (IOError, OSError, TimeoutError) as e:
+        print(f"Erreur lors de la transition de la demande {id_demande} vers '{nouveau_statut}': {e}")
+        return TRANSITION_ERREUR, demande_lue.get("data")
+
+    if "data" not in demande_lue:
+        return TRANSITION_NON_TROUVEE, None
+    if not succes:
+        return TRANSITION_STATUT_INVALIDE, demande_lue["data"]
+
+    _mettre_a_jour_index({id_demande: _resume_demande_ecrite(demande_lue["data"], False)}, etat_avant)
+    remboursement_journal.enregistrer_evenement(remboursement_journal.OP_TRANSITION, id_demande)
+    return TRANSITION_OK, demande_lue["data"]
 
 
 def supprimer_demande_par_id_data(id_demande_a_supprimer: str) -> tuple[bool, str]:
@@ -174,6 +470,7 @@ def supprimer_demande_par_id_data(id_demande_a_supprimer: str) -> tuple[bool, st
     file_path = os.path.join(json_dir, f"{id_demande_a_supprimer}.json")
     backup_path = file_path + ".bak"
 
+    etat_avant = _etat_dossiers()
     try:
         if os.path.exists(file_path):
             os.remove(file_path)
@@ -181,12 +478,16 @@ def supprimer_demande_par_id_data(id_demande_a_supprimer: str) -> tuple[bool, st
             os.remove(backup_path)
     except OSError as e:
         return False, f"Erreur lors de la suppression des fichiers de données : {e}"
+    _evincer_du_cache([file_path])
+    _mettre_a_jour_index({id_demande_a_supprimer: None}, etat_avant)
+    remboursement_journal.enregistrer_evenement(remboursement_journal.OP_SUPPRESSION, id_demande_a_supprimer)
 
     ref_dossier = demande_a_supprimer.get("reference_facture_dossier")
     if ref_dossier:
         if is_archived:
             chemin_pj_a_supprimer = os.path.join(attachment_dir, f"{ref_dossier}.zip")
             if os.path.exists(chemin_pj_a_supprimer):
+                archive_utils.supprimer_index_archive(chemin_pj_a_supprimer)
                 try:
                     os.remove(chemin_pj_a_supprimer)
                 except OSError as e:
@@ -212,6 +513,7 @@ def archiver_demande_par_id(id_demande: str) -> bool:
     source_bak_path = source_json_path + ".bak"
     dest_bak_path = dest_json_path + ".bak"
     bak_moved = False
+    etat_avant = _etat_dossiers()
 
     if os.path.exists(source_json_path):
         try:
@@ -235,20 +537,27 @@ def archiver_demande_par_id(id_demande: str) -> bool:
         source_attachment_path = os.path.join(REMBOURSEMENTS_ATTACHMENTS_DIR, ref_dossier)
         dest_zip_path = os.path.join(REMBOURSEMENTS_ARCHIVE_ATTACHMENTS_DIR, f"{ref_dossier}.zip")
         if os.path.exists(source_attachment_path) and os.path.isdir(source_attachment_path):
+            archive_utils.oublier_archive(dest_zip_path)
             try:
                 with zipfile.ZipFile(dest_zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
                     for root, _, files in os.walk(source_attachment_path):
                         for file in files:
                             file_path = os.path.join(root, file)
                             zipf.write(file_path, os.path.relpath(file_path, source_attachment_path))
+                archive_utils.ecrire_index_archive(dest_zip_path)
                 shutil.rmtree(source_attachment_path)
             except Exception as e:
                 print(f"Erreur lors de la compression des PJ pour la demande {id_demande}: {e}")
                 if os.path.exists(dest_zip_path):
                     os.remove(dest_zip_path)
+                archive_utils.supprimer_index_archive(dest_zip_path)
                 if os.path.exists(dest_json_path):
                     shutil.move(dest_json_path, source_json_path)
                 if bak_moved and os.path.exists(dest_bak_path):
                     shutil.move(dest_bak_path, source_bak_path)
                 return False
+
+    _evincer_du_cache([source_json_path])
+    _mettre_a_jour_index({id_demande: resume_demande(demande_data, True)}, etat_avant)
+    remboursement_journal.enregistrer_evenement(remboursement_journal.OP_ARCHIVAGE, id_demande)
     return True
\ No newline at end of file
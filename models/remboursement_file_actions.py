@@ -0,0 +1,79 @@
+# models/remboursement_file_actions.py
+import threading
+from .remboursement_workflow import statut_requiert_action
+
+
+class FileActionsUtilisateur:
+    """
+    File des demandes attendant une action d'un utilisateur donné.
+
+    Les demandes sont rangées par couple (statut, cree_par) : la règle statut_requiert_action n'est évaluée
+    qu'une fois par couple, et une modification de demande ne fait que la déplacer d'un panier à l'autre.
+    Les paniers sont modifiés depuis le thread Tk et lus depuis les workers : un verrou les protège.
+    """
+
+    def __init__(self, nom_utilisateur: str, roles: list, demandes: list[dict] | None = None):
+        self.nom_utilisateur = nom_utilisateur
+        self.roles = list(roles)
+        self._paniers = {}
+        self._cle_par_id = {}
+        self._paniers_actifs = {}
+        self._nb_en_attente = 0
+        self._verrou = threading.Lock()
+        for demande in demandes or []:
+            self.mettre_a_jour(demande)
+
+    def _panier_actif(self, cle: tuple) -> bool:
+        actif = self._paniers_actifs.get(cle)
+        if actif is None:
+            actif = statut_requiert_action(cle[0], cle[1], self.nom_utilisateur, self.roles)
+            self._paniers_actifs[cle] = actif
+        return actif
+
+    def mettre_a_jour(self, demande: dict):
+        id_demande = demande.get("id_demande")
+        if not id_demande:
+            return
+        cle = (demande.get("statut"), demande.get("cree_par"))
+        with self._verrou:
+            if self._cle_par_id.get(id_demande) == cle:
+                return
+            self._retirer(id_demande)
+            self._ajouter(id_demande, cle)
+
+    def _ajouter(self, id_demande: str, cle: tuple):
+        self._paniers.setdefault(cle, set()).add(id_demande)
+        self._cle_par_id[id_demande] = cle
+        if self._panier_actif(cle):
+            self._nb_en_attente += 1
+
+    def retirer(self, id_demande: str):
+        with self._verrou:
+            self._retirer(id_demande)
+
+    def _retirer(self, id_demande: str):
+        cle = self._cle_par_id.pop(id_demande, None)
+        if cle is None:
+            return
+        panier = self._paniers[cle]
+        panier.discard(id_demande)
+        if not panier:
+            del self._paniers[cle]
+        if self._panier_actif(cle):
+            self._nb_en_attente -= 1
+
+    def nombre_en_attente(self) -> int:
+        return self._nb_en_attente
+
+    def est_en_attente(self, id_demande: str) -> bool:
+        with self._verrou:
+            cle = self._cle_par_id.get(id_demande)
+            return cle is not None and self._panier_actif(cle)
+
+    def ids_en_attente(self) -> set[str]:
+        ids = set()
+        with self._verrou:
+            for cle, panier in self._paniers.items():
+                if self._panier_actif(cle):
+                    ids |= panier
+        return ids
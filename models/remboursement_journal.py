@@ -0,0 +1,102 @@
+# models/remboursement_journal.py
+import os
+import json
+import uuid
+import datetime
+
+from config.settings import REMBOURSEMENTS_JOURNAL_FILE
+from utils.file_lock import FileLock, chemin_verrou
+
+# Journal des changements, partagé entre tous les postes : une ligne JSON par événement.
+# La première ligne est un en-tête portant un identifiant de génération. Quand le journal
+# dépasse TAILLE_MAX_JOURNAL, il est renommé en '.1' et une nouvelle génération commence ;
+# les clients qui suivaient l'ancienne génération doivent alors tout recharger.
+
+OP_CREATION = "creation"
+OP_MISE_A_JOUR = "mise_a_jour"
+OP_HISTORIQUE = "historique"
+OP_TRANSITION = "transition"
+OP_ARCHIVAGE = "archivage"
+OP_SUPPRESSION = "suppression"
+
+TAILLE_MAX_JOURNAL = 512 * 1024
+
+
+def _get_lock_path() -> str:
+    return chemin_verrou(REMBOURSEMENTS_JOURNAL_FILE)
+
+
+def _nouvel_en_tete() -> str:
+    en_tete = {"generation": uuid.uuid4().hex, "creation": datetime.datetime.now().isoformat()}
+    return json.dumps(en_tete) + "\n"
+
+
+def _lire_generation(f) -> str | None:
+    premiere_ligne = f.readline()
+    if not premiere_ligne.endswith(b"\n"):
+        return None
+    try:
+        return json.loads(premiere_ligne).get("generation")
+    except (json.JSONDecodeError, AttributeError):
+        return None
+
+
+def enregistrer_evenement(operation: str, id_demande: str):
+    evenement = {"op": operation, "id_demande": id_demande, "date": datetime.datetime.now().isoformat()}
+    ligne = json.dumps(evenement, ensure_ascii=False) + "\n"
+    try:
+        with FileLock(_get_lock_path()):
+            taille = os.path.getsize(REMBOURSEMENTS_JOURNAL_FILE) if os.path.exists(REMBOURSEMENTS_JOURNAL_FILE) else 0
+            if taille > TAILLE_MAX_JOURNAL:
+                os.replace(REMBOURSEMENTS_JOURNAL_FILE, REMBOURSEMENTS_JOURNAL_FILE + ".1")
+                taille = 0
+            with open(REMBOURSEMENTS_JOURNAL_FILE, 'a', encoding='utf-8') as f:
+                if taille == 0:
+                    f.write(_nouvel_en_tete())
+                f.write(ligne)
+    except (IOError, OSError, TimeoutError) as e:
+        print(f"AVERTISSEMENT: Impossible d'écrire dans le journal des demandes : {e}")
+
+
+def position_courante() -> tuple[str | None, int]:
+    """Position (génération, offset) de la fin du journal, pour ne suivre que les événements à venir."""
+    try:
+        with open(REMBOURSEMENTS_JOURNAL_FILE, 'rb') as f:
+            generation = _lire_generation(f)
+            f.seek(0, os.SEEK_END)
+            return generation, f.tell()
+    except (IOError, OSError):
+        return None, 0
+
+
+def lire_evenements_depuis(position: tuple[str | None, int]) -> tuple[tuple[str | None, int], list, bool]:
+    """
+    Lit les événements ajoutés depuis la position donnée.
+    Retourne (nouvelle position, événements, reinitialise). 'reinitialise' vaut True si le journal
+    a changé de génération : les événements intermédiaires sont perdus et un rechargement complet est nécessaire.
+    """
+    generation_connue, offset = position
+    try:
+        with open(REMBOURSEMENTS_JOURNAL_FILE, 'rb') as f:
+            generation = _lire_generation(f)
+            if generation is None:
+                return position, [], False
+            if generation_connue is None:
+                # Journal créé depuis le dernier chargement : tous ses événements sont nouveaux.
+                offset = f.tell()
+            elif generation != generation_connue:
+                f.seek(0, os.SEEK_END)
+                return (generation, f.tell()), [], True
+            f.seek(offset)
+            contenu = f.read()
+    except (IOError, OSError):
+        return position, [], False
+
+    fin_derniere_ligne = contenu.rfind(b"\n") + 1
+    evenements = []
+    for ligne in contenu[:fin_derniere_ligne].splitlines():
+        try:
+            evenements.append(json.loads(ligne))
+        except json.JSONDecodeError:
+            print(f"AVERTISSEMENT: Ligne invalide ignorée dans le journal des demandes : {ligne[:80]!r}")
+    return (generation, offset + fin_derniere_ligne), evenements, False
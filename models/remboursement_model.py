@@ -4,6 +4,7 @@ import datetime
 import uuid
 import shutil
 from . import remboursement_data
+from . import remboursement_journal
 from . import remboursement_workflow
 from config.settings import REMBOURSEMENTS_ATTACHMENTS_DIR, REMBOURSEMENTS_ARCHIVE_ATTACHMENTS_DIR, STATUT_CREEE, \
     STATUT_PAIEMENT_EFFECTUE, STATUT_ANNULEE
@@ -24,13 +25,18 @@ def obtenir_toutes_les_demandes(include_archives: bool = False):
     return demandes_formatees
 
 
+def obtenir_resumes_demandes(include_archives: bool = False) -> list:
+    """Résumés compacts des demandes, lus depuis l'index (sans historique ni pièces jointes)."""
+    return remboursement_data.charger_index_demandes_data(include_archives)
+
+
 def archiver_les_vieilles_demandes() -> int:
     """Parcourt les demandes et archive celles qui sont terminées depuis plus d'un an."""
     count = 0
     douze_mois = datetime.timedelta(days=365)
     now = datetime.datetime.now()
 
-    demandes_actives = remboursement_data.charger_toutes_les_demandes_data(include_archives=False)
+    demandes_actives = obtenir_resumes_demandes(include_archives=False)
 
     for demande in demandes_actives:
         statut = demande.get("statut")
@@ -52,7 +58,7 @@ def admin_supprimer_archives_anciennes(age_en_annees: int) -> tuple[int, list[st
     cutoff_delta = datetime.timedelta(days=age_en_annees * 365.25)
     date_limite = datetime.datetime.now() - cutoff_delta
 
-    demandes_archivees = [d for d in obtenir_toutes_les_demandes(include_archives=True) if d.get('is_archived')]
+    demandes_archivees = [d for d in obtenir_resumes_demandes(include_archives=True) if d.get('is_archived')]
 
     for demande in demandes_archivees:
         date_modif_str = demande.get("date_derniere_modification")
@@ -71,6 +77,8 @@ def admin_supprimer_archives_anciennes(age_en_annees: int) -> tuple[int, list[st
     return demandes_supprimees, erreurs
 
 
+position_journal_courante = remboursement_journal.position_courante
+lire_changements_depuis = remboursement_journal.lire_evenements_depuis
 archiver_demande_par_id = remboursement_data.archiver_demande_par_id
 supprimer_demande_par_id = remboursement_data.supprimer_demande_par_id_data
 ajouter_piece_jointe_trop_percu = remboursement_workflow.ajouter_piece_jointe_trop_percu_action
@@ -80,6 +88,8 @@ annuler_demande = remboursement_workflow.annuler_demande_action
 valider_demande_par_validateur = remboursement_workflow.valider_demande_par_validateur_action
 refuser_demande_par_validateur = remboursement_workflow.refuser_demande_par_validateur_action
 confirmer_paiement_effectue = remboursement_workflow.confirmer_paiement_action
+valider_demandes_par_lot = remboursement_workflow.valider_demandes_par_lot_action
+confirmer_paiements_par_lot = remboursement_workflow.confirmer_paiements_par_lot_action
 pneri_resoumettre_demande_corrigee = remboursement_workflow.pneri_resoumettre_demande_action
 mlupo_resoumettre_constat_corrige = remboursement_workflow.mlupo_resoumettre_constat_action
 mlupo_refuser_correction = remboursement_workflow.mlupo_refuser_correction_action
@@ -177,4 +187,11 @@ def get_chemin_absolu_piece_jointe(chemin_relatif_pj: str | None, is_archived: b
 
 
 def get_chemin_absolu_pj_archive_zip(ref_dossier: str) -> str:
-    return os.path.join(REMBOURSEMENTS_ARCHIVE_ATTACHMENTS_DIR, f"{ref_dossier}.zip")
\ No newline at end of file
+    return os.path.join(REMBOURSEMENTS_ARCHIVE_ATTACHMENTS_DIR, f"{ref_dossier}.zip")
+
+
+def get_nom_membre_archive(chemin_relatif_pj: str, ref_dossier: str) -> str:
+    """Nom stocké dans le ZIP du dossier : le chemin relatif de la pièce, sans le dossier de référence."""
+    nom = chemin_relatif_pj.replace("\\", "/")
+    prefixe = f"{ref_dossier}/"
+    return nom[len(prefixe):] if nom.startswith(prefixe) else nom
\ No newline at end of file
@@ -0,0 +1,147 @@
+# models/remboursement_repository.py
+import threading
+from . import remboursement_model
+from .remboursement_resume import DemandeResume
+
+CHAMPS_INDEXES = ("statut", "cree_par", "reference_facture_dossier", "is_archived")
+
+
+class RemboursementRepository:
+    """
+    Résumés des demandes en mémoire (DemandeResume), avec des index secondaires par statut, créateur,
+    dossier et archivage. La demande complète (historique, pièces jointes) n'est lue qu'à la demande, par obtenir().
+
+    Les écritures faites par l'application doivent être suivies d'un appel à rafraichir() pour les ids touchés ;
+    les modifications des autres postes arrivent par le journal (lire_changements()).
+    Les résumés renvoyés sont partagés : ils doivent être traités en lecture seule.
+    Le verrou ne protège que les structures en mémoire : aucune lecture disque n'est faite en le tenant,
+    et les recherches par index (par_statut...) ne lisent jamais le disque, elles peuvent donc être appelées
+    depuis le thread Tk.
+    """
+
+    def __init__(self):
+        self._verrou = threading.RLock()
+        self._demandes = {}
+        self._index = {champ: {} for champ in CHAMPS_INDEXES}
+        self._charge = False
+        self._inclut_archives = False
+        self._position_journal = (None, 0)
+
+    def _indexer(self, demande: dict):
+        id_demande = demande.get("id_demande")
+        self._demandes[id_demande] = demande
+        for champ in CHAMPS_INDEXES:
+            valeur = bool(demande.get(champ)) if champ == "is_archived" else demande.get(champ)
+            self._index[champ].setdefault(valeur, set()).add(id_demande)
+
+    def _desindexer(self, id_demande: str):
+        demande = self._demandes.pop(id_demande, None)
+        if demande is None:
+            return
+        for champ in CHAMPS_INDEXES:
+            valeur = bool(demande.get(champ)) if champ == "is_archived" else demande.get(champ)
+            ids = self._index[champ].get(valeur)
+            if ids is not None:
+                ids.discard(id_demande)
+                if not ids:
+                    del self._index[champ][valeur]
+
+    def _placer(self, id_demande: str, demande: DemandeResume | None):
+        self._desindexer(id_demande)
+        if demande is not None and (self._inclut_archives or not demande.get("is_archived")):
+            self._indexer(demande)
+
+    def charger(self, include_archives: bool = False) -> list[DemandeResume]:
+        """Recharge tous les résumés depuis l'index des demandes."""
+        position = remboursement_model.position_journal_courante()
+        demandes = [DemandeResume(r) for r in remboursement_model.obtenir_resumes_demandes(include_archives)]
+        index = {champ: {} for champ in CHAMPS_INDEXES}
+        par_id = {}
+        for demande in demandes:
+            id_demande = demande.get("id_demande")
+            par_id[id_demande] = demande
+            for champ in CHAMPS_INDEXES:
+                valeur = bool(demande.get(champ)) if champ == "is_archived" else demande.get(champ)
+                index[champ].setdefault(valeur, set()).add(id_demande)
+        with self._verrou:
+            self._demandes = par_id
+            self._index = index
+            self._inclut_archives = include_archives
+            self._position_journal = position
+            self._charge = True
+            return self._lister_en_memoire(include_archives)
+
+    def _lister_en_memoire(self, include_archives: bool) -> list[DemandeResume]:
+        if include_archives:
+            return list(self._demandes.values())
+        return [d for d in self._demandes.values() if not d.get("is_archived")]
+
+    def lister(self, include_archives: bool = False) -> list[DemandeResume]:
+        """Demandes en mémoire ; le disque n'est lu qu'au premier appel ou si les archives n'étaient pas chargées."""
+        with self._verrou:
+            if self._charge and (self._inclut_archives or not include_archives):
+                return self._lister_en_memoire(include_archives)
+        return self.charger(include_archives)
+
+    def invalider(self):
+        with self._verrou:
+            self._charge = False
+
+    def obtenir_resume(self, id_demande: str) -> DemandeResume | None:
+        with self._verrou:
+            return self._demandes.get(id_demande)
+
+    def obtenir(self, id_demande: str) -> dict | None:
+        """Demande complète, lue depuis le disque (le cache du chargeur évite de relire un fichier inchangé)."""
+        demande = remboursement_model.obtenir_demande_par_id(id_demande)
+        with self._verrou:
+            if self._charge and demande is not None:
+                self._placer(id_demande, DemandeResume.depuis_demande(demande))
+        return demande
+
+    def _lister_par(self, champ: str, valeur) -> list[DemandeResume]:
+        """Lit uniquement les index en mémoire (vides tant que charger() n'a pas été appelé)."""
+        with self._verrou:
+            return [self._demandes[i] for i in self._index[champ].get(valeur, ()) if i in self._demandes]
+
+    def par_statut(self, statut: str) -> list[DemandeResume]:
+        return self._lister_par("statut", statut)
+
+    def par_createur(self, cree_par: str) -> list[DemandeResume]:
+        return self._lister_par("cree_par", cree_par)
+
+    def par_reference_dossier(self, reference_facture_dossier: str) -> list[DemandeResume]:
+        return self._lister_par("reference_facture_dossier", reference_facture_dossier)
+
+    def archivees(self, is_archived: bool = True) -> list[DemandeResume]:
+        return self._lister_par("is_archived", is_archived)
+
+    def rafraichir(self, ids_demandes) -> dict:
+        """Relit les demandes données depuis le disque. Retourne {id_demande: résumé ou None si disparue}."""
+        demandes = {}
+        for id_demande in dict.fromkeys(ids_demandes):
+            if id_demande:
+                demande = remboursement_model.obtenir_demande_par_id(id_demande)
+                demandes[id_demande] = DemandeResume.depuis_demande(demande) if demande is not None else None
+        with self._verrou:
+            if self._charge:
+                for id_demande, demande in demandes.items():
+                    self._placer(id_demande, demande)
+        return demandes
+
+    def lire_changements(self) -> tuple[list[str], bool]:
+        """
+        Lit le journal depuis la dernière synchronisation.
+        Retourne (ids cités, reinitialise) ; si reinitialise vaut True, un rechargement complet est nécessaire.
+        """
+        with self._verrou:
+            position_depart = self._position_journal
+        position, evenements, reinitialise = remboursement_model.lire_changements_depuis(position_depart)
+        with self._verrou:
+            # Un rechargement complet a pu avoir lieu pendant la lecture : sa position fait alors foi.
+            if self._position_journal == position_depart:
+                self._position_journal = position
+            if reinitialise:
+                self._charge = False
+        ids = list(dict.fromkeys(e.get("id_demande") for e in evenements if e.get("id_demande")))
+        return ids, reinitialise
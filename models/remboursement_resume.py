@@ -0,0 +1,55 @@
+# models/remboursement_resume.py
+import datetime
+
+CHAMPS_INDEX_DEMANDE = (
+    "id_demande", "nom", "prenom", "reference_facture", "reference_facture_dossier", "description",
+    "montant_demande", "statut", "cree_par", "date_creation", "derniere_modification_par",
+    "date_derniere_modification", "date_paiement_effectue"
+)
+CLES_PIECES_JOINTES = ("chemins_factures_stockees", "chemins_rib_stockes", "pieces_capture_trop_percu")
+CHAMPS_RESUME = CHAMPS_INDEX_DEMANDE + ("is_archived", "nb_entrees_historique", "nb_pieces_jointes")
+
+
+def resume_demande(demande: dict, is_archived: bool) -> dict:
+    """Champs d'une demande repris dans l'index des demandes (dates en ISO, nombre d'entrées et de pièces)."""
+    resume = {}
+    for cle in CHAMPS_INDEX_DEMANDE:
+        valeur = demande.get(cle)
+        if isinstance(valeur, datetime.datetime):
+            valeur = valeur.isoformat()
+        resume[cle] = valeur
+    resume["is_archived"] = is_archived
+    resume["nb_entrees_historique"] = len(demande.get("historique_statuts") or [])
+    resume["nb_pieces_jointes"] = sum(len(demande.get(cle) or []) for cle in CLES_PIECES_JOINTES)
+    return resume
+
+
+class DemandeResume:
+    """
+    Résumé compact d'une demande pour l'affichage en liste : les champs de l'index, sans historique
+    ni pièces jointes. Offre get() comme un dict pour être utilisable à la place de la demande complète.
+    """
+    __slots__ = CHAMPS_RESUME
+
+    def __init__(self, champs: dict):
+        for champ in CHAMPS_RESUME:
+            setattr(self, champ, champs.get(champ))
+        self.is_archived = bool(self.is_archived)
+
+    @classmethod
+    def depuis_demande(cls, demande: dict) -> "DemandeResume":
+        return cls(resume_demande(demande, demande.get("is_archived", False)))
+
+    def get(self, champ: str, defaut=None):
+        valeur = getattr(self, champ, None) if champ in CHAMPS_RESUME else None
+        return defaut if valeur is None else valeur
+
+    def __repr__(self):
+        return f"DemandeResume({self.id_demande!r}, {self.statut!r})"
+
+
+def version_demande(demande) -> tuple:
+    """Identifie l'état d'une demande, qu'il s'agisse de son résumé ou de la demande complète."""
+    if not isinstance(demande, DemandeResume):
+        demande = DemandeResume.depuis_demande(demande)
+    return demande.date_derniere_modification, demande.nb_entrees_historique, demande.nb_pieces_jointes
@@ -11,20 +11,38 @@ from config.settings import (
 )
 
 
+def statut_requiert_action(statut: str, cree_par: str, nom_utilisateur: str, roles: list) -> bool:
+    """Règle unique : une demande dans ce statut, créée par cree_par, attend-elle une action de cet utilisateur ?"""
+    est_admin = "admin" in roles
+    if "comptable_tresorerie" in roles and statut == STATUT_CREEE:
+        return True
+    if (nom_utilisateur == cree_par or est_admin) and statut == STATUT_REFUSEE_CONSTAT_TP:
+        return True
+    if ("validateur_chef" in roles or est_admin) and statut == STATUT_TROP_PERCU_CONSTATE:
+        return True
+    if ("comptable_tresorerie" in roles or est_admin) and statut == STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO:
+        return True
+    if ("comptable_fournisseur" in roles or est_admin) and statut == STATUT_VALIDEE:
+        return True
+    return False
+
+
 def _sanitize_directory_name_workflow(name: str) -> str:
     return remboursement_data._sanitize_directory_name(name)
 
 
-def _ajouter_pj_a_liste(id_demande: str, chemin_pj_source: str, utilisateur: str, type_pj_key: str,
-                        prefixe_nom_fichier: str) -> tuple[bool, str, str | None]:
-    """Helper pour ajouter une PJ à une liste de PJ d'une demande et la copier."""
-    demande_data_obj = remboursement_data.obtenir_demande_par_id_data(id_demande)
-    if not demande_data_obj:
-        return False, "Demande non trouvée.", None
+def _nom_patient(demande: dict | None) -> str:
+    if not demande:
+        return ""
+    return f"{demande.get('prenom', '')} {demande.get('nom', '')}".strip()
 
+
+def _copier_pj(demande_data_obj: dict, chemin_pj_source: str, type_pj_key: str,
+               prefixe_nom_fichier: str) -> tuple[bool, str, str | None, str | None]:
+    """Copie une PJ dans le dossier de la demande. Retourne (succès, message, chemin relatif, chemin absolu)."""
     ref_dossier = demande_data_obj.get("reference_facture_dossier")
     if not ref_dossier:
-        return False, "Référence de dossier non trouvée.", None
+        return False, "Référence de dossier non trouvée.", None, None
 
     dossier_demande_specifique = os.path.join(REMBOURSEMENTS_ATTACHMENTS_DIR, ref_dossier)
     os.makedirs(dossier_demande_specifique, exist_ok=True)
@@ -43,195 +61,158 @@ def _ajouter_pj_a_liste(id_demande: str, chemin_pj_source: str, utilisateur: str
     try:
         shutil.copy2(chemin_pj_source, chemin_pj_destination)
     except Exception as e:
-        return False, f"Erreur lors de la copie de la pièce jointe '{base_nom_pj}' ({prefixe_nom_fichier}): {e}", None
+        return False, f"Erreur lors de la copie de la pièce jointe '{base_nom_pj}' ({prefixe_nom_fichier}): {e}", None, None
 
     chemin_pj_relatif = os.path.join(ref_dossier, nom_fichier_pj_stockee)
+    return True, f"Pièce jointe '{base_nom_pj}' (v{version_index}) ajoutée.", chemin_pj_relatif, chemin_pj_destination
+
+
+def _supprimer_pjs_copiees(chemins_absolus: list):
+    for chemin in chemins_absolus:
+        if chemin and os.path.exists(chemin):
+            try:
+                os.remove(chemin)
+            except OSError:
+                pass
 
-    current_pjs_list.append(chemin_pj_relatif)
+
+def _ajouter_pj_a_liste(id_demande: str, chemin_pj_source: str, utilisateur: str, type_pj_key: str,
+                        prefixe_nom_fichier: str) -> tuple[bool, str, str | None]:
+    """Helper pour ajouter une PJ à une liste de PJ d'une demande et la copier."""
+    demande_data_obj = remboursement_data.obtenir_demande_par_id_data(id_demande)
+    if not demande_data_obj:
+        return False, "Demande non trouvée.", None
+
+    succes_copie, message, chemin_pj_relatif, chemin_pj_destination = _copier_pj(
+        demande_data_obj, chemin_pj_source, type_pj_key, prefixe_nom_fichier)
+    if not succes_copie:
+        return False, message, None
 
     updates = {
-        type_pj_key: current_pjs_list,
+        type_pj_key: chemin_pj_relatif,
         "derniere_modification_par": utilisateur,
         "date_derniere_modification": datetime.datetime.now().isoformat()
     }
     succes_maj = remboursement_data.mettre_a_jour_demande_data(id_demande, updates)
 
     if succes_maj:
-        return True, f"Pièce jointe '{base_nom_pj}' (v{version_index}) ajoutée.", chemin_pj_relatif
+        return True, message, chemin_pj_relatif
     else:
-        if os.path.exists(chemin_pj_destination):
-            try:
-                os.remove(chemin_pj_destination)
-            except OSError:
-                pass
+        _supprimer_pjs_copiees([chemin_pj_destination])
         return False, "Erreur lors de la mise à jour des données de la demande après copie PJ.", None
 
 
-def ajouter_piece_jointe_trop_percu_action(id_demande: str, chemin_pj_source: str, utilisateur: str) -> tuple[
-    bool, str, str | None]:
-    return _ajouter_pj_a_liste(id_demande, chemin_pj_source, utilisateur, "pieces_capture_trop_percu", "trop_percu")
-
-
-def accepter_constat_trop_percu_action(id_demande: str, commentaire: str, utilisateur: str) -> tuple[bool, str]:
-    demande_actuelle = remboursement_data.obtenir_demande_par_id_data(id_demande)
-    if not demande_actuelle: return False, "Demande non trouvée."
-    if demande_actuelle.get("statut") != STATUT_CREEE:
-        return False, f"La demande n'est pas au statut '{STATUT_CREEE}'."
-
+def _executer_transition(id_demande: str, statuts_depart, nouveau_statut: str, utilisateur: str, commentaire: str,
+                         updates_supplementaires: dict | None = None) -> tuple[str, dict | None]:
+    date_modification = datetime.datetime.now().isoformat()
     updates = {
-        "statut": STATUT_TROP_PERCU_CONSTATE,
         "derniere_modification_par": utilisateur,
-        "date_derniere_modification": datetime.datetime.now().isoformat()
+        "date_derniere_modification": date_modification
     }
+    if updates_supplementaires:
+        updates.update(updates_supplementaires)
     nouvelle_entree_historique = {
-        "statut": STATUT_TROP_PERCU_CONSTATE,
-        "date": updates["date_derniere_modification"],
+        "statut": nouveau_statut,
+        "date": date_modification,
         "par": utilisateur,
         "commentaire": commentaire
     }
+    return remboursement_data.transition_demande_data(id_demande, statuts_depart, nouveau_statut, updates,
+                                                      nouvelle_entree_historique)
 
-    succes_maj_demande = remboursement_data.mettre_a_jour_demande_data(id_demande, updates)
-    succes_hist = remboursement_data.ajouter_entree_historique_data(id_demande, nouvelle_entree_historique)
 
-    if succes_maj_demande and succes_hist:
-        nom_patient = f"{demande_actuelle.get('prenom', '')} {demande_actuelle.get('nom', '')}".strip()
-        return True, f"Constat accepté pour {nom_patient}."
-    return False, "Erreur lors de l'acceptation du constat."
+def _message_echec(code: str, message_statut_invalide: str, message_erreur: str) -> str:
+    if code == remboursement_data.TRANSITION_NON_TROUVEE:
+        return "Demande non trouvée."
+    if code == remboursement_data.TRANSITION_STATUT_INVALIDE:
+        return message_statut_invalide
+    return message_erreur
 
 
-def refuser_constat_trop_percu_action(id_demande: str, commentaire: str, utilisateur_mlupo: str) -> tuple[bool, str]:
-    demande_actuelle = remboursement_data.obtenir_demande_par_id_data(id_demande)
-    if not demande_actuelle: return False, "Demande non trouvée."
-    if demande_actuelle.get("statut") != STATUT_CREEE:
-        return False, f"La demande n'est pas au statut '{STATUT_CREEE}' pour un refus."
+def ajouter_piece_jointe_trop_percu_action(id_demande: str, chemin_pj_source: str, utilisateur: str) -> tuple[
+    bool, str, str | None]:
+    return _ajouter_pj_a_liste(id_demande, chemin_pj_source, utilisateur, "pieces_capture_trop_percu", "trop_percu")
 
-    updates = {
-        "statut": STATUT_REFUSEE_CONSTAT_TP,
-        "derniere_modification_par": utilisateur_mlupo,
-        "date_derniere_modification": datetime.datetime.now().isoformat()
-    }
-    nouvelle_entree_historique = {
-        "statut": STATUT_REFUSEE_CONSTAT_TP,
-        "date": updates["date_derniere_modification"],
-        "par": utilisateur_mlupo,
-        "commentaire": commentaire
-    }
-    succes_maj_demande = remboursement_data.mettre_a_jour_demande_data(id_demande, updates)
-    succes_hist = remboursement_data.ajouter_entree_historique_data(id_demande, nouvelle_entree_historique)
 
-    if succes_maj_demande and succes_hist:
-        nom_patient = f"{demande_actuelle.get('prenom', '')} {demande_actuelle.get('nom', '')}".strip()
-        return True, f"Constat refusé pour {nom_patient}."
-    return False, "Erreur lors du refus du constat."
+def accepter_constat_trop_percu_action(id_demande: str, commentaire: str, utilisateur: str,
+                                       chemin_pj_trop_percu_source: str | None = None) -> tuple[bool, str]:
+    updates_pj = {}
+    chemin_pj_destination = None
+    if chemin_pj_trop_percu_source:
+        demande_actuelle = remboursement_data.obtenir_demande_par_id_data(id_demande)
+        if not demande_actuelle: return False, "Demande non trouvée."
+        if demande_actuelle.get("statut") != STATUT_CREEE:
+            return False, f"La demande n'est pas au statut '{STATUT_CREEE}'."
+        succes_pj, msg_pj, chemin_pj_relatif, chemin_pj_destination = _copier_pj(
+            demande_actuelle, chemin_pj_trop_percu_source, "pieces_capture_trop_percu", "trop_percu")
+        if not succes_pj:
+            return False, f"Erreur lors de l'ajout de la pièce jointe : {msg_pj}"
+        updates_pj["pieces_capture_trop_percu"] = chemin_pj_relatif
+
+    code, demande = _executer_transition(id_demande, STATUT_CREEE, STATUT_TROP_PERCU_CONSTATE, utilisateur,
+                                         commentaire, updates_pj)
+    if code == remboursement_data.TRANSITION_OK:
+        return True, f"Constat accepté pour {_nom_patient(demande)}."
+    _supprimer_pjs_copiees([chemin_pj_destination])
+    return False, _message_echec(code, f"La demande n'est pas au statut '{STATUT_CREEE}'.",
+                                 "Erreur lors de l'acceptation du constat.")
 
 
-def annuler_demande_action(id_demande: str, commentaire: str, utilisateur_annulant: str) -> tuple[bool, str]:
-    demande_actuelle = remboursement_data.obtenir_demande_par_id_data(id_demande)
-    if not demande_actuelle: return False, "Demande non trouvée."
-    if demande_actuelle.get("statut") == STATUT_ANNULEE: return False, "Demande déjà annulée."
+def refuser_constat_trop_percu_action(id_demande: str, commentaire: str, utilisateur_mlupo: str) -> tuple[bool, str]:
+    code, demande = _executer_transition(id_demande, STATUT_CREEE, STATUT_REFUSEE_CONSTAT_TP, utilisateur_mlupo,
+                                         commentaire)
+    if code == remboursement_data.TRANSITION_OK:
+        return True, f"Constat refusé pour {_nom_patient(demande)}."
+    return False, _message_echec(code, f"La demande n'est pas au statut '{STATUT_CREEE}' pour un refus.",
+                                 "Erreur lors du refus du constat.")
 
-    updates = {
-        "statut": STATUT_ANNULEE,
-        "derniere_modification_par": utilisateur_annulant,
-        "date_derniere_modification": datetime.datetime.now().isoformat()
-    }
-    nouvelle_entree_historique = {
-        "statut": STATUT_ANNULEE,
-        "date": updates["date_derniere_modification"],
-        "par": utilisateur_annulant,
-        "commentaire": commentaire
-    }
-    succes_maj_demande = remboursement_data.mettre_a_jour_demande_data(id_demande, updates)
-    succes_hist = remboursement_data.ajouter_entree_historique_data(id_demande, nouvelle_entree_historique)
 
-    if succes_maj_demande and succes_hist:
-        nom_patient = f"{demande_actuelle.get('prenom', '')} {demande_actuelle.get('nom', '')}".strip()
-        return True, f"Demande pour {nom_patient} annulée."
-    return False, "Erreur lors de l'annulation de la demande."
+_STATUTS_ANNULABLES = [STATUT_CREEE, STATUT_REFUSEE_CONSTAT_TP, STATUT_TROP_PERCU_CONSTATE, STATUT_VALIDEE,
+                       STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO, STATUT_PAIEMENT_EFFECTUE]
 
 
-def valider_demande_par_validateur_action(id_demande: str, commentaire: str | None, utilisateur_validateur: str) -> \
-tuple[bool, str]:
-    demande_actuelle = remboursement_data.obtenir_demande_par_id_data(id_demande)
-    if not demande_actuelle: return False, "Demande non trouvée."
-    if demande_actuelle.get("statut") != STATUT_TROP_PERCU_CONSTATE:
-        return False, f"La demande n'est pas au statut '{STATUT_TROP_PERCU_CONSTATE}' attendu pour validation."
+def annuler_demande_action(id_demande: str, commentaire: str, utilisateur_annulant: str) -> tuple[bool, str]:
+    code, demande = _executer_transition(id_demande, _STATUTS_ANNULABLES, STATUT_ANNULEE, utilisateur_annulant,
+                                         commentaire)
+    if code == remboursement_data.TRANSITION_OK:
+        return True, f"Demande pour {_nom_patient(demande)} annulée."
+    return False, _message_echec(code, "Demande déjà annulée.", "Erreur lors de l'annulation de la demande.")
 
-    updates = {
-        "statut": STATUT_VALIDEE,
-        "derniere_modification_par": utilisateur_validateur,
-        "date_derniere_modification": datetime.datetime.now().isoformat()
-    }
-    nouvelle_entree_historique = {
-        "statut": STATUT_VALIDEE,
-        "date": updates["date_derniere_modification"],
-        "par": utilisateur_validateur,
-        "commentaire": commentaire if commentaire and commentaire.strip() else "Demande validée par validateur."
-    }
-    succes_maj_demande = remboursement_data.mettre_a_jour_demande_data(id_demande, updates)
-    succes_hist = remboursement_data.ajouter_entree_historique_data(id_demande, nouvelle_entree_historique)
 
-    if succes_maj_demande and succes_hist:
-        nom_patient = f"{demande_actuelle.get('prenom', '')} {demande_actuelle.get('nom', '')}".strip()
-        return True, f"Demande pour {nom_patient} validée."
-    return False, "Erreur lors de la validation de la demande."
+def valider_demande_par_validateur_action(id_demande: str, commentaire: str | None, utilisateur_validateur: str) -> \
+tuple[bool, str]:
+    commentaire_historique = commentaire if commentaire and commentaire.strip() else "Demande validée par validateur."
+    code, demande = _executer_transition(id_demande, STATUT_TROP_PERCU_CONSTATE, STATUT_VALIDEE,
+                                         utilisateur_validateur, commentaire_historique)
+    if code == remboursement_data.TRANSITION_OK:
+        return True, f"Demande pour {_nom_patient(demande)} validée."
+    return False, _message_echec(
+        code, f"La demande n'est pas au statut '{STATUT_TROP_PERCU_CONSTATE}' attendu pour validation.",
+        "Erreur lors de la validation de la demande.")
 
 
 def refuser_demande_par_validateur_action(id_demande: str, commentaire: str, utilisateur_validateur: str) -> tuple[
     bool, str]:
-    demande_actuelle = remboursement_data.obtenir_demande_par_id_data(id_demande)
-    if not demande_actuelle: return False, "Demande non trouvée."
-    if demande_actuelle.get("statut") != STATUT_TROP_PERCU_CONSTATE:
-        return False, f"La demande n'est pas au statut '{STATUT_TROP_PERCU_CONSTATE}' attendu pour un refus par validateur."
-
-    updates = {
-        "statut": STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO,
-        "derniere_modification_par": utilisateur_validateur,
-        "date_derniere_modification": datetime.datetime.now().isoformat()
-    }
-    nouvelle_entree_historique = {
-        "statut": STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO,
-        "date": updates["date_derniere_modification"],
-        "par": utilisateur_validateur,
-        "commentaire": commentaire
-    }
-    succes_maj_demande = remboursement_data.mettre_a_jour_demande_data(id_demande, updates)
-    succes_hist = remboursement_data.ajouter_entree_historique_data(id_demande, nouvelle_entree_historique)
-
-    if succes_maj_demande and succes_hist:
-        nom_patient = f"{demande_actuelle.get('prenom', '')} {demande_actuelle.get('nom', '')}".strip()
-        return True, f"Demande pour {nom_patient} refusée et renvoyée pour correction."
-    return False, "Erreur lors du refus de la demande par le validateur."
+    code, demande = _executer_transition(id_demande, STATUT_TROP_PERCU_CONSTATE,
+                                         STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO, utilisateur_validateur,
+                                         commentaire)
+    if code == remboursement_data.TRANSITION_OK:
+        return True, f"Demande pour {_nom_patient(demande)} refusée et renvoyée pour correction."
+    return False, _message_echec(
+        code, f"La demande n'est pas au statut '{STATUT_TROP_PERCU_CONSTATE}' attendu pour un refus par validateur.",
+        "Erreur lors du refus de la demande par le validateur.")
 
 
 def confirmer_paiement_action(id_demande: str, utilisateur_pdiop: str, commentaire: str | None) -> tuple[bool, str]:
-    demande_actuelle = remboursement_data.obtenir_demande_par_id_data(id_demande)
-    if not demande_actuelle:
-        return False, "Demande non trouvée."
-    if demande_actuelle.get("statut") != STATUT_VALIDEE:
-        return False, f"La demande n'est pas au statut '{STATUT_VALIDEE}' pour confirmation du paiement."
-
+    commentaire_historique = commentaire if commentaire and commentaire.strip() else "Paiement effectué."
     date_paiement = datetime.datetime.now().isoformat()
-    updates = {
-        "statut": STATUT_PAIEMENT_EFFECTUE,
-        "derniere_modification_par": utilisateur_pdiop,
-        "date_derniere_modification": date_paiement,
-        "date_paiement_effectue": date_paiement,
-    }
-    nouvelle_entree_historique = {
-        "statut": STATUT_PAIEMENT_EFFECTUE,
-        "date": date_paiement,
-        "par": utilisateur_pdiop,
-        "commentaire": commentaire if commentaire and commentaire.strip() else "Paiement effectué."
-    }
-
-    succes_maj_demande = remboursement_data.mettre_a_jour_demande_data(id_demande, updates)
-    succes_hist = remboursement_data.ajouter_entree_historique_data(id_demande, nouvelle_entree_historique)
-
-    if succes_maj_demande and succes_hist:
-        nom_patient = f"{demande_actuelle.get('prenom', '')} {demande_actuelle.get('nom', '')}".strip()
-        return True, f"Paiement confirmé pour {nom_patient}."
-    return False, "Erreur lors de la confirmation du paiement."
+    code, demande = _executer_transition(id_demande, STATUT_VALIDEE, STATUT_PAIEMENT_EFFECTUE, utilisateur_pdiop,
+                                         commentaire_historique, {"date_paiement_effectue": date_paiement})
+    if code == remboursement_data.TRANSITION_OK:
+        return True, f"Paiement confirmé pour {_nom_patient(demande)}."
+    return False, _message_echec(
+        code, f"La demande n'est pas au statut '{STATUT_VALIDEE}' pour confirmation du paiement.",
+        "Erreur lors de la confirmation du paiement.")
 
 
 def pneri_resoumettre_demande_action(id_demande: str, nouveau_commentaire: str,
@@ -247,35 +228,27 @@ def pneri_resoumettre_demande_action(id_demande: str, nouveau_commentaire: str,
         if not nouveau_commentaire or not nouveau_commentaire.strip():
             return False, "Aucune modification fournie. Veuillez ajouter un commentaire ou de nouveaux fichiers."
 
-    if nouveau_chemin_facture_source:
-        succes_fact, msg_fact, _ = _ajouter_pj_a_liste(id_demande, nouveau_chemin_facture_source, utilisateur,
-                                                       "chemins_factures_stockees", "facture")
-        if not succes_fact: return False, msg_fact
-
-    if nouveau_chemin_rib_source:
-        succes_rib, msg_rib, _ = _ajouter_pj_a_liste(id_demande, nouveau_chemin_rib_source, utilisateur,
-                                                     "chemins_rib_stockes", "RIB")
-        if not succes_rib: return False, msg_rib
-
-    updates = {
-        "statut": STATUT_CREEE,
-        "derniere_modification_par": utilisateur,
-        "date_derniere_modification": datetime.datetime.now().isoformat()
-    }
-    nouvelle_entree_historique = {
-        "statut": STATUT_CREEE,
-        "date": updates["date_derniere_modification"],
-        "par": utilisateur,
-        "commentaire": f"Demande corrigée et resoumise: {nouveau_commentaire}"
-    }
-
-    succes_maj_demande = remboursement_data.mettre_a_jour_demande_data(id_demande, updates)
-    succes_hist = remboursement_data.ajouter_entree_historique_data(id_demande, nouvelle_entree_historique)
-
-    if succes_maj_demande and succes_hist:
-        nom_patient = f"{demande_actuelle.get('prenom', '')} {demande_actuelle.get('nom', '')}".strip()
-        return True, f"Demande pour {nom_patient} corrigée et resoumise."
-    return False, "Erreur lors de la resoumission de la demande corrigée."
+    updates_pj = {}
+    pjs_copiees = []
+    for chemin_source, type_pj_key, prefixe in [(nouveau_chemin_facture_source, "chemins_factures_stockees", "facture"),
+                                                (nouveau_chemin_rib_source, "chemins_rib_stockes", "RIB")]:
+        if not chemin_source:
+            continue
+        succes_pj, msg_pj, chemin_pj_relatif, chemin_pj_destination = _copier_pj(
+            demande_actuelle, chemin_source, type_pj_key, prefixe)
+        if not succes_pj:
+            _supprimer_pjs_copiees(pjs_copiees)
+            return False, msg_pj
+        updates_pj[type_pj_key] = chemin_pj_relatif
+        pjs_copiees.append(chemin_pj_destination)
+
+    code, demande = _executer_transition(id_demande, STATUT_REFUSEE_CONSTAT_TP, STATUT_CREEE, utilisateur,
+                                         f"Demande corrigée et resoumise: {nouveau_commentaire}", updates_pj)
+    if code == remboursement_data.TRANSITION_OK:
+        return True, f"Demande pour {_nom_patient(demande)} corrigée et resoumise."
+    _supprimer_pjs_copiees(pjs_copiees)
+    return False, _message_echec(code, f"La demande n'est pas au statut '{STATUT_REFUSEE_CONSTAT_TP}'.",
+                                 "Erreur lors de la resoumission de la demande corrigée.")
 
 
 def mlupo_resoumettre_constat_action(id_demande: str, nouveau_commentaire: str,
@@ -290,31 +263,23 @@ def mlupo_resoumettre_constat_action(id_demande: str, nouveau_commentaire: str,
         if not nouveau_commentaire or not nouveau_commentaire.strip():
             return False, "Aucune modification fournie. Veuillez ajouter un commentaire ou un nouveau fichier."
 
+    updates_pj = {}
+    chemin_pj_destination = None
     if nouveau_chemin_pj_trop_percu_source:
-        succes_pj, msg_pj, _ = ajouter_piece_jointe_trop_percu_action(id_demande,
-                                                                      nouveau_chemin_pj_trop_percu_source,
-                                                                      utilisateur)
+        succes_pj, msg_pj, chemin_pj_relatif, chemin_pj_destination = _copier_pj(
+            demande_actuelle, nouveau_chemin_pj_trop_percu_source, "pieces_capture_trop_percu", "trop_percu")
         if not succes_pj: return False, msg_pj
+        updates_pj["pieces_capture_trop_percu"] = chemin_pj_relatif
 
-    updates = {
-        "statut": STATUT_TROP_PERCU_CONSTATE,
-        "derniere_modification_par": utilisateur,
-        "date_derniere_modification": datetime.datetime.now().isoformat()
-    }
-    nouvelle_entree_historique = {
-        "statut": STATUT_TROP_PERCU_CONSTATE,
-        "date": updates["date_derniere_modification"],
-        "par": utilisateur,
-        "commentaire": f"Constat corrigé et resoumis: {nouveau_commentaire}"
-    }
-
-    succes_maj_demande = remboursement_data.mettre_a_jour_demande_data(id_demande, updates)
-    succes_hist = remboursement_data.ajouter_entree_historique_data(id_demande, nouvelle_entree_historique)
-
-    if succes_maj_demande and succes_hist:
-        nom_patient = f"{demande_actuelle.get('prenom', '')} {demande_actuelle.get('nom', '')}".strip()
-        return True, f"Constat pour {nom_patient} corrigé et resoumis."
-    return False, "Erreur lors de la resoumission du constat corrigé."
+    code, demande = _executer_transition(id_demande, STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO,
+                                         STATUT_TROP_PERCU_CONSTATE, utilisateur,
+                                         f"Constat corrigé et resoumis: {nouveau_commentaire}", updates_pj)
+    if code == remboursement_data.TRANSITION_OK:
+        return True, f"Constat pour {_nom_patient(demande)} corrigé et resoumis."
+    _supprimer_pjs_copiees([chemin_pj_destination])
+    return False, _message_echec(
+        code, f"La demande n'est pas au statut '{STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO}'.",
+        "Erreur lors de la resoumission du constat corrigé.")
 
 
 def mlupo_refuser_correction_action(id_demande: str, commentaire: str, utilisateur: str) -> tuple[bool, str]:
@@ -322,31 +287,36 @@ def mlupo_refuser_correction_action(id_demande: str, commentaire: str, utilisate
     Action pour m.lupo de refuser la correction du constat et de renvoyer
     la demande au demandeur initial (p.neri).
     """
-    demande_actuelle = remboursement_data.obtenir_demande_par_id_data(id_demande)
-    if not demande_actuelle:
-        return False, "Demande non trouvée."
-
-    if demande_actuelle.get("statut") != STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO:
-        return False, f"L'action n'est pas possible depuis le statut '{demande_actuelle.get('statut')}'."
-
-    updates = {
-        "statut": STATUT_REFUSEE_CONSTAT_TP,
-        "derniere_modification_par": utilisateur,
-        "date_derniere_modification": datetime.datetime.now().isoformat()
-    }
-
-    nouvelle_entree_historique = {
-        "statut": STATUT_REFUSEE_CONSTAT_TP,
-        "date": updates["date_derniere_modification"],
-        "par": utilisateur,
-        "commentaire": f"Correction refusée et renvoyée au demandeur : {commentaire}"
-    }
-
-    succes_maj_demande = remboursement_data.mettre_a_jour_demande_data(id_demande, updates)
-    succes_hist = remboursement_data.ajouter_entree_historique_data(id_demande, nouvelle_entree_historique)
-
-    if succes_maj_demande and succes_hist:
-        nom_patient = f"{demande_actuelle.get('prenom', '')} {demande_actuelle.get('nom', '')}".strip()
-        return True, f"Demande pour {nom_patient} renvoyée au demandeur."
-
-    return False, "Erreur lors du renvoi de la demande au demandeur."
\ No newline at end of file
+    code, demande = _executer_transition(id_demande, STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO,
+                                         STATUT_REFUSEE_CONSTAT_TP, utilisateur,
+                                         f"Correction refusée et renvoyée au demandeur : {commentaire}")
+    if code == remboursement_data.TRANSITION_OK:
+        return True, f"Demande pour {_nom_patient(demande)} renvoyée au demandeur."
+    return False, _message_echec(
+        code, f"L'action n'est pas possible depuis le statut '{demande.get('statut') if demande else ''}'.",
+        "Erreur lors du renvoi de la demande au demandeur.")
+
+
+def _appliquer_par_lot(ids_demandes: list, action) -> list[tuple[str, bool, str]]:
+    """Applique une action à chaque demande et retourne (id_demande, succès, message) pour chacune."""
+    resultats = []
+    for id_demande in ids_demandes:
+        try:
+            succes, message = action(id_demande)
+        except Exception as e:
+            print(f"Erreur lors du traitement par lot de la demande {id_demande}: {e}")
+            succes, message = False, f"Erreur inattendue : {e}"
+        resultats.append((id_demande, succes, message))
+    return resultats
+
+
+def valider_demandes_par_lot_action(ids_demandes: list, commentaire: str | None, utilisateur_validateur: str) -> \
+list[tuple[str, bool, str]]:
+    return _appliquer_par_lot(ids_demandes, lambda id_demande: valider_demande_par_validateur_action(
+        id_demande, commentaire, utilisateur_validateur))
+
+
+def confirmer_paiements_par_lot_action(ids_demandes: list, utilisateur_pdiop: str, commentaire: str | None) -> \
+list[tuple[str, bool, str]]:
+    return _appliquer_par_lot(ids_demandes, lambda id_demande: confirmer_paiement_action(
+        id_demande, utilisateur_pdiop, commentaire))
@@ -0,0 +1,31 @@
+# tests/conftest.py
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from models import remboursement_data
+from utils import archive_utils
+
+
+@pytest.fixture
+def donnees_partagees(tmp_path, monkeypatch):
+    """Racine des données partagées dans un dossier temporaire (le chemin configuré est relatif hors Windows)."""
+    if os.path.isabs(settings.SHARED_DATA_BASE_PATH):
+        pytest.skip("SHARED_DATA_BASE_PATH désigne un lecteur réel.")
+    monkeypatch.chdir(tmp_path)
+    settings.ensure_shared_dirs_exist()
+    remboursement_data.vider_cache_demandes()
+    archive_utils._index_archives.clear()
+    yield tmp_path
+    remboursement_data.vider_cache_demandes()
+    archive_utils._index_archives.clear()
+
+
+@pytest.fixture
+def fichier_rib(tmp_path):
+    chemin = tmp_path / "rib.pdf"
+    chemin.write_bytes(b"%PDF-1.4\n% RIB de test\n")
+    return str(chemin)
@@ -0,0 +1,51 @@
+# tests/test_archives.py
+import os
+import zipfile
+from controllers.remboursement_controller import RemboursementController
+from models import remboursement_model
+from utils import archive_utils
+
+
+def _archiver_demande(fichier_rib):
+    demande = remboursement_model.creer_nouvelle_demande(
+        "Nom", "Prenom", "REFARCH", 10.0, None, fichier_rib, "demandeur", "description")
+    assert remboursement_model.archiver_demande_par_id(demande["id_demande"])
+    return demande, remboursement_model.get_chemin_absolu_pj_archive_zip("REFARCH")
+
+
+def _rendre_repertoire_central_illisible(zip_path: str):
+    """Écrase la fin du ZIP (répertoire central) en gardant sa taille et sa date : l'index reste à jour."""
+    stat = os.stat(zip_path)
+    with open(zip_path, 'r+b') as f:
+        f.seek(-64, os.SEEK_END)
+        f.write(b"\0" * 64)
+    os.utime(zip_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def test_lister_fichiers_archive_sans_ouvrir_le_zip(donnees_partagees, fichier_rib, monkeypatch):
+    demande, zip_path = _archiver_demande(fichier_rib)
+    _rendre_repertoire_central_illisible(zip_path)
+    archive_utils._index_archives.clear()
+    try:
+        zipfile.ZipFile(zip_path).close()
+        assert False, "Le répertoire central devrait être illisible."
+    except zipfile.BadZipFile:
+        pass
+
+    def zip_interdit(*args, **kwargs):
+        raise AssertionError("Le ZIP ne doit pas être ouvert pour lister ses fichiers.")
+    monkeypatch.setattr(zipfile, "ZipFile", zip_interdit)
+
+    noms = archive_utils.lister_fichiers_archive(zip_path)
+    assert noms == sorted(["informations_demande.txt", os.path.basename(demande["chemins_rib_stockes"][0])])
+
+    controleur = RemboursementController("demandeur")
+    controleur.depot.charger(include_archives=True)
+    chemins = controleur.lister_pieces_jointes_archivees(demande["id_demande"])
+    assert demande["chemins_rib_stockes"][0] in chemins
+
+
+def test_lister_fichiers_archive_sans_index(donnees_partagees, fichier_rib):
+    _, zip_path = _archiver_demande(fichier_rib)
+    archive_utils.supprimer_index_archive(zip_path)
+    assert archive_utils.lister_fichiers_archive(zip_path) is None
@@ -0,0 +1,38 @@
+# tests/test_index_demandes.py
+from models import remboursement_data, remboursement_model, remboursement_workflow
+from models.remboursement_resume import resume_demande
+
+
+def _creer_demande(fichier_rib, reference="REF1"):
+    return remboursement_model.creer_nouvelle_demande(
+        "Nom", "Prenom", reference, 10.0, None, fichier_rib, "demandeur", "description")
+
+
+def test_transition_refusee_ne_perime_pas_index(donnees_partagees, fichier_rib, monkeypatch):
+    demande = _creer_demande(fichier_rib)
+    remboursement_model.obtenir_resumes_demandes()
+
+    # La demande est au statut « créée » : la validation doit échouer sans rien écrire.
+    succes, _ = remboursement_workflow.valider_demande_par_validateur_action(
+        demande["id_demande"], "ok", "validateur")
+    assert not succes
+
+    reconstructions = []
+    monkeypatch.setattr(remboursement_data, "_reconstruire_index_dossiers",
+                        lambda dossiers: reconstructions.append(dossiers) or {})
+    resumes = remboursement_model.obtenir_resumes_demandes()
+    assert reconstructions == []
+    assert [r["id_demande"] for r in resumes] == [demande["id_demande"]]
+
+
+def test_resume_index_identique_a_la_relecture(donnees_partagees, fichier_rib):
+    remboursement_model.obtenir_resumes_demandes()
+    demande = remboursement_model.creer_nouvelle_demande(
+        "  Nom  ", " Prenom ", "REF2", 10.0, None, fichier_rib, "demandeur", "  description  ")
+    remboursement_data.vider_cache_demandes()
+    relue = remboursement_model.obtenir_demande_par_id(demande["id_demande"])
+
+    resume = remboursement_data.charger_index_demandes_data()[0]
+    attendu = resume_demande(relue, False)
+    assert resume == attendu
+    assert resume["description"] == "description"
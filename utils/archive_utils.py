@@ -3,25 +3,215 @@ import os
 import zipfile
 import tempfile
 import shutil
+import threading
+import posixpath
+import struct
+import zlib
+from collections import OrderedDict
+from .data_manager import serialiser_json, deserialiser_json
 
 _temp_dirs_to_clean = set()
 
-def extract_file_to_temp(zip_archive_path: str, file_inside_zip: str) -> tuple[str | None, str | None]:
-    if not os.path.exists(zip_archive_path):
-        return None, None
+# Index des membres de chaque archive ZIP : {nom stocké: (offset de l'en-tête local, taille compressée,
+# taille, méthode de compression, CRC)}. Il est lu une seule fois par version du fichier (date, taille), depuis
+# le fichier d'index écrit à côté de l'archive s'il est à jour, sinon depuis le répertoire central du ZIP.
+# Les lectures se font ensuite directement à l'offset, sans ZipFile ni descripteur gardé ouvert.
+SUFFIXE_INDEX_ARCHIVE = ".index.json"
+VERSION_INDEX_ARCHIVE = 1
+NOMBRE_MAX_INDEX_ARCHIVES = 64
+_index_archives = OrderedDict()
+_index_verrou = threading.Lock()
+
+_EN_TETE_LOCAL = struct.Struct("<4s5H3L2H")
+_SIGNATURE_EN_TETE_LOCAL = b"PK\x03\x04"
+
+
+def chemin_index_archive(zip_archive_path: str) -> str:
+    return zip_archive_path + SUFFIXE_INDEX_ARCHIVE
+
 
+def _signature_fichier(chemin: str) -> tuple[int, int] | None:
     try:
-        temp_dir = tempfile.mkdtemp(prefix="rb_archive_")
-        _temp_dirs_to_clean.add(temp_dir)
+        stat = os.stat(chemin)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _index_depuis_zip(zip_archive_path: str) -> dict:
+    with zipfile.ZipFile(zip_archive_path, 'r') as zipf:
+        return {info.filename: (info.header_offset, info.compress_size, info.file_size, info.compress_type, info.CRC)
+                for info in zipf.infolist() if not info.is_dir()}
+
+
+def _index_depuis_fichier(zip_archive_path: str, signature: tuple[int, int]) -> dict | None:
+    """Index écrit à côté de l'archive, s'il correspond encore à celle-ci."""
+    try:
+        with open(chemin_index_archive(zip_archive_path), 'rb') as f:
+            contenu = deserialiser_json(f.read())
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(contenu, dict) or contenu.get("version") != VERSION_INDEX_ARCHIVE
+            or [contenu.get("mtime_ns"), contenu.get("taille")] != list(signature)):
+        return None
+    return {nom: tuple(entree) for nom, entree in contenu.get("membres", {}).items()}
+
+
+def ecrire_index_archive(zip_archive_path: str) -> bool:
+    """Écrit l'index des membres à côté de l'archive (à appeler une fois le ZIP fermé)."""
+    signature = _signature_fichier(zip_archive_path)
+    if signature is None:
+        return False
+    try:
+        membres = _index_depuis_zip(zip_archive_path)
+        contenu = {"version": VERSION_INDEX_ARCHIVE, "mtime_ns": signature[0], "taille": signature[1],
+                   "membres": membres}
+        chemin_index = chemin_index_archive(zip_archive_path)
+        chemin_temp = chemin_index + ".tmp"
+        with open(chemin_temp, 'wb') as f:
+            f.write(serialiser_json(contenu, compact=True))
+        os.replace(chemin_temp, chemin_index)
+    except (zipfile.BadZipFile, OSError) as e:
+        print(f"AVERTISSEMENT: Index de l'archive '{zip_archive_path}' non écrit : {e}")
+        return False
+    with _index_verrou:
+        _memoriser_index(zip_archive_path, signature, membres)
+    return True
+
+
+def _memoriser_index(zip_archive_path: str, signature: tuple[int, int], membres: dict):
+    """À appeler sous _index_verrou."""
+    _index_archives[zip_archive_path] = (signature, membres)
+    _index_archives.move_to_end(zip_archive_path)
+    while len(_index_archives) > NOMBRE_MAX_INDEX_ARCHIVES:
+        _index_archives.popitem(last=False)
+
+
+def index_archive(zip_archive_path: str, lire_zip: bool = True) -> dict | None:
+    """
+    {nom stocké: (offset, taille compressée, taille, méthode, CRC)}, ou None si l'archive est absente ou illisible.
+    Avec lire_zip=False, seuls l'index en mémoire et le fichier d'index sont consultés, jamais le ZIP lui-même.
+    """
+    signature = _signature_fichier(zip_archive_path)
+    with _index_verrou:
+        if signature is None:
+            _index_archives.pop(zip_archive_path, None)
+            return None
+        entree = _index_archives.get(zip_archive_path)
+        if entree is not None and entree[0] == signature:
+            _index_archives.move_to_end(zip_archive_path)
+            return entree[1]
+    membres = _index_depuis_fichier(zip_archive_path, signature)
+    if membres is None:
+        if not lire_zip:
+            return None
+        try:
+            membres = _index_depuis_zip(zip_archive_path)
+        except (zipfile.BadZipFile, OSError) as e:
+            print(f"Erreur lecture du répertoire central de '{zip_archive_path}': {e}")
+            return None
+    with _index_verrou:
+        _memoriser_index(zip_archive_path, signature, membres)
+    return membres
 
+
+def oublier_archive(zip_archive_path: str):
+    """Retire l'index gardé en mémoire (avant de supprimer ou réécrire l'archive)."""
+    with _index_verrou:
+        _index_archives.pop(zip_archive_path, None)
+
+
+def supprimer_index_archive(zip_archive_path: str):
+    oublier_archive(zip_archive_path)
+    try:
+        os.remove(chemin_index_archive(zip_archive_path))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"AVERTISSEMENT: Index de l'archive '{zip_archive_path}' non supprimé : {e}")
+
+
+def lister_fichiers_archive(zip_archive_path: str) -> list[str] | None:
+    """
+    Noms stockés dans l'archive, lus depuis son fichier d'index sans ouvrir le ZIP.
+    None si l'archive n'a pas d'index à jour (archive antérieure à l'index, ou réécrite depuis).
+    """
+    membres = index_archive(zip_archive_path, lire_zip=False)
+    if membres is None:
+        print(f"AVERTISSEMENT: Pas d'index à jour pour l'archive '{zip_archive_path}'.")
+        return None
+    return sorted(membres)
+
+
+def _trouver_membre(membres: dict, file_inside_zip: str) -> str | None:
+    """
+    Nom exact du membre. Le nom de fichier seul n'est accepté en repli que s'il désigne un membre unique,
+    pour les anciennes archives dont les chemins ne correspondent pas à ceux de la demande.
+    """
+    nom = file_inside_zip.replace("\\", "/")
+    if nom in membres:
+        return nom
+    nom_fichier = posixpath.basename(nom)
+    candidats = [m for m in membres if posixpath.basename(m) == nom_fichier]
+    return candidats[0] if len(candidats) == 1 else None
+
+
+def _lire_membre(zip_archive_path: str, entree: tuple) -> bytes:
+    offset, taille_compressee, taille, methode, crc = entree
+    with open(zip_archive_path, 'rb') as f:
+        f.seek(offset)
+        en_tete = f.read(_EN_TETE_LOCAL.size)
+        if len(en_tete) != _EN_TETE_LOCAL.size:
+            raise zipfile.BadZipFile("en-tête local tronqué")
+        signature, _, drapeaux, _, _, _, _, _, _, longueur_nom, longueur_extra = _EN_TETE_LOCAL.unpack(en_tete)
+        if signature != _SIGNATURE_EN_TETE_LOCAL:
+            raise zipfile.BadZipFile("signature d'en-tête local invalide")
+        if drapeaux & 0x1:
+            raise NotImplementedError("membre chiffré")
+        f.seek(longueur_nom + longueur_extra, os.SEEK_CUR)
+        donnees = f.read(taille_compressee)
+    if methode == zipfile.ZIP_DEFLATED:
+        donnees = zlib.decompress(donnees, -zlib.MAX_WBITS)
+    elif methode != zipfile.ZIP_STORED:
+        raise NotImplementedError(f"méthode de compression {methode}")
+    if len(donnees) != taille or zlib.crc32(donnees) != crc:
+        raise zipfile.BadZipFile("contenu corrompu (taille ou CRC)")
+    return donnees
+
+
+def lire_fichier_archive(zip_archive_path: str, file_inside_zip: str) -> bytes | None:
+    """Contenu d'un fichier de l'archive, lu en mémoire à son offset sans extraction sur disque."""
+    membres = index_archive(zip_archive_path)
+    nom = _trouver_membre(membres, file_inside_zip) if membres else None
+    if nom is None:
+        print(f"Erreur lecture de '{file_inside_zip}' depuis '{zip_archive_path}': fichier absent de l'archive")
+        return None
+    try:
+        return _lire_membre(zip_archive_path, membres[nom])
+    except NotImplementedError:
+        pass
+    except (zipfile.BadZipFile, zlib.error, OSError) as e:
+        print(f"AVERTISSEMENT: Lecture directe de '{nom}' impossible ({e}), relecture via le répertoire central.")
+        oublier_archive(zip_archive_path)
+    try:
         with zipfile.ZipFile(zip_archive_path, 'r') as zipf:
-            extracted_path = zipf.extract(file_inside_zip, path=temp_dir)
-            return extracted_path, temp_dir
-    except (KeyError, FileNotFoundError, zipfile.BadZipFile) as e:
-        print(f"Erreur extraction de '{file_inside_zip}' depuis '{zip_archive_path}': {e}")
-        return None, None
-    except Exception as e:
-        print(f"Erreur inattendue lors de l'extraction de l'archive : {e}")
+            return zipf.read(nom)
+    except (KeyError, zipfile.BadZipFile, OSError, NotImplementedError) as e:
+        print(f"Erreur lecture de '{nom}' depuis '{zip_archive_path}': {e}")
+        return None
+
+
+def ecrire_fichier_temp(nom_fichier: str, donnees: bytes) -> tuple[str | None, str | None]:
+    """Écrit des données dans un dossier temporaire (pour les ouvrir avec une application externe)."""
+    try:
+        temp_dir = tempfile.mkdtemp(prefix="rb_archive_")
+        _temp_dirs_to_clean.add(temp_dir)
+        chemin = os.path.join(temp_dir, os.path.basename(nom_fichier))
+        with open(chemin, 'wb') as f:
+            f.write(donnees)
+        return chemin, temp_dir
+    except OSError as e:
+        print(f"Erreur lors de l'écriture du fichier temporaire '{nom_fichier}': {e}")
         return None, None
 
 def cleanup_temp_dir(temp_dir_path: str | None):
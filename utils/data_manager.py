@@ -4,15 +4,64 @@ import os
 import shutil
 import tempfile
 from typing import Callable, Any
-from .file_lock import FileLock
-from .ui_messages import show_recovery_success, show_recovery_error
+from .file_lock import FileLock, chemin_verrou
+from .recovery_events import RECUPERATION_RESTAUREE, RECUPERATION_BACKUP_INVALIDE, RECUPERATION_SANS_BACKUP, \
+    signaler_recuperation
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps_stdlib(data, compact: bool) -> bytes:
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return json.dumps(data, indent=4, ensure_ascii=False).encode('utf-8')
+
+
+def _dumps_orjson(data, compact: bool) -> bytes:
+    # orjson n'indente qu'à 2 espaces ; le fichier reste du JSON UTF-8 standard, lisible par le module json.
+    return orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+
+
+# Chaque backend fournit (sérialisation vers des octets UTF-8, désérialisation depuis des octets ou du texte).
+# Les erreurs de lecture d'orjson héritent de json.JSONDecodeError : les appelants n'ont qu'une exception à gérer.
+BACKENDS_JSON = {"json": (_dumps_stdlib, json.loads)}
+if orjson is not None:
+    BACKENDS_JSON["orjson"] = (_dumps_orjson, orjson.loads)
+
+_backend_json = "orjson" if orjson is not None else "json"
+
+
+def definir_backend_json(nom: str) -> bool:
+    """Choisit le backend JSON ('json' ou 'orjson'). Retourne False si ce backend n'est pas installé."""
+    global _backend_json
+    if nom not in BACKENDS_JSON:
+        print(f"AVERTISSEMENT: Backend JSON '{nom}' indisponible, '{_backend_json}' est conservé.")
+        return False
+    _backend_json = nom
+    return True
+
+
+def backend_json_actif() -> str:
+    return _backend_json
+
+
+def serialiser_json(data, compact: bool = False) -> bytes:
+    """JSON encodé en UTF-8 ; en mode compact, sans indentation ni espaces (pour les gros fichiers comme l'index)."""
+    return BACKENDS_JSON[_backend_json][0](data, compact)
+
+
+def deserialiser_json(contenu: bytes | str) -> Any:
+    return BACKENDS_JSON[_backend_json][1](contenu)
 
 
 def _get_lock_path(file_path: str) -> str:
-    return f"{file_path}.lock"
+    return chemin_verrou(file_path)
 
 
-def _save_json_atomically(file_path: str, data: dict | list):
+def _save_json_atomically(file_path: str, data: dict | list, compact: bool = False):
     dir_name = os.path.dirname(file_path)
     if not os.path.exists(dir_name):
         try:
@@ -21,11 +70,12 @@ def _save_json_atomically(file_path: str, data: dict | list):
             print(f"Erreur critique lors de la création du dossier pour la sauvegarde '{dir_name}': {e}")
             raise
 
+    contenu = serialiser_json(data, compact)
     temp_fd, temp_path = tempfile.mkstemp(dir=dir_name, prefix=os.path.basename(file_path) + '~', suffix='.tmp')
 
     try:
-        with os.fdopen(temp_fd, 'w', encoding='utf-8') as tf:
-            json.dump(data, tf, indent=4, ensure_ascii=False)
+        with os.fdopen(temp_fd, 'wb') as tf:
+            tf.write(contenu)
 
         backup_path = file_path + ".bak"
         if os.path.exists(file_path):
@@ -48,13 +98,15 @@ def _save_json_atomically(file_path: str, data: dict | list):
                 pass
 
 
-def read_modify_write_json(file_path: str, modification_func: Callable[[Any], Any]) -> Any:
+def read_modify_write_json(file_path: str, modification_func: Callable[[Any], Any], compact: bool = False) -> Any:
     lock_path = _get_lock_path(file_path)
 
     with FileLock(lock_path):
         data = load_json_data(file_path)
         result = modification_func(data)
-        _save_json_atomically(file_path, data)
+        # Une modification qui renvoie explicitement False n'a rien changé : inutile de réécrire le fichier.
+        if result is not False:
+            _save_json_atomically(file_path, data, compact)
         return result
 
 
@@ -66,12 +118,12 @@ def load_json_data(file_path: str) -> Any:
         return default_value
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
+        with open(file_path, 'rb') as f:
             content = f.read()
-            if not content.strip():
-                return default_value
-            return json.loads(content)
-    except json.JSONDecodeError:
+        if not content.strip():
+            return default_value
+        return deserialiser_json(content)
+    except (json.JSONDecodeError, UnicodeDecodeError):
         print(f"ALERTE: Fichier JSON corrompu détecté : {file_path}")
         backup_path = file_path + ".bak"
         backup_exists = os.path.exists(backup_path)
@@ -80,18 +132,18 @@ def load_json_data(file_path: str) -> Any:
             try:
                 print(f"Tentative de restauration depuis {backup_path}...")
                 shutil.copy2(backup_path, file_path)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    restored_data = json.load(f)
+                with open(file_path, 'rb') as f:
+                    restored_data = deserialiser_json(f.read())
                 print("Restauration réussie.")
-                show_recovery_success(file_path)
+                signaler_recuperation(file_path, RECUPERATION_RESTAUREE)
                 return restored_data
-            except (IOError, json.JSONDecodeError):
+            except (IOError, json.JSONDecodeError, UnicodeDecodeError):
                 print(f"ERREUR: Le fichier de backup {backup_path} est aussi corrompu.")
-                show_recovery_error(file_path, backup_exists=True)
+                signaler_recuperation(file_path, RECUPERATION_BACKUP_INVALIDE)
                 return default_value
         else:
             print("ERREUR: Aucun fichier de backup trouvé.")
-            show_recovery_error(file_path, backup_exists=False)
+            signaler_recuperation(file_path, RECUPERATION_SANS_BACKUP)
             return default_value
     except (IOError, FileNotFoundError):
         return default_value
\ No newline at end of file
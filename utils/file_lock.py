@@ -1,34 +1,294 @@
 import os
+import json
 import time
+import errno
+import random
+import socket
+import hashlib
+import threading
+from config.settings import LOCKS_DIR, SHARED_DATA_BASE_PATH
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+DUREE_BAIL_DEFAUT = 30
+_DELAI_INITIAL = 0.01
+_DELAI_MAX = 0.5
+# msvcrt verrouille une plage d'octets : on verrouille un octet loin après le contenu du fichier
+# pour que l'estampille du propriétaire reste lisible par les autres postes.
+_OFFSET_VERROU_MSVCRT = 0x7FFFFFF0
+
+_stats_verrou = threading.Lock()
+_stats = {
+    "acquisitions": 0,
+    "contentions": 0,
+    "timeouts": 0,
+    "reprises_bail": 0,
+    "attente_totale_s": 0.0,
+    "attente_max_s": 0.0
+}
+
+
+def obtenir_statistiques_verrous() -> dict:
+    with _stats_verrou:
+        stats = dict(_stats)
+    stats["attente_moyenne_s"] = stats["attente_totale_s"] / stats["acquisitions"] if stats["acquisitions"] else 0.0
+    return stats
+
+
+def reinitialiser_statistiques_verrous():
+    with _stats_verrou:
+        for cle in _stats:
+            _stats[cle] = 0.0 if isinstance(_stats[cle], float) else 0
+
+
+def _incrementer_stat(cle: str):
+    with _stats_verrou:
+        _stats[cle] += 1
+
+
+def _estampille_proprietaire() -> dict:
+    return {"hote": socket.gethostname(), "pid": os.getpid(), "horodatage": time.time()}
+
+
+_dossiers_verrous_crees = set()
+
+
+def chemin_verrou(chemin_protege: str, dossier_verrous: str = LOCKS_DIR) -> str:
+    """
+    Fichier '.lock' d'un fichier protégé, rangé dans le dossier des verrous : les verrous, qui ne sont jamais
+    supprimés, ne s'accumulent pas à côté des données et n'en modifient pas la date des dossiers.
+    Le nom reprend le chemin relatif à la racine des données partagées pour rester unique.
+    """
+    chemin_absolu = os.path.abspath(chemin_protege)
+    try:
+        relatif = os.path.relpath(chemin_absolu, os.path.abspath(SHARED_DATA_BASE_PATH))
+    except ValueError:
+        # Autre lecteur que celui des données partagées (Windows).
+        relatif = os.pardir
+    if relatif.startswith(os.pardir):
+        # Fichier hors des données partagées : nom dérivé de son chemin complet.
+        empreinte = hashlib.sha1(os.path.normcase(chemin_absolu).encode('utf-8'), usedforsecurity=False)
+        relatif = f"{empreinte.hexdigest()[:16]}_{os.path.basename(chemin_absolu)}"
+    if dossier_verrous not in _dossiers_verrous_crees:
+        os.makedirs(dossier_verrous, exist_ok=True)
+        _dossiers_verrous_crees.add(dossier_verrous)
+    return os.path.join(dossier_verrous, relatif.replace(os.sep, "__") + ".lock")
+
+
+def _processus_existe(pid: int) -> bool:
+    if os.name == 'nt':
+        # os.kill(pid, 0) terminerait le processus sous Windows : on ne peut pas le vérifier ici.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
 
 class FileLock:
-    def __init__(self, lock_file_path, timeout=10):
+    """
+    Verrou inter-processus sur un fichier '.lock'.
+
+    Utilise un verrou consultatif du système (fcntl.flock ou msvcrt.locking) quand il est disponible :
+    le système libère le verrou si le processus propriétaire plante. Sinon, ou si le système de fichiers
+    refuse ce type de verrou, bascule sur un bail : un fichier '.lock.lease' distinct créé en O_EXCL et
+    estampillé (hôte, pid, horodatage), repris par un autre poste une fois expiré.
+    Le fichier '.lock' n'est jamais supprimé, d'autres postes pouvant le tenir verrouillé. Pour que les deux
+    mécanismes s'excluent, chacun pose sa marque puis vérifie celle de l'autre : le détenteur d'un verrou
+    système exclusif estampille le '.lock' (vidé à la libération), le détenteur d'un bail crée le '.lease' ;
+    si l'autre marque est active, il renonce et réessaie.
+    Le fichier '.lock' est à obtenir par chemin_verrou(), hors des dossiers de données.
+    """
+
+    def __init__(self, lock_file_path, timeout=10, lease_duration=DUREE_BAIL_DEFAUT):
         self.lock_file_path = lock_file_path
+        self.lease_file_path = f"{lock_file_path}.lease"
         self.timeout = timeout
+        self.lease_duration = lease_duration
         self._lock_file_handle = None
+        self._utilise_bail = fcntl is None and msvcrt is None
+        self._estampille = None
 
     def acquire(self):
-        start_time = time.time()
-        while time.time() - start_time < self.timeout:
-            try:
-                self._lock_file_handle = os.open(self.lock_file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        start_time = time.monotonic()
+        delai = _DELAI_INITIAL
+        tentatives = 0
+        while True:
+            tentatives += 1
+            if self._essayer_acquerir():
+                attente = time.monotonic() - start_time
+                with _stats_verrou:
+                    _stats["acquisitions"] += 1
+                    _stats["attente_totale_s"] += attente
+                    _stats["attente_max_s"] = max(_stats["attente_max_s"], attente)
+                    if tentatives > 1:
+                        _stats["contentions"] += 1
                 return
-            except FileExistsError:
-                time.sleep(0.1)
-        raise TimeoutError(f"Impossible d'acquérir le verrou sur {self.lock_file_path} après {self.timeout} secondes.")
 
-    def release(self):
-        if self._lock_file_handle is not None:
-            os.close(self._lock_file_handle)
+            restant = self.timeout - (time.monotonic() - start_time)
+            if restant <= 0:
+                _incrementer_stat("timeouts")
+                raise TimeoutError(
+                    f"Impossible d'acquérir le verrou sur {self.lock_file_path} après {self.timeout} secondes.")
+            time.sleep(min(delai * random.uniform(0.5, 1.0), restant))
+            delai = min(delai * 2, _DELAI_MAX)
+
+    def _essayer_acquerir(self) -> bool:
+        if not self._utilise_bail:
+            try:
+                return self._essayer_verrou_os()
+            except OSError as e:
+                print(f"AVERTISSEMENT: Verrou système indisponible pour {self.lock_file_path} ({e}), "
+                      f"utilisation d'un bail.")
+                self._utilise_bail = True
+        return self._essayer_bail()
+
+    def _essayer_verrou_os(self) -> bool:
+        fd = os.open(self.lock_file_path, os.O_CREAT | os.O_RDWR | getattr(os, 'O_BINARY', 0))
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    os.close(fd)
+                    return False
+            else:
+                os.lseek(fd, _OFFSET_VERROU_MSVCRT, os.SEEK_SET)
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                except OSError as e:
+                    if e.errno in (errno.EACCES, errno.EDEADLK):
+                        os.close(fd)
+                        return False
+                    raise
+        except OSError:
+            os.close(fd)
+            raise
+
+        self._lock_file_handle = fd
+        try:
+            contenu = json.dumps(_estampille_proprietaire()).encode('utf-8')
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, contenu)
+        except OSError:
+            pass
+        # Un poste sans verrou système peut détenir un bail : on lui laisse la main.
+        bail = self._lire_bail()
+        if bail is not None and not self._bail_expire(bail):
+            self._liberer_verrou_os(fd)
             self._lock_file_handle = None
+            return False
+        return True
+
+    def _lire_bail(self) -> dict | None:
+        try:
+            with open(self.lease_file_path, 'r', encoding='utf-8') as f:
+                contenu = f.read()
+            mtime = os.path.getmtime(self.lease_file_path)
+        except (IOError, OSError):
+            return None
         try:
-            os.remove(self.lock_file_path)
-        except FileNotFoundError:
+            bail = json.loads(contenu)
+            if isinstance(bail, dict):
+                return bail
+        except json.JSONDecodeError:
             pass
+        # Bail en cours d'écriture : seul l'horodatage du fichier est connu.
+        return {"horodatage": mtime}
+
+    def _lire_estampille_verrou_os(self) -> dict | None:
+        """Estampille laissée dans le '.lock' par le détenteur d'un verrou système exclusif (vide s'il est libre)."""
+        try:
+            with open(self.lock_file_path, 'r', encoding='utf-8') as f:
+                estampille = json.loads(f.read())
+        except (IOError, OSError, ValueError):
+            return None
+        return estampille if isinstance(estampille, dict) else None
+
+    def _bail_expire(self, bail: dict) -> bool:
+        if time.time() - bail.get("horodatage", 0) > self.lease_duration:
+            return True
+        if bail.get("hote") == socket.gethostname() and isinstance(bail.get("pid"), int):
+            return not _processus_existe(bail["pid"])
+        return False
+
+    def _essayer_bail(self) -> bool:
+        try:
+            fd = os.open(self.lease_file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+        except FileExistsError:
+            bail = self._lire_bail()
+            if bail is not None and self._bail_expire(bail) and self._lire_bail() == bail:
+                print(f"AVERTISSEMENT: Reprise du bail expiré sur {self.lease_file_path} (détenu par "
+                      f"{bail.get('hote', '?')}/{bail.get('pid', '?')}).")
+                try:
+                    os.remove(self.lease_file_path)
+                    _incrementer_stat("reprises_bail")
+                except FileNotFoundError:
+                    pass
+            return False
+
+        self._estampille = _estampille_proprietaire()
+        try:
+            os.write(fd, json.dumps(self._estampille).encode('utf-8'))
+        except OSError:
+            pass
+        self._lock_file_handle = fd
+        # Un autre poste peut détenir le verrou système : son estampille reste dans le '.lock' tant qu'il le tient.
+        estampille = self._lire_estampille_verrou_os()
+        if estampille is not None and not self._bail_expire(estampille):
+            self.release()
+            return False
+        return True
+
+    def release(self):
+        if self._lock_file_handle is None:
+            return
+        fd = self._lock_file_handle
+        self._lock_file_handle = None
+
+        if self._estampille is not None:
+            bail_actuel = self._lire_bail()
+            os.close(fd)
+            # On ne supprime le bail que s'il nous appartient encore (il a pu être repris après expiration).
+            if bail_actuel == self._estampille:
+                try:
+                    os.remove(self.lease_file_path)
+                except FileNotFoundError:
+                    pass
+            self._estampille = None
+            return
+
+        self._liberer_verrou_os(fd)
+
+    def _liberer_verrou_os(self, fd: int):
+        try:
+            # L'estampille n'est plus valable : un poste en mode bail ne doit plus en tenir compte.
+            os.ftruncate(fd, 0)
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, _OFFSET_VERROU_MSVCRT, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        except OSError as e:
+            print(f"Erreur lors de la libération du verrou {self.lock_file_path}: {e}")
+        finally:
+            os.close(fd)
 
     def __enter__(self):
         self.acquire()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.release()
\ No newline at end of file
+        self.release()
@@ -1,6 +1,16 @@
 # utils/image_utils.py
+import io
+import math
+import os
 from PIL import Image, ImageDraw, ImageOps
 import customtkinter as ctk
+import fitz  # PyMuPDF
+from .pdf_utils import verrou_fitz, rendre_page_pdf
+from .render_cache import obtenir_cache_rendu
+
+EXTENSIONS_IMAGES = ("png", "jpg", "jpeg", "gif", "bmp")
+# Plafond de pixels d'une image décodée pour l'affichage (environ 100 Mo en RGB).
+PIXELS_IMAGE_MAX = 32_000_000
 
 def create_circular_image(image_path: str, size: int) -> ctk.CTkImage | None:
     try:
@@ -19,4 +29,86 @@ def create_circular_image(image_path: str, size: int) -> ctk.CTkImage | None:
     # Appliquer le masque
     img.putalpha(mask)
 
-    return ctk.CTkImage(light_image=img, dark_image=img, size=(size, size))
\ No newline at end of file
+    return ctk.CTkImage(light_image=img, dark_image=img, size=(size, size))
+
+
+def ouvrir_image(source: str | bytes) -> Image.Image:
+    """Ouvre une image depuis un chemin ou depuis son contenu en mémoire."""
+    return Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def creer_vignette(source: str | bytes, largeur: int, nom_fichier: str | None = None) -> Image.Image | None:
+    """
+    Vignette RGB de largeur donnée : première page d'un PDF ou image réduite.
+    source est un chemin, ou le contenu du fichier (nom_fichier donne alors le type).
+    """
+    nom_fichier = nom_fichier or source
+    ext = os.path.splitext(nom_fichier)[1].lower().lstrip(".")
+    try:
+        if ext == "pdf":
+            with verrou_fitz:
+                pdf_doc = fitz.open(stream=source, filetype="pdf") if isinstance(source, bytes) else fitz.open(source)
+                with pdf_doc:
+                    if pdf_doc.page_count == 0:
+                        return None
+                    largeur_page = pdf_doc.load_page(0).rect.width
+                    return rendre_page_pdf(pdf_doc, 0, largeur / largeur_page) if largeur_page else None
+        if ext in EXTENSIONS_IMAGES:
+            with ouvrir_image(source) as img:
+                # draft() laisse le décodeur JPEG réduire l'image dès le chargement.
+                img.draft("RGB", (largeur, largeur * 4))
+                img = img.convert("RGB")
+            img.thumbnail((largeur, largeur * 4), Image.Resampling.LANCZOS)
+            return img
+    except (IOError, RuntimeError, ValueError) as e:
+        print(f"Erreur lors de la création de la vignette de {nom_fichier}: {e}")
+    return None
+
+
+def obtenir_vignette(source: str | bytes, largeur: int, nom_fichier: str | None = None) -> Image.Image | None:
+    """Vignette depuis le cache de rendu local, créée et mise en cache au premier appel."""
+    cache = obtenir_cache_rendu()
+    empreinte = cache.empreinte_donnees(source) if isinstance(source, bytes) else cache.empreinte(source)
+    if empreinte is not None:
+        vignette = cache.lire_vignette(empreinte, largeur)
+        if vignette is not None:
+            return vignette
+    vignette = creer_vignette(source, largeur, nom_fichier)
+    if vignette is not None and empreinte is not None:
+        cache.ecrire_vignette(empreinte, largeur, vignette)
+    return vignette
+
+
+def echelle_max_image(largeur: int, hauteur: int) -> float:
+    """
+    Plus grande échelle décodable sous PIXELS_IMAGE_MAX. Au-delà du plafond, c'est une puissance de 1/2 :
+    le décodeur JPEG (draft) ne sait réduire que par 2, 4 ou 8 sans décoder l'image entière.
+    """
+    pixels = max(1, largeur * hauteur)
+    if pixels <= PIXELS_IMAGE_MAX:
+        return 1.0
+    return 2.0 ** -math.ceil(math.log2(math.sqrt(pixels / PIXELS_IMAGE_MAX)))
+
+
+def charger_image_reduite(source: str | bytes, echelle: float) -> tuple[Image.Image, float]:
+    """
+    Décode une image (chemin ou contenu) en RGB à une résolution au moins égale à echelle (1.0 = taille native),
+    plafonnée à echelle_max_image() : l'affichage agrandit la copie au-delà. Un JPEG est réduit par le décodeur
+    (draft) ; les autres formats par reduce(), après décodage.
+    Retourne (image, échelle réelle par rapport à la taille native).
+    """
+    with ouvrir_image(source) as img:
+        largeur, hauteur = img.size
+        echelle_max = echelle_max_image(largeur, hauteur)
+        if echelle >= echelle_max:
+            # Division entière exacte : draft() réduit alors d'autant, sans jamais décoder la taille native.
+            diviseur = round(1 / echelle_max)
+            cible = (max(1, largeur // diviseur), max(1, hauteur // diviseur))
+        else:
+            cible = (max(1, math.ceil(largeur * echelle)), max(1, math.ceil(hauteur * echelle)))
+        img.draft("RGB", cible)
+        img = img.convert("RGB")
+    facteur = min(img.width // cible[0], img.height // cible[1])
+    if facteur >= 2:
+        img = img.reduce(facteur)
+    return img, img.width / largeur
@@ -1,5 +1,19 @@
 import pdfplumber
 import re
+import threading
+import fitz  # PyMuPDF
+from PIL import Image
+
+# MuPDF n'est pas sûr entre threads : tout accès à un document fitz passe par ce verrou.
+verrou_fitz = threading.Lock()
+
+
+def rendre_page_pdf(pdf_doc, page_num: int, echelle: float) -> Image.Image | None:
+    """Rastérise une page en RGB ; l'appelant doit détenir verrou_fitz."""
+    pix = pdf_doc.load_page(page_num).get_pixmap(matrix=fitz.Matrix(echelle, echelle), alpha=False)
+    if pix.width == 0 or pix.height == 0:
+        return None
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
 
 
 def extraire_infos_facture(chemin_pdf_facture: str) -> dict:
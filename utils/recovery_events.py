@@ -0,0 +1,31 @@
+# utils/recovery_events.py
+import threading
+
+# Résultat d'une tentative de récupération d'un fichier JSON endommagé.
+RECUPERATION_RESTAUREE = "restauree"
+RECUPERATION_BACKUP_INVALIDE = "backup_invalide"
+RECUPERATION_SANS_BACKUP = "sans_backup"
+
+# La couche données ne doit jamais ouvrir de fenêtre : elle publie ici ses récupérations,
+# et l'interface les relève depuis le thread principal pour les présenter en un seul message.
+_verrou = threading.Lock()
+_en_attente = []
+
+
+def publier_recuperations(recuperations: list[tuple[str, str]]):
+    """Publie en un bloc les récupérations (chemin, résultat) d'un même chargement."""
+    if recuperations:
+        with _verrou:
+            _en_attente.append(list(recuperations))
+
+
+def signaler_recuperation(file_path: str, resultat: str):
+    publier_recuperations([(file_path, resultat)])
+
+
+def prendre_recuperations() -> list[list[tuple[str, str]]]:
+    """Retire et renvoie les blocs de récupérations publiés depuis le dernier appel."""
+    with _verrou:
+        blocs = list(_en_attente)
+        _en_attente.clear()
+    return blocs
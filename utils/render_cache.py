@@ -0,0 +1,162 @@
+# utils/render_cache.py
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from PIL import Image
+from config.settings import RENDER_CACHE_DIR
+
+TAILLE_MAX_CACHE_RENDU = 256 * 1024 * 1024
+# Un '.tmp' plus ancien n'est plus en cours d'écriture : c'est le reste d'une écriture interrompue.
+AGE_MAX_FICHIER_TEMP_S = 3600
+
+
+class CacheRendu:
+    """
+    Cache disque local, borné en taille, des pages rendues et des vignettes de pièces jointes.
+
+    Un fichier sur disque est identifié par son chemin, sa date de modification et sa taille : l'empreinte
+    s'obtient sans lire le fichier, qui peut être sur le partage réseau. Un contenu déjà en mémoire (pièce lue
+    dans une archive) est identifié par son hash. Les entrées les moins récemment utilisées sont supprimées
+    quand la taille maximale est dépassée.
+    """
+
+    def __init__(self, dossier: str = RENDER_CACHE_DIR, taille_max: int = TAILLE_MAX_CACHE_RENDU):
+        self.dossier = dossier
+        self.taille_max = taille_max
+        self._verrou = threading.Lock()
+        self._entrees = None
+        self._taille_totale = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def empreinte(chemin: str) -> str | None:
+        """Empreinte (chemin, date, taille) : un seul stat, le contenu n'est pas relu."""
+        try:
+            stat = os.stat(chemin)
+        except OSError:
+            return None
+        cle = f"{os.path.normcase(os.path.abspath(chemin))}|{stat.st_mtime_ns}|{stat.st_size}"
+        return hashlib.sha1(cle.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+    @staticmethod
+    def empreinte_donnees(donnees: bytes) -> str:
+        """Empreinte d'un contenu déjà en mémoire (pièce lue dans une archive)."""
+        return hashlib.sha1(donnees, usedforsecurity=False).hexdigest()
+
+    def _charger_entrees(self):
+        # Appelée sous verrou : l'ordre LRU initial est celui des dates de modification (rafraîchies à chaque lecture).
+        if self._entrees is not None:
+            return
+        self._entrees = OrderedDict()
+        self._taille_totale = 0
+        try:
+            fichiers = [e for e in os.scandir(self.dossier) if e.is_file()]
+        except OSError:
+            fichiers = []
+        limite_temp = time.time() - AGE_MAX_FICHIER_TEMP_S
+        for entree in [e for e in fichiers if e.name.endswith(".tmp")]:
+            try:
+                if entree.stat().st_mtime < limite_temp:
+                    os.remove(entree.path)
+            except OSError:
+                pass
+        fichiers = [e for e in fichiers if e.name.endswith(".png")]
+        for entree in sorted(fichiers, key=lambda e: e.stat().st_mtime):
+            taille = entree.stat().st_size
+            self._entrees[entree.name] = taille
+            self._taille_totale += taille
+
+    @staticmethod
+    def _nom(empreinte: str, variante: str) -> str:
+        return f"{empreinte}_{variante}.png"
+
+    def _lire(self, empreinte: str, variante: str) -> Image.Image | None:
+        nom = self._nom(empreinte, variante)
+        with self._verrou:
+            self._charger_entrees()
+            if nom not in self._entrees:
+                self._stats["misses"] += 1
+                return None
+            self._entrees.move_to_end(nom)
+        chemin = os.path.join(self.dossier, nom)
+        try:
+            with Image.open(chemin) as image:
+                image.load()
+            os.utime(chemin)
+        except OSError:
+            with self._verrou:
+                self._taille_totale -= self._entrees.pop(nom, 0)
+                self._stats["misses"] += 1
+            return None
+        with self._verrou:
+            self._stats["hits"] += 1
+        return image
+
+    def _ecrire(self, empreinte: str, variante: str, image: Image.Image):
+        nom = self._nom(empreinte, variante)
+        temp_path = None
+        try:
+            os.makedirs(self.dossier, exist_ok=True)
+            temp_fd, temp_path = tempfile.mkstemp(dir=self.dossier, suffix=".tmp")
+            with os.fdopen(temp_fd, 'wb') as f:
+                # Compression minimale : le cache doit surtout être rapide à relire et à écrire.
+                image.save(f, format="PNG", compress_level=1)
+            os.replace(temp_path, os.path.join(self.dossier, nom))
+            taille = os.path.getsize(os.path.join(self.dossier, nom))
+        except (OSError, ValueError) as e:
+            print(f"AVERTISSEMENT: Impossible d'écrire dans le cache de rendu : {e}")
+            if temp_path is not None and os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return
+        a_supprimer = []
+        with self._verrou:
+            self._charger_entrees()
+            self._taille_totale += taille - self._entrees.pop(nom, 0)
+            self._entrees[nom] = taille
+            while self._taille_totale > self.taille_max and len(self._entrees) > 1:
+                nom_ancien, taille_ancienne = self._entrees.popitem(last=False)
+                self._taille_totale -= taille_ancienne
+                self._stats["evictions"] += 1
+                a_supprimer.append(nom_ancien)
+        for nom_ancien in a_supprimer:
+            try:
+                os.remove(os.path.join(self.dossier, nom_ancien))
+            except OSError:
+                pass
+
+    def lire_page(self, empreinte: str, page_num: int, zoom: float) -> Image.Image | None:
+        return self._lire(empreinte, f"p{page_num}_z{zoom:g}")
+
+    def ecrire_page(self, empreinte: str, page_num: int, zoom: float, image: Image.Image):
+        self._ecrire(empreinte, f"p{page_num}_z{zoom:g}", image)
+
+    def lire_vignette(self, empreinte: str, largeur: int) -> Image.Image | None:
+        return self._lire(empreinte, f"v{largeur}")
+
+    def ecrire_vignette(self, empreinte: str, largeur: int, image: Image.Image):
+        self._ecrire(empreinte, f"v{largeur}", image)
+
+    def statistiques(self) -> dict:
+        with self._verrou:
+            stats = dict(self._stats)
+            stats["taille_totale"] = self._taille_totale
+            stats["nb_entrees"] = len(self._entrees or ())
+            return stats
+
+
+_cache_rendu = None
+_cache_rendu_verrou = threading.Lock()
+
+
+def obtenir_cache_rendu() -> CacheRendu:
+    global _cache_rendu
+    with _cache_rendu_verrou:
+        if _cache_rendu is None:
+            _cache_rendu = CacheRendu()
+        return _cache_rendu
@@ -0,0 +1,200 @@
+# utils/search_index.py
+import re
+import threading
+import unicodedata
+
+# Poids de chaque champ dans le classement : le nom et la référence priment sur la description.
+PONDERATION_CHAMPS = {"nom": 3.0, "prenom": 2.0, "reference_facture": 3.0, "description": 1.0}
+CHAMPS_RECHERCHE = tuple(PONDERATION_CHAMPS)
+TAILLE_NGRAMME = 3
+SEUIL_SIMILARITE = 0.45
+# Une correspondance approchée (faute de frappe) compte moins qu'une correspondance exacte.
+FACTEUR_APPROCHE = 0.7
+FACTEUR_MILIEU_DE_MOT = 0.8
+
+_SEPARATEURS = re.compile(r"[^0-9a-z]+")
+
+
+def normaliser_texte(texte) -> str:
+    """Minuscules sans accents : 'Hélène' et 'helene' deviennent identiques."""
+    if texte is None:
+        return ""
+    decompose = unicodedata.normalize("NFKD", str(texte))
+    return "".join(c for c in decompose if not unicodedata.combining(c)).lower().strip()
+
+
+def _ngrammes(texte: str) -> set[str]:
+    return {texte[i:i + TAILLE_NGRAMME] for i in range(len(texte) - TAILLE_NGRAMME + 1)}
+
+
+def _ngrammes_mot(mot: str) -> set[str]:
+    # Le mot est encadré d'espaces pour que le début et la fin comptent dans la similarité.
+    return _ngrammes(f"  {mot} ")
+
+
+def _mots_du_champ(champ: str, nom_champ: str) -> set[str]:
+    mots = {mot for mot in _SEPARATEURS.split(champ) if mot}
+    if nom_champ != "description" and len(mots) > 1:
+        # 'Jean-Pierre' doit aussi être trouvé en tapant 'jeanpierre'.
+        mots.add("".join(mot for mot in _SEPARATEURS.split(champ) if mot))
+    return mots
+
+
+def _debute_un_mot(champ: str, mot: str) -> bool:
+    position = champ.find(mot)
+    while position != -1:
+        if position == 0 or not champ[position - 1].isalnum():
+            return True
+        position = champ.find(mot, position + 1)
+    return False
+
+
+class IndexRecherche:
+    """
+    Index de recherche construit une fois par chargement des demandes.
+
+    Les champs sont normalisés à l'indexation (minuscules, sans accents). Pour chaque mot recherché,
+    une demande correspond si le mot apparaît dans un champ (via les n-grammes du champ) ou si un mot
+    du champ lui ressemble assez (similarité de trigrammes, pour les fautes de frappe).
+    Tous les mots doivent correspondre ; le score pondère le champ touché et la qualité de la correspondance.
+    """
+
+    def __init__(self, demandes: list[dict] | None = None):
+        self._verrou = threading.Lock()
+        self._textes = {}
+        self._ngrammes_par_id = {}
+        self._mots_par_id = {}
+        self._index_ngrammes = {}
+        self._index_mots = {}
+        self._index_ngrammes_mots = {}
+        for demande in demandes or []:
+            self._ajouter(demande)
+
+    def _ajouter(self, demande: dict):
+        id_demande = demande.get("id_demande")
+        if not id_demande:
+            return
+        self._retirer(id_demande)
+        champs = [normaliser_texte(demande.get(champ)) for champ in CHAMPS_RECHERCHE]
+        ngrammes = set()
+        mots = {}
+        for nom_champ, champ in zip(CHAMPS_RECHERCHE, champs):
+            ngrammes |= _ngrammes(champ)
+            for mot in _mots_du_champ(champ, nom_champ):
+                mots[mot] = max(mots.get(mot, 0.0), PONDERATION_CHAMPS[nom_champ])
+        for ngramme in ngrammes:
+            self._index_ngrammes.setdefault(ngramme, set()).add(id_demande)
+        for mot in mots:
+            if mot not in self._index_mots:
+                self._index_mots[mot] = set()
+                for ngramme in _ngrammes_mot(mot):
+                    self._index_ngrammes_mots.setdefault(ngramme, set()).add(mot)
+            self._index_mots[mot].add(id_demande)
+        self._textes[id_demande] = champs
+        self._ngrammes_par_id[id_demande] = ngrammes
+        self._mots_par_id[id_demande] = mots
+
+    def _retirer(self, id_demande: str):
+        if self._textes.pop(id_demande, None) is None:
+            return
+        for ngramme in self._ngrammes_par_id.pop(id_demande, ()):
+            ids = self._index_ngrammes.get(ngramme)
+            if ids is not None:
+                ids.discard(id_demande)
+                if not ids:
+                    del self._index_ngrammes[ngramme]
+        for mot in self._mots_par_id.pop(id_demande, {}):
+            ids = self._index_mots.get(mot)
+            if ids is None:
+                continue
+            ids.discard(id_demande)
+            if not ids:
+                del self._index_mots[mot]
+                for ngramme in _ngrammes_mot(mot):
+                    mots = self._index_ngrammes_mots.get(ngramme)
+                    if mots is not None:
+                        mots.discard(mot)
+                        if not mots:
+                            del self._index_ngrammes_mots[ngramme]
+
+    def mettre_a_jour(self, demande: dict):
+        with self._verrou:
+            self._ajouter(demande)
+
+    def retirer(self, id_demande: str):
+        with self._verrou:
+            self._retirer(id_demande)
+
+    def _candidats_exacts(self, mot: str) -> set[str]:
+        if len(mot) >= TAILLE_NGRAMME:
+            candidats = None
+            for ngramme in _ngrammes(mot):
+                ids = self._index_ngrammes.get(ngramme)
+                if not ids:
+                    return set()
+                candidats = set(ids) if candidats is None else candidats & ids
+            return {i for i in candidats if any(mot in champ for champ in self._textes[i])}
+        # Mot trop court pour les n-grammes : on parcourt le vocabulaire, bien plus petit que les demandes.
+        candidats = set()
+        for mot_indexe, ids in self._index_mots.items():
+            if mot in mot_indexe:
+                candidats |= ids
+        return candidats
+
+    def _mots_similaires(self, mot: str) -> dict[str, float]:
+        ngrammes_requete = _ngrammes_mot(mot)
+        communs = {}
+        for ngramme in ngrammes_requete:
+            for mot_indexe in self._index_ngrammes_mots.get(ngramme, ()):
+                communs[mot_indexe] = communs.get(mot_indexe, 0) + 1
+        similaires = {}
+        for mot_indexe, nb_communs in communs.items():
+            similarite = 2 * nb_communs / (len(ngrammes_requete) + len(_ngrammes_mot(mot_indexe)))
+            if similarite >= SEUIL_SIMILARITE:
+                similaires[mot_indexe] = similarite
+        return similaires
+
+    def _scores_pour_mot(self, mot: str) -> dict[str, float]:
+        scores = {}
+        for id_demande in self._candidats_exacts(mot):
+            meilleur = 0.0
+            for nom_champ, champ in zip(CHAMPS_RECHERCHE, self._textes[id_demande]):
+                if mot in champ:
+                    facteur = 1.0 if _debute_un_mot(champ, mot) else FACTEUR_MILIEU_DE_MOT
+                    meilleur = max(meilleur, PONDERATION_CHAMPS[nom_champ] * facteur)
+            scores[id_demande] = meilleur
+        if len(mot) > TAILLE_NGRAMME and not any(c.isdigit() for c in mot):
+            # Les références (chiffres) restent en correspondance exacte : une faute n'y est pas « proche ».
+            for mot_indexe, similarite in self._mots_similaires(mot).items():
+                for id_demande in self._index_mots[mot_indexe]:
+                    score = self._mots_par_id[id_demande][mot_indexe] * similarite * FACTEUR_APPROCHE
+                    if score > scores.get(id_demande, 0.0):
+                        scores[id_demande] = score
+        return scores
+
+    def rechercher(self, requete: str) -> list[str] | None:
+        """
+        Renvoie les id_demande correspondants, du plus pertinent au moins pertinent,
+        ou None si la requête est vide (aucun filtrage).
+        """
+        totaux = self.scores(requete)
+        if totaux is None:
+            return None
+        return sorted(totaux, key=lambda i: (-totaux[i], i))
+
+    def scores(self, requete: str) -> dict[str, float] | None:
+        """{id_demande: score} des demandes correspondantes, ou None si la requête est vide (aucun filtrage)."""
+        mots = [mot for mot in _SEPARATEURS.split(normaliser_texte(requete)) if mot]
+        if not mots:
+            return None
+        with self._verrou:
+            totaux = None
+            for mot in sorted(set(mots), key=len, reverse=True):
+                scores = self._scores_pour_mot(mot)
+                if totaux is None:
+                    totaux = scores
+                else:
+                    totaux = {i: totaux[i] + score for i, score in scores.items() if i in totaux}
+                if not totaux:
+                    return {}
+        return totaux
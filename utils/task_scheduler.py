@@ -0,0 +1,148 @@
+# utils/task_scheduler.py
+import itertools
+import queue
+import threading
+import time
+
+# Plus la valeur est basse, plus la tâche passe tôt : les lectures attendues par l'interface
+# doivent passer avant les traitements de fond comme l'archivage.
+PRIORITE_INTERFACE = 0
+PRIORITE_NORMALE = 10
+PRIORITE_ARRIERE_PLAN = 20
+
+NOMBRE_WORKERS = 4
+INTERVALLE_DISTRIBUTION_MS = 15
+
+
+class _Tache:
+    __slots__ = ("fonction", "on_complete", "on_erreur", "on_annulation", "priorite", "cle", "nom", "annulee",
+                 "soumise_a", "debut", "fin", "resultat", "erreur")
+
+    def __init__(self, fonction, on_complete, on_erreur, on_annulation, priorite, cle):
+        self.fonction = fonction
+        self.on_complete = on_complete
+        self.on_erreur = on_erreur
+        self.on_annulation = on_annulation
+        self.priorite = priorite
+        self.cle = cle
+        self.nom = cle or getattr(fonction, "__qualname__", "tache")
+        self.annulee = False
+        self.soumise_a = time.perf_counter()
+        self.debut = self.fin = None
+        self.resultat = self.erreur = None
+
+
+class PlanificateurTaches:
+    """
+    Pool de workers de taille fixe alimenté par une file à priorité.
+
+    Les callbacks (on_complete, on_erreur, on_annulation) sont toujours appelés depuis le thread Tk, par un unique
+    distributeur qui ne tourne que tant que des tâches sont en cours.
+    Une tâche soumise avec une clé remplace la précédente de même clé : si celle-ci n'a pas démarré
+    elle n'est jamais exécutée, sinon son résultat est ignoré ; seul son on_annulation est appelé.
+    """
+
+    def __init__(self, root, nombre_workers: int = NOMBRE_WORKERS):
+        self.root = root
+        self._file = queue.PriorityQueue()
+        self._terminees = queue.SimpleQueue()
+        self._sequence = itertools.count()
+        self._verrou = threading.Lock()
+        self._par_cle = {}
+        self._nb_en_cours = 0
+        self._distribution_planifiee = False
+        self._stats = {}
+        for i in range(max(1, nombre_workers)):
+            threading.Thread(target=self._boucle_worker, name=f"worker_{i}", daemon=True).start()
+
+    def soumettre(self, fonction, on_complete=None, priorite: int = PRIORITE_NORMALE, cle: str | None = None,
+                  on_erreur=None, on_annulation=None):
+        """À appeler depuis le thread Tk. Retourne la tâche créée."""
+        tache = _Tache(fonction, on_complete, on_erreur, on_annulation, priorite, cle)
+        if cle is not None:
+            with self._verrou:
+                precedente = self._par_cle.get(cle)
+                if precedente is not None:
+                    precedente.annulee = True
+                self._par_cle[cle] = tache
+        self._nb_en_cours += 1
+        self._file.put((priorite, next(self._sequence), tache))
+        self._planifier_distribution()
+        return tache
+
+    def annuler(self, cle: str) -> bool:
+        """Annule la tâche en attente ou en cours portant cette clé : seul son on_annulation sera appelé."""
+        with self._verrou:
+            tache = self._par_cle.pop(cle, None)
+        if tache is None:
+            return False
+        tache.annulee = True
+        return True
+
+    def _boucle_worker(self):
+        while True:
+            _, _, tache = self._file.get()
+            if not tache.annulee:
+                tache.debut = time.perf_counter()
+                try:
+                    tache.resultat = tache.fonction()
+                except Exception as e:
+                    tache.erreur = e
+                tache.fin = time.perf_counter()
+            self._terminees.put(tache)
+
+    def _planifier_distribution(self):
+        if not self._distribution_planifiee:
+            self._distribution_planifiee = True
+            self.root.after(INTERVALLE_DISTRIBUTION_MS, self._distribuer)
+
+    def _distribuer(self):
+        self._distribution_planifiee = False
+        while True:
+            try:
+                tache = self._terminees.get_nowait()
+            except queue.Empty:
+                break
+            self._nb_en_cours -= 1
+            with self._verrou:
+                if tache.cle is not None and self._par_cle.get(tache.cle) is tache:
+                    del self._par_cle[tache.cle]
+            if tache.debut is not None:
+                self._enregistrer_duree(tache)
+            try:
+                if tache.annulee:
+                    if tache.on_annulation:
+                        tache.on_annulation()
+                elif tache.erreur is not None:
+                    if tache.on_erreur:
+                        tache.on_erreur(tache.erreur)
+                elif tache.on_complete:
+                    tache.on_complete(tache.resultat)
+            except Exception as e:
+                print(f"Erreur dans le callback de la tâche '{tache.nom}': {e}")
+        if self._nb_en_cours > 0:
+            self._planifier_distribution()
+
+    def _enregistrer_duree(self, tache: _Tache):
+        attente, execution = tache.debut - tache.soumise_a, tache.fin - tache.debut
+        with self._verrou:
+            stats = self._stats.setdefault(tache.nom, {"executions": 0, "annulees": 0, "erreurs": 0,
+                                                      "attente_totale_s": 0.0, "execution_totale_s": 0.0,
+                                                      "execution_max_s": 0.0})
+            stats["executions"] += 1
+            stats["annulees"] += tache.annulee
+            stats["erreurs"] += tache.erreur is not None
+            stats["attente_totale_s"] += attente
+            stats["execution_totale_s"] += execution
+            stats["execution_max_s"] = max(stats["execution_max_s"], execution)
+
+    def statistiques(self) -> dict:
+        """Durées d'attente et d'exécution par tâche (nommée par sa clé ou sa fonction)."""
+        with self._verrou:
+            resultat = {}
+            for nom, stats in self._stats.items():
+                copie = dict(stats)
+                copie["execution_moyenne_s"] = stats["execution_totale_s"] / stats["executions"]
+                copie["attente_moyenne_s"] = stats["attente_totale_s"] / stats["executions"]
+                resultat[nom] = copie
+            return resultat
@@ -2,6 +2,7 @@
 import os
 import tkinter
 from tkinter import messagebox
+from .recovery_events import RECUPERATION_RESTAUREE, RECUPERATION_BACKUP_INVALIDE
 
 def _show_popup(title, message, a_icon):
     """Fonction helper pour afficher une popup sans la fenêtre principale."""
@@ -37,4 +38,26 @@ def show_recovery_error(file_path, backup_exists):
             "Pour éviter de bloquer l'application, le fichier a été réinitialisé.\n\n"
             "Veuillez contacter le support technique si des données importantes ont été perdues."
         )
-    _show_popup(title, message, a_icon=messagebox.ERROR)
\ No newline at end of file
+    _show_popup(title, message, a_icon=messagebox.ERROR)
+
+def show_recovery_summary(recuperations):
+    """Un seul message pour toutes les récupérations d'un chargement : liste de (chemin, résultat)."""
+    if len(recuperations) == 1:
+        file_path, resultat = recuperations[0]
+        if resultat == RECUPERATION_RESTAUREE:
+            show_recovery_success(file_path)
+        else:
+            show_recovery_error(file_path, backup_exists=resultat == RECUPERATION_BACKUP_INVALIDE)
+        return
+    restaures = [os.path.basename(p) for p, r in recuperations if r == RECUPERATION_RESTAUREE]
+    perdus = [os.path.basename(p) for p, r in recuperations if r != RECUPERATION_RESTAUREE]
+    lignes = []
+    if restaures:
+        lignes.append(f"{len(restaures)} fichier(s) endommagé(s) restauré(s) depuis leur sauvegarde :\n  "
+                      + "\n  ".join(restaures))
+    if perdus:
+        lignes.append(f"{len(perdus)} fichier(s) illisible(s) sans sauvegarde valide, ignoré(s) :\n  "
+                      + "\n  ".join(perdus))
+        lignes.append("Veuillez contacter le support technique si des données importantes ont été perdues.")
+    title = "Erreur Critique de Données" if perdus else "Récupération de Données Réussie"
+    _show_popup(title, "\n\n".join(lignes), a_icon=messagebox.ERROR if perdus else messagebox.WARNING)
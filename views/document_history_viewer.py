@@ -2,6 +2,8 @@
 import os
 import customtkinter as ctk
 
+LARGEUR_VIGNETTE = 48
+
 
 class DocumentHistoryViewer(ctk.CTkToplevel):
     def __init__(self, master, demande_data: dict, callbacks: dict):
@@ -27,42 +29,43 @@ class DocumentHistoryViewer(ctk.CTkToplevel):
         if chemins_factures_rel:
             ctk.CTkLabel(main_frame, text="Historique des Factures:", font=label_font).pack(anchor="w", pady=(10, 5))
             for idx, rel_path in enumerate(chemins_factures_rel):
-                item_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
-                item_frame.pack(fill="x", pady=2)
-                ctk.CTkLabel(item_frame, text=f"Version {idx + 1}: {os.path.basename(rel_path)}").pack(side="left", padx=5)
-                ctk.CTkButton(item_frame, text="DL", width=60,
-                              command=lambda d=self.id_demande, p=rel_path: self.callbacks['dl_pj'](d, p)).pack(side="right", padx=2)
-                ctk.CTkButton(item_frame, text="Voir", width=60,
-                              command=lambda d=self.id_demande, p=rel_path: self.callbacks['voir_pj'](d, p)).pack(side="right", padx=2)
+                self._ajouter_version(main_frame, idx, rel_path)
 
         # Section RIBs
         chemins_ribs_rel = self.demande_data.get("chemins_rib_stockes", [])
         if chemins_ribs_rel:
             ctk.CTkLabel(main_frame, text="Historique des RIBs:", font=label_font).pack(anchor="w", pady=(15, 5))
             for idx, rel_path in enumerate(chemins_ribs_rel):
-                item_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
-                item_frame.pack(fill="x", pady=2)
-                ctk.CTkLabel(item_frame, text=f"Version {idx + 1}: {os.path.basename(rel_path)}").pack(side="left", padx=5)
-                ctk.CTkButton(item_frame, text="DL", width=60,
-                              command=lambda d=self.id_demande, p=rel_path: self.callbacks['dl_pj'](d, p)).pack(side="right", padx=2)
-                ctk.CTkButton(item_frame, text="Voir", width=60,
-                              command=lambda d=self.id_demande, p=rel_path: self.callbacks['voir_pj'](d, p)).pack(side="right", padx=2)
+                self._ajouter_version(main_frame, idx, rel_path)
 
         # Section Preuves de Trop-Perçu
         chemins_trop_percu_rel = self.demande_data.get("pieces_capture_trop_percu", [])
         if chemins_trop_percu_rel:
             ctk.CTkLabel(main_frame, text="Historique des Preuves de Trop-Perçu:", font=label_font).pack(anchor="w", pady=(15, 5))
             for idx, rel_path in enumerate(chemins_trop_percu_rel):
-                item_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
-                item_frame.pack(fill="x", pady=2)
-                ctk.CTkLabel(item_frame, text=f"Version {idx + 1}: {os.path.basename(rel_path)}").pack(side="left", padx=5)
-                ctk.CTkButton(item_frame, text="DL", width=60,
-                              command=lambda d=self.id_demande, p=rel_path: self.callbacks['dl_pj'](d, p)).pack(side="right", padx=2)
-                ctk.CTkButton(item_frame, text="Voir", width=60,
-                              command=lambda d=self.id_demande, p=rel_path: self.callbacks['voir_pj'](d, p)).pack(side="right", padx=2)
+                self._ajouter_version(main_frame, idx, rel_path)
 
         if not chemins_factures_rel and not chemins_ribs_rel and not chemins_trop_percu_rel:
             ctk.CTkLabel(main_frame, text="Aucun document historisé pour cette demande.").pack(pady=20)
 
         close_button = ctk.CTkButton(self, text="Fermer", command=self.destroy)
-        close_button.pack(pady=10)
\ No newline at end of file
+        close_button.pack(pady=10)
+
+    def _ajouter_version(self, parent, idx: int, rel_path: str):
+        item_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        item_frame.pack(fill="x", pady=2)
+        vignette_label = ctk.CTkLabel(item_frame, text="", width=LARGEUR_VIGNETTE)
+        vignette_label.pack(side="left", padx=5)
+        ctk.CTkLabel(item_frame, text=f"Version {idx + 1}: {os.path.basename(rel_path)}").pack(side="left", padx=5)
+        ctk.CTkButton(item_frame, text="DL", width=60,
+                      command=lambda d=self.id_demande, p=rel_path: self.callbacks['dl_pj'](d, p)).pack(side="right", padx=2)
+        ctk.CTkButton(item_frame, text="Voir", width=60,
+                      command=lambda d=self.id_demande, p=rel_path: self.callbacks['voir_pj'](d, p)).pack(side="right", padx=2)
+
+        def afficher_vignette(image):
+            if vignette_label.winfo_exists():
+                vignette = ctk.CTkImage(light_image=image, dark_image=image, size=image.size)
+                vignette_label.configure(image=vignette)
+
+        # Les vignettes viennent du cache de rendu local : seule la première ouverture d'une version les calcule.
+        self.callbacks['vignette_pj'](self.id_demande, rel_path, LARGEUR_VIGNETTE, afficher_vignette)
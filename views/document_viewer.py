@@ -1,4 +1,5 @@
 import os
+import math
 import customtkinter as ctk
 from tkinter import messagebox
 from PIL import Image
@@ -6,10 +7,27 @@ import fitz  # PyMuPDF
 import sys
 import subprocess
 from utils import archive_utils
+from utils.pdf_utils import verrou_fitz, rendre_page_pdf
+from utils.render_cache import obtenir_cache_rendu
+from utils.image_utils import EXTENSIONS_IMAGES
+from utils.task_scheduler import PRIORITE_INTERFACE, PRIORITE_NORMALE
+from views.tiled_image_view import TiledImageView
+
+ECHELLE_PDF = 1.3
+ESPACE_ENTRE_PAGES = 5
+# Pages rendues au-delà de la zone visible, et distance (en pages) au-delà de laquelle une image est libérée.
+MARGE_PAGES_RENDUES = 1
+MARGE_PAGES_CONSERVEES = 3
+DELAI_VERIFICATION_PAGES_MS = 150
+# Au-delà, les pages rendues les plus éloignées de la zone visible sont libérées (environ 150 Mo en RGB).
+PIXELS_PAGES_MAX = 48_000_000
+NIVEAUX_ZOOM = (0.1, 0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0)
 
 
 class DocumentViewerWindow(ctk.CTkToplevel):
-    def __init__(self, master, file_path: str, title: str, temp_dir_to_clean: str | None = None):
+    def __init__(self, master, file_path: str, title: str, temp_dir_to_clean: str | None = None,
+                 donnees: bytes | None = None):
+        """Avec donnees (pièce archivée lue en mémoire), file_path n'est que le nom du fichier affiché."""
         super().__init__(master)
         self.title(title)
         self.geometry("800x600")
@@ -20,8 +38,26 @@ class DocumentViewerWindow(ctk.CTkToplevel):
 
         self.master = master
         self.file_path = file_path
+        self.donnees = donnees
         self.pdf_doc = None
         self.temp_dir_to_clean = temp_dir_to_clean
+        self._cadres_pages = []
+        self._pages_rendues = {}
+        self._pages_en_cours = set()
+        self._verification_job_id = None
+        self._empreinte = None
+        self._tailles_pages_pdf = []
+        self._vue_image = None
+        self.zoom = 1.0
+
+        self.barre_zoom = ctk.CTkFrame(self, fg_color="transparent")
+        ctk.CTkButton(self.barre_zoom, text="−", width=32,
+                      command=lambda: self._changer_niveau_zoom(-1)).pack(side="left")
+        self.zoom_label = ctk.CTkLabel(self.barre_zoom, text="100 %", width=60)
+        self.zoom_label.pack(side="left", padx=5)
+        ctk.CTkButton(self.barre_zoom, text="+", width=32,
+                      command=lambda: self._changer_niveau_zoom(1)).pack(side="left")
+        ctk.CTkButton(self.barre_zoom, text="Ajuster", width=70, command=self._ajuster_zoom).pack(side="left", padx=10)
 
         self.scrollable_frame = ctk.CTkScrollableFrame(self)
         self.scrollable_frame.pack(expand=True, fill="both", padx=10, pady=10)
@@ -33,6 +69,13 @@ class DocumentViewerWindow(ctk.CTkToplevel):
 
     def _open_with_system_default(self, close_viewer_after=True):
         """Tente d'ouvrir le fichier avec l'application par défaut du système."""
+        if self.donnees is not None and not os.path.exists(self.file_path):
+            # Une application externe a besoin d'un vrai fichier : seule la pièce affichée est écrite sur disque.
+            chemin, _ = archive_utils.ecrire_fichier_temp(self.file_path, self.donnees)
+            if chemin is None:
+                self.master.app_controller.show_toast("Impossible de préparer le fichier pour l'ouvrir.", "error")
+                return
+            self.file_path = chemin
         try:
             if os.name == 'nt':
                 os.startfile(self.file_path)
@@ -65,55 +108,26 @@ class DocumentViewerWindow(ctk.CTkToplevel):
             else:
                 raise ValueError("Chemin de fichier invalide ou sans extension.")
 
-            if ext in ("png", "jpg", "jpeg", "gif", "bmp"):
-                pil_image_original = Image.open(self.file_path)
-                target_width, target_height = pil_image_original.size
-
+            if ext in EXTENSIONS_IMAGES:
+                # L'image n'est jamais affichée en entier à sa taille native : seules les tuiles visibles
+                # sont découpées, au zoom courant, dans une copie réduite de l'image.
+                source = self.donnees if self.donnees is not None else self.file_path
+                self._vue_image = TiledImageView(self, source, self.master.app_controller)
+                target_width, target_height = self._vue_image.taille_originale
                 window_width = min(target_width + 60, max_window_width)
-                window_height = min(target_height + 60, max_window_height)
+                window_height = min(target_height + 100, max_window_height)
                 self.geometry(f"{int(window_width)}x{int(window_height)}")
-                self.update_idletasks()
 
-                ctk_img = ctk.CTkImage(light_image=pil_image_original,
-                                       dark_image=pil_image_original,
-                                       size=(target_width, target_height))
-                image_label = ctk.CTkLabel(self.content_container, image=ctk_img, text="")
-                image_label.pack(padx=0, pady=0)
+                self.scrollable_frame.pack_forget()
+                self.barre_zoom.pack(pady=(10, 0))
+                self._vue_image.pack(expand=True, fill="both", padx=10, pady=10)
+                self._appliquer_zoom(self._vue_image.zoom_ajuste(window_width - 60, window_height - 100))
                 file_processed_internally = True
 
             elif ext == "pdf":
-                self.pdf_doc = fitz.open(self.file_path)
-                if self.pdf_doc.page_count == 0:
+                file_processed_internally = self._afficher_pdf(max_window_width, max_window_height)
+                if not file_processed_internally:
                     error_message_detail = "Le fichier PDF est vide."
-                else:
-                    max_page_render_width = 0
-                    pdf_fixed_matrix_scale = 1.3
-
-                    for page_num in range(self.pdf_doc.page_count):
-                        page = self.pdf_doc.load_page(page_num)
-                        mat = fitz.Matrix(pdf_fixed_matrix_scale, pdf_fixed_matrix_scale)
-                        pix = page.get_pixmap(matrix=mat, alpha=False)
-
-                        if pix.width == 0 or pix.height == 0: continue
-
-                        current_pil_page_image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                        current_page_width, current_page_height = current_pil_page_image.size
-
-                        if page_num == 0:
-                            max_page_render_width = current_page_width
-
-                        ctk_img_page = ctk.CTkImage(light_image=current_pil_page_image,
-                                                    dark_image=current_pil_page_image,
-                                                    size=(current_page_width, current_page_height))
-                        page_label = ctk.CTkLabel(self.content_container, image=ctk_img_page, text="")
-                        page_label.pack(pady=(0 if page_num == 0 else 5, 0), padx=5)
-
-                    window_width = min(max_page_render_width + 70, max_window_width)
-                    first_page_height = self.pdf_doc.load_page(0).get_pixmap(
-                        matrix=fitz.Matrix(pdf_fixed_matrix_scale, pdf_fixed_matrix_scale)).height
-                    window_height = min(max(500, first_page_height + 60), max_window_height)
-                    self.geometry(f"{int(window_width)}x{int(window_height)}")
-                    file_processed_internally = True
 
             else:
                 error_message_detail = f"Aperçu direct non supporté pour '{os.path.basename(self.file_path)}'."
@@ -143,13 +157,186 @@ class DocumentViewerWindow(ctk.CTkToplevel):
                                    parent=self):
                 self._open_with_system_default()
 
+    def _afficher_pdf(self, max_window_width: int, max_window_height: int) -> bool:
+        """
+        Crée un cadre par page à la taille lue dans la géométrie du PDF, sans rien rastériser.
+        La première page est rendue d'abord, les autres hors du thread Tk quand elles approchent de la zone visible.
+        """
+        with verrou_fitz:
+            if self.donnees is not None:
+                self.pdf_doc = fitz.open(stream=self.donnees, filetype="pdf")
+            else:
+                self.pdf_doc = fitz.open(self.file_path)
+            self._tailles_pages_pdf = [(page.rect.width, page.rect.height) for page in self.pdf_doc]
+        if not self._tailles_pages_pdf:
+            return False
+
+        largeur_max = max(largeur for largeur, _ in self._tailles_pages_pdf) * ECHELLE_PDF
+        window_width = min(int(largeur_max) + 70, max_window_width)
+        window_height = min(max(500, int(self._tailles_pages_pdf[0][1] * ECHELLE_PDF) + 100), max_window_height)
+        self.geometry(f"{int(window_width)}x{int(window_height)}")
+        self.barre_zoom.pack(before=self.scrollable_frame, pady=(10, 0))
+
+        self._construire_pages_pdf()
+        self._verification_job_id = self.after(DELAI_VERIFICATION_PAGES_MS, self._verifier_pages_visibles)
+        return True
+
+    def _echelle_pdf(self) -> float:
+        return ECHELLE_PDF * self.zoom
+
+    def _construire_pages_pdf(self):
+        for page_num in list(self._pages_en_cours):
+            self.master.app_controller.planificateur.annuler(self._cle_rendu(page_num))
+        self._pages_en_cours.clear()
+        self._pages_rendues.clear()
+        for cadre in self._cadres_pages:
+            cadre.destroy()
+        self._cadres_pages = []
+
+        echelle = self._echelle_pdf()
+        for page_num, (largeur, hauteur) in enumerate(self._tailles_pages_pdf):
+            cadre = ctk.CTkFrame(self.content_container, width=math.ceil(largeur * echelle),
+                                 height=math.ceil(hauteur * echelle))
+            cadre.pack_propagate(False)
+            cadre.pack(pady=(0 if page_num == 0 else ESPACE_ENTRE_PAGES, 0), padx=5)
+            self._cadres_pages.append(cadre)
+            self._placer_etiquette_page(page_num)
+        self._demander_rendu_page(0)
+
+    def _changer_niveau_zoom(self, sens: int):
+        if sens > 0:
+            niveaux = [n for n in NIVEAUX_ZOOM if n > self.zoom * 1.01]
+            nouveau = niveaux[0] if niveaux else NIVEAUX_ZOOM[-1]
+        else:
+            niveaux = [n for n in NIVEAUX_ZOOM if n < self.zoom * 0.99]
+            nouveau = niveaux[-1] if niveaux else NIVEAUX_ZOOM[0]
+        self._appliquer_zoom(nouveau)
+
+    def _ajuster_zoom(self):
+        if self._vue_image is not None:
+            canvas = self._vue_image.canvas
+            self._appliquer_zoom(self._vue_image.zoom_ajuste(canvas.winfo_width(), canvas.winfo_height()))
+        elif self._tailles_pages_pdf:
+            largeur_max = max(largeur for largeur, _ in self._tailles_pages_pdf) * ECHELLE_PDF
+            largeur_vue = self.scrollable_frame._parent_canvas.winfo_width() - 20
+            self._appliquer_zoom(max(NIVEAUX_ZOOM[0], largeur_vue / largeur_max))
+
+    def _appliquer_zoom(self, zoom: float):
+        zoom_modifie = zoom != self.zoom
+        self.zoom = zoom
+        self.zoom_label.configure(text=f"{round(zoom * 100)} %")
+        if self._vue_image is not None:
+            self._vue_image.definir_zoom(zoom)
+        elif self.pdf_doc is not None and zoom_modifie:
+            self._construire_pages_pdf()
+            self.scrollable_frame._parent_canvas.yview_moveto(0)
+
+    def _placer_etiquette_page(self, page_num: int, image: ctk.CTkImage | None = None):
+        # CTkLabel ne sait pas retirer une image : l'étiquette est recréée à chaque changement.
+        cadre = self._cadres_pages[page_num]
+        for widget in cadre.winfo_children():
+            widget.destroy()
+        if image is None:
+            etiquette = ctk.CTkLabel(cadre, text=f"Page {page_num + 1}...")
+        else:
+            etiquette = ctk.CTkLabel(cadre, image=image, text="")
+        etiquette.pack(expand=True, fill="both")
+
+    def _cle_rendu(self, page_num: int) -> str:
+        return f"rendu_pdf_{id(self)}_{page_num}"
+
+    def _demander_rendu_page(self, page_num: int):
+        if page_num in self._pages_rendues or page_num in self._pages_en_cours:
+            return
+        self._pages_en_cours.add(page_num)
+        echelle = self._echelle_pdf()
+        self.master.app_controller.run_threaded_task(
+            lambda: self._rendre_page(page_num, echelle),
+            lambda image: self._on_page_rendue(page_num, echelle, image),
+            priorite=PRIORITE_INTERFACE if page_num == 0 else PRIORITE_NORMALE,
+            cle=self._cle_rendu(page_num), show_overlay=False)
+
+    def _rendre_page(self, page_num: int, echelle: float) -> Image.Image | None:
+        """Exécutée dans un worker : page depuis le cache de rendu local, sinon rastérisée puis mise en cache."""
+        cache = obtenir_cache_rendu()
+        if self._empreinte is None:
+            self._empreinte = (cache.empreinte_donnees(self.donnees) if self.donnees is not None
+                               else cache.empreinte(self.file_path))
+        if self._empreinte is not None:
+            image = cache.lire_page(self._empreinte, page_num, echelle)
+            if image is not None:
+                return image
+        with verrou_fitz:
+            if self.pdf_doc is None:
+                return None
+            image = rendre_page_pdf(self.pdf_doc, page_num, echelle)
+        if image is not None and self._empreinte is not None:
+            cache.ecrire_page(self._empreinte, page_num, echelle, image)
+        return image
+
+    def _on_page_rendue(self, page_num: int, echelle: float, image: Image.Image | None):
+        if echelle != self._echelle_pdf():
+            # Rendu d'un zoom précédent : les cadres ont été reconstruits depuis.
+            return
+        self._pages_en_cours.discard(page_num)
+        if image is None or self.pdf_doc is None or not self.winfo_exists():
+            return
+        ctk_img = ctk.CTkImage(light_image=image, dark_image=image, size=image.size)
+        self._pages_rendues[page_num] = (ctk_img, image.width * image.height)
+        self._placer_etiquette_page(page_num, ctk_img)
+
+    def _pages_visibles(self) -> list[int]:
+        canvas = self.scrollable_frame._parent_canvas
+        haut = canvas.winfo_rooty()
+        bas = haut + canvas.winfo_height()
+        return [page_num for page_num, cadre in enumerate(self._cadres_pages)
+                if cadre.winfo_rooty() < bas and cadre.winfo_rooty() + cadre.winfo_height() > haut]
+
+    def _verifier_pages_visibles(self):
+        """Rend les pages qui approchent de la zone visible et libère les images des pages éloignées."""
+        self._verification_job_id = None
+        if self.pdf_doc is None or not self.winfo_exists():
+            return
+        visibles = self._pages_visibles()
+        if visibles:
+            premiere, derniere = visibles[0], visibles[-1]
+            for page_num in range(max(0, premiere - MARGE_PAGES_RENDUES),
+                                  min(len(self._cadres_pages), derniere + MARGE_PAGES_RENDUES + 1)):
+                self._demander_rendu_page(page_num)
+            for page_num in list(self._pages_rendues):
+                if page_num < premiere - MARGE_PAGES_CONSERVEES or page_num > derniere + MARGE_PAGES_CONSERVEES:
+                    del self._pages_rendues[page_num]
+                    self._placer_etiquette_page(page_num)
+            for page_num in list(self._pages_en_cours):
+                if page_num < premiere - MARGE_PAGES_CONSERVEES or page_num > derniere + MARGE_PAGES_CONSERVEES:
+                    self.master.app_controller.planificateur.annuler(self._cle_rendu(page_num))
+                    self._pages_en_cours.discard(page_num)
+            # Aux forts zooms, même les pages proches peuvent dépasser le budget mémoire.
+            pixels = sum(nb_pixels for _, nb_pixels in self._pages_rendues.values())
+            eloignees = sorted((p for p in self._pages_rendues if p < premiere or p > derniere),
+                               key=lambda p: -min(abs(p - premiere), abs(p - derniere)))
+            for page_num in eloignees:
+                if pixels <= PIXELS_PAGES_MAX:
+                    break
+                pixels -= self._pages_rendues.pop(page_num)[1]
+                self._placer_etiquette_page(page_num)
+        self._verification_job_id = self.after(DELAI_VERIFICATION_PAGES_MS, self._verifier_pages_visibles)
+
     def destroy(self):
+        if self._verification_job_id:
+            self.after_cancel(self._verification_job_id)
+            self._verification_job_id = None
+        for page_num in list(self._pages_en_cours):
+            self.master.app_controller.planificateur.annuler(self._cle_rendu(page_num))
+        self._pages_en_cours.clear()
+        self._pages_rendues.clear()
         if self.pdf_doc:
-            try:
-                self.pdf_doc.close()
-            except Exception as e:
-                print(f"Erreur lors de la fermeture du document PDF: {e}")
-            self.pdf_doc = None
+            with verrou_fitz:
+                try:
+                    self.pdf_doc.close()
+                except Exception as e:
+                    print(f"Erreur lors de la fermeture du document PDF: {e}")
+                self.pdf_doc = None
         if self.temp_dir_to_clean:
             archive_utils.cleanup_temp_dir(self.temp_dir_to_clean)
         super().destroy()
\ No newline at end of file
@@ -5,29 +5,57 @@ import datetime
 from PIL import Image, ImageDraw, ImageFont
 
 from config.settings import (
-    REMBOURSEMENTS_JSON_DIR, STATUT_CREEE,
-    STATUT_REFUSEE_CONSTAT_TP, STATUT_ANNULEE,
+    REMBOURSEMENTS_JSON_DIR, STATUT_ANNULEE,
     STATUT_PAIEMENT_EFFECTUE, STATUT_TROP_PERCU_CONSTATE,
-    STATUT_VALIDEE, STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO,
-    PROFILE_PICTURES_DIR
+    STATUT_VALIDEE, PROFILE_PICTURES_DIR
 )
 from models import user_model
-from utils import archive_utils
+from models.remboursement_file_actions import FileActionsUtilisateur
+from utils.search_index import IndexRecherche, normaliser_texte
 from views.document_viewer import DocumentViewerWindow
-from views.remboursement_item_view import RemboursementItemView
+from views.remboursement_item_view import RemboursementItemView, empreinte_demande
+from models.remboursement_resume import version_demande
 from views.document_history_viewer import DocumentHistoryViewer
 from views.admin_user_management_view import AdminUserManagementView
 from views.help_view import HelpView
 from views.profile_view import ProfileView
-from utils.image_utils import create_circular_image
+from utils.image_utils import create_circular_image, obtenir_vignette
+from utils.task_scheduler import PRIORITE_NORMALE
 from views.dialogs.comment_dialog import CommentDialog
 
 POLLING_INTERVAL_MS = 5000
+TAILLE_PAGE_LISTE = 25
+# Option de tri affichée -> (clé de tri précalculée, ordre décroissant)
+OPTIONS_TRI = {
+    "Date de création (récent)": ("date_creation", True),
+    "Date de création (ancien)": ("date_creation", False),
+    "Montant (décroissant)": ("montant_demande", True),
+    "Montant (croissant)": ("montant_demande", False),
+    "Nom du patient (A-Z)": ("nom", False)
+}
+DELAI_RECHERCHE_MS = 250
+CLE_TACHE_CHANGEMENTS = "changements_journal"
 COULEUR_ACTIVE_POUR_UTILISATEUR = "#1E4D2B"
 COULEUR_DEMANDE_TERMINEE = "#2E4374"
 COULEUR_DEMANDE_ANNULEE = "#6A040F"
 
 
+def _cles_de_tri(demande: dict) -> dict:
+    date_creation = demande.get("date_creation")
+    if isinstance(date_creation, str):
+        try:
+            date_creation = datetime.datetime.fromisoformat(date_creation)
+        except ValueError:
+            date_creation = None
+    if not isinstance(date_creation, datetime.datetime):
+        date_creation = datetime.datetime.min
+    try:
+        montant = float(demande.get("montant_demande") or 0)
+    except (TypeError, ValueError):
+        montant = 0.0
+    return {"date_creation": date_creation, "montant_demande": montant, "nom": normaliser_texte(demande.get("nom"))}
+
+
 class MainView(ctk.CTkFrame):
     def __init__(self, master, nom_utilisateur, app_controller, remboursement_controller_factory):
         super().__init__(master, corner_radius=0, fg_color="transparent")
@@ -43,9 +71,27 @@ class MainView(ctk.CTkFrame):
         self._polling_job_id = None
         self._last_known_remboursements_mtime = 0
         self.all_demandes_cache = []
+        self._index_recherche = IndexRecherche()
+        self._cles_tri = {}
+        self._permutations_tri = {}
+        self._version_donnees = 0
+        self.selection_ids = set()
+        self.page_courante = 0
+        self._demandes_affichees = []
+        self._lignes_par_id = {}
+        self._lignes_libres = []
+        self._ordre_lignes_affichees = []
+        self._details_par_id = {}
+        self._details_en_cours = set()
+        self._ids_deplies = set()
+        self._ids_changements_en_attente = set()
         self._is_refreshing = False
+        self._rafraichissement_en_attente = False
+        self._rechargement_en_attente = False
+        self._recherche_job_id = None
 
         self._fetch_user_data()
+        self._file_actions = FileActionsUtilisateur(self.nom_utilisateur, self.user_roles)
         self.initial_theme = self.user_data.get("theme_color", "blue")
 
         self.current_sort = "Date de création (récent)"
@@ -56,6 +102,7 @@ class MainView(ctk.CTkFrame):
         self.callbacks = {
             'voir_pj': self._action_voir_pj,
             'dl_pj': self._action_telecharger_pj,
+            'vignette_pj': self._action_vignette_pj,
             'mlupo_accepter': self._action_mlupo_accepter,
             'mlupo_refuser': self._action_mlupo_refuser,
             'jdurousset_valider': self._action_jdurousset_valider,
@@ -66,11 +113,13 @@ class MainView(ctk.CTkFrame):
             'mlupo_resoumettre_constat': self._action_mlupo_resoumettre_constat,
             'supprimer_demande': self._action_supprimer_demande,
             'voir_historique_docs': self._action_voir_historique_docs,
-            'admin_manual_archive': self._action_admin_manual_archive
+            'admin_manual_archive': self._action_admin_manual_archive,
+            'basculer_selection': self._basculer_selection,
+            'basculer_details': self._basculer_details
         }
 
         self._creer_widgets()
-        self.afficher_liste_demandes(force_reload=True)
+        self._recharger_depuis_disque()
         self.start_polling()
 
     def _fetch_user_data(self):
@@ -119,12 +168,25 @@ class MainView(ctk.CTkFrame):
                           command=self._ouvrir_fenetre_creation_demande).pack(side="left", pady=5, padx=(0, 10))
 
         self.bouton_rafraichir = ctk.CTkButton(actions_bar_frame, text="Rafraîchir (F5)",
-                                               command=lambda: self.afficher_liste_demandes(force_reload=True),
+                                               command=self._recharger_depuis_disque,
                                                width=120)
         self.bouton_rafraichir.pack(side="left", pady=5, padx=10)
         self.notification_badge = ctk.CTkLabel(self.bouton_rafraichir, text="", fg_color="red", corner_radius=8,
                                                width=18, height=18, font=("Arial", 11, "bold"))
-        self.winfo_toplevel().bind("<F5>", lambda event: self.afficher_liste_demandes(force_reload=True))
+        self.winfo_toplevel().bind("<F5>", lambda event: self._recharger_depuis_disque())
+
+        self.bouton_lot_valider = None
+        self.bouton_lot_paiement = None
+        if self.est_validateur_chef() or self.est_admin():
+            self.bouton_lot_valider = ctk.CTkButton(actions_bar_frame, text="Valider la sélection (0)",
+                                                    command=self._action_lot_valider, state="disabled",
+                                                    fg_color="blue", hover_color="darkblue")
+            self.bouton_lot_valider.pack(side="left", pady=5, padx=10)
+        if self.est_comptable_fournisseur() or self.est_admin():
+            self.bouton_lot_paiement = ctk.CTkButton(actions_bar_frame, text="Confirmer paiements (0)",
+                                                     command=self._action_lot_confirmer_paiement, state="disabled",
+                                                     fg_color="#006400", hover_color="#004d00")
+            self.bouton_lot_paiement.pack(side="left", pady=5, padx=10)
 
         if self.est_admin():
             ctk.CTkButton(actions_bar_frame, text="Gérer Utilisateurs",
@@ -136,8 +198,7 @@ class MainView(ctk.CTkFrame):
         options_frame = ctk.CTkFrame(actions_bar_frame, fg_color="transparent")
         options_frame.pack(side="right", pady=5)
         ctk.CTkLabel(options_frame, text="Trier par:").pack(side="left", padx=(10, 5))
-        sort_options = ["Date de création (récent)", "Date de création (ancien)", "Montant (décroissant)",
-                        "Montant (croissant)", "Nom du patient (A-Z)"]
+        sort_options = list(OPTIONS_TRI)
         self.sort_menu = ctk.CTkOptionMenu(options_frame, values=sort_options, command=self._set_sort, width=180)
         self.sort_menu.set(self.current_sort)
         self.sort_menu.pack(side="left", padx=(0, 10))
@@ -151,12 +212,12 @@ class MainView(ctk.CTkFrame):
 
         search_frame_parent = ctk.CTkFrame(main_content_frame, fg_color="transparent")
         search_frame_parent.grid(row=2, column=0, sticky="ew", padx=10, pady=5)
-        ctk.CTkLabel(search_frame_parent, text="Rechercher (Nom, Prénom, Réf.):",
+        ctk.CTkLabel(search_frame_parent, text="Rechercher (Nom, Prénom, Réf., Description):",
                      font=ctk.CTkFont(size=12)).pack(
             side="left", padx=(0, 5))
         self.search_entry = ctk.CTkEntry(search_frame_parent, textvariable=self.search_var, width=300)
         self.search_entry.pack(side="left", padx=(0, 5), fill="x", expand=True)
-        self.search_var.trace_add("write", lambda name, index, mode: self.afficher_liste_demandes())
+        self.search_var.trace_add("write", lambda name, index, mode: self._on_search_change())
         ctk.CTkButton(search_frame_parent, text="X", width=30, command=self._clear_search).pack(side="left",
                                                                                                 padx=(5, 0))
         ctk.CTkCheckBox(search_frame_parent, text="Inclure les archives", variable=self.include_archives,
@@ -166,9 +227,24 @@ class MainView(ctk.CTkFrame):
                                                                 label_text="Liste des Demandes de Remboursement")
         self.scrollable_frame_demandes.grid(row=3, column=0, pady=(5, 5), padx=10, sticky="nsew")
         self.scrollable_frame_demandes.grid_columnconfigure(0, weight=1)
+        self.label_aucune_demande = ctk.CTkLabel(self.scrollable_frame_demandes, text="Aucune demande à afficher.",
+                                                 font=ctk.CTkFont(size=14, slant="italic"))
+
+        pagination_frame = ctk.CTkFrame(main_content_frame, fg_color="transparent")
+        pagination_frame.grid(row=4, column=0, sticky="ew", padx=10)
+        pagination_inner = ctk.CTkFrame(pagination_frame, fg_color="transparent")
+        pagination_inner.pack()
+        self.bouton_page_precedente = ctk.CTkButton(pagination_inner, text="< Précédent", width=100,
+                                                    command=lambda: self._changer_page(-1))
+        self.bouton_page_precedente.pack(side="left", padx=5)
+        self.label_pagination = ctk.CTkLabel(pagination_inner, text="")
+        self.label_pagination.pack(side="left", padx=10)
+        self.bouton_page_suivante = ctk.CTkButton(pagination_inner, text="Suivant >", width=100,
+                                                  command=lambda: self._changer_page(1))
+        self.bouton_page_suivante.pack(side="left", padx=5)
 
         legende_frame = ctk.CTkFrame(main_content_frame, fg_color="transparent")
-        legende_frame.grid(row=4, column=0, sticky="ew", padx=10, pady=(5, 10))
+        legende_frame.grid(row=5, column=0, sticky="ew", padx=10, pady=(5, 10))
         ctk.CTkLabel(legende_frame, text="Légende:", font=ctk.CTkFont(weight="bold")).pack(side="left",
                                                                                            padx=(0, 10))
         legend_items = [("Action Requise", COULEUR_ACTIVE_POUR_UTILISATEUR),
@@ -206,26 +282,26 @@ class MainView(ctk.CTkFrame):
             roles_str = f" (Rôles: {', '.join(self.user_roles)})" if self.user_roles else ""
             self.user_name_label.configure(text=f"{self.nom_utilisateur}{roles_str}")
 
-        self.app_controller.run_threaded_task(task, on_complete)
+        self.app_controller.run_threaded_task(task, on_complete, cle="affichage_utilisateur")
 
     def _get_refreshed_and_sorted_data(self, force_reload):
         if force_reload:
-            self.all_demandes_cache = self.remboursement_controller.get_toutes_les_demandes_formatees(
-                self.include_archives.get())
+            # Le dépôt en mémoire est tenu à jour par les écritures et le journal : le disque n'est relu
+            # que s'il a été invalidé (F5, changement de génération du journal...).
+            demandes = self.remboursement_controller.get_toutes_les_demandes_formatees(self.include_archives.get())
+            self._indexer_donnees(demandes)
             if os.path.exists(REMBOURSEMENTS_JSON_DIR):
                 self._last_known_remboursements_mtime = os.path.getmtime(REMBOURSEMENTS_JSON_DIR)
 
-        search_term = self.search_var.get().lower().strip()
-        if search_term:
-            demandes_filtrees = [d for d in self.all_demandes_cache if
-                                 search_term in d.get('nom', '').lower() or search_term in d.get('prenom',
-                                                                                                 '').lower() or search_term in str(
-                                     d.get('reference_facture', '')).lower()]
-        else:
-            demandes_filtrees = self.all_demandes_cache
+        demandes_filtrees = self._demandes_triees(self.current_sort)
+
+        scores_recherche = self._index_recherche.scores(self.search_var.get())
+        if scores_recherche is not None:
+            demandes_filtrees = [d for d in demandes_filtrees if d.get('id_demande') in scores_recherche]
 
         if self.current_filter == "En attente de mon action":
-            demandes_filtrees = [d for d in demandes_filtrees if self._is_active_for_user(d)]
+            ids_en_attente = self._file_actions.ids_en_attente()
+            demandes_filtrees = [d for d in demandes_filtrees if d.get('id_demande') in ids_en_attente]
         elif self.current_filter == "En cours":
             demandes_filtrees = [d for d in demandes_filtrees if
                                  d.get('statut') not in [STATUT_PAIEMENT_EFFECTUE, STATUT_ANNULEE]]
@@ -233,43 +309,183 @@ class MainView(ctk.CTkFrame):
             demandes_filtrees = [d for d in demandes_filtrees if
                                  d.get('statut') in [STATUT_PAIEMENT_EFFECTUE, STATUT_ANNULEE]]
 
-        reverse_sort = self.current_sort in ["Date de création (récent)", "Montant (décroissant)"]
-
-        def get_sort_key(demande):
-            sort_field_map = {"Date de création (récent)": "date_creation",
-                              "Date de création (ancien)": "date_creation",
-                              "Montant (décroissant)": "montant_demande",
-                              "Montant (croissant)": "montant_demande", "Nom du patient (A-Z)": "nom"}
-            sort_field = sort_field_map.get(self.current_sort, "date_creation")
-            value = demande.get(sort_field)
-            if isinstance(value, str) and "date" in sort_field:
-                try:
-                    return datetime.datetime.fromisoformat(value)
-                except ValueError:
-                    return datetime.datetime.min
-            return value if value is not None else (datetime.datetime.min if "date" in sort_field else "")
-
-        return sorted(demandes_filtrees, key=get_sort_key, reverse=reverse_sort)
+        if scores_recherche is not None:
+            # Pendant une recherche, la pertinence prime ; le tri choisi départage les ex æquo (tri stable).
+            demandes_filtrees = sorted(demandes_filtrees, key=lambda d: -scores_recherche[d.get('id_demande')])
+        return demandes_filtrees
+
+    def _indexer_donnees(self, demandes):
+        """Remplace le cache et précalcule une fois pour toutes les clés de tri et l'index de recherche."""
+        self.all_demandes_cache = demandes
+        self._cles_tri = {d.get("id_demande"): _cles_de_tri(d) for d in demandes}
+        self._index_recherche = IndexRecherche(demandes)
+        self._file_actions = FileActionsUtilisateur(self.nom_utilisateur, self.user_roles, demandes)
+        self._permutations_tri = {}
+        self._version_donnees += 1
+
+    def _demandes_triees(self, option_tri):
+        """Vue triée du cache pour une option de tri, conservée tant que les données ne changent pas."""
+        version, demandes, cles_tri = self._version_donnees, self.all_demandes_cache, self._cles_tri
+        permutation = self._permutations_tri.get(option_tri)
+        if permutation is None or permutation[0] != version:
+            champ, decroissant = OPTIONS_TRI.get(option_tri, OPTIONS_TRI["Date de création (récent)"])
+
+            def cle(demande):
+                return (cles_tri.get(demande.get("id_demande")) or _cles_de_tri(demande))[champ]
+
+            demandes_triees = sorted(demandes, key=cle, reverse=decroissant)
+            permutation = (version, demandes_triees)
+            self._permutations_tri[option_tri] = permutation
+        return permutation[1]
 
     def _render_demandes_list(self, demandes_a_afficher):
-        for widget in self.scrollable_frame_demandes.winfo_children():
-            widget.destroy()
-
-        if not demandes_a_afficher:
-            ctk.CTkLabel(self.scrollable_frame_demandes, text="Aucune demande à afficher.",
-                         font=ctk.CTkFont(size=14, slant="italic")).pack(pady=20)
-        else:
-            for demande_data in demandes_a_afficher:
-                item_frame = RemboursementItemView(master=self.scrollable_frame_demandes,
-                                                   demande_data=demande_data,
-                                                   current_user_name=self.nom_utilisateur,
-                                                   user_roles=self.user_roles,
-                                                   callbacks=self.callbacks)
-                item_frame.pack(pady=5, padx=5, fill="x", expand=True)
+        self._demandes_affichees = demandes_a_afficher
+        nb_pages = max(1, -(-len(demandes_a_afficher) // TAILLE_PAGE_LISTE))
+        self.page_courante = min(self.page_courante, nb_pages - 1)
+        self._afficher_page()
         self._update_notification_badge()
+        self._mettre_a_jour_boutons_lot()
+
+    def _afficher_page(self):
+        """
+        Seules les lignes de la page courante ont des widgets. Chaque ligne est associée à son id_demande
+        et à l'empreinte de son contenu : un rafraîchissement ajoute, retire et réordonne les lignes,
+        mais ne reconstruit que celles dont l'empreinte a changé. Les cadres retirés sont recyclés.
+        """
+        debut = self.page_courante * TAILLE_PAGE_LISTE
+        demandes_page = self._demandes_affichees[debut:debut + TAILLE_PAGE_LISTE]
+        ids_page = {d.get("id_demande") for d in demandes_page}
+
+        for id_demande in [i for i in self._lignes_par_id if i not in ids_page]:
+            self._lignes_libres.append(self._lignes_par_id.pop(id_demande))
+
+        ordre_voulu = []
+        # Seules les demandes complètes des lignes affichées et dépliées sont gardées en mémoire.
+        self._details_par_id = {i: d for i, d in self._details_par_id.items()
+                                if i in ids_page and i in self._ids_deplies}
+
+        for demande_data in demandes_page:
+            id_demande = demande_data.get("id_demande")
+            est_selectionne = id_demande in self.selection_ids
+            est_deplie = id_demande in self._ids_deplies
+            details = self._details_a_jour(demande_data) if est_deplie else None
+            ligne = self._lignes_par_id.get(id_demande)
+            if ligne is None:
+                if self._lignes_libres:
+                    ligne = self._lignes_libres.pop()
+                    ligne.mettre_a_jour(demande_data, est_selectionne, details, est_deplie)
+                else:
+                    ligne = RemboursementItemView(master=self.scrollable_frame_demandes,
+                                                  demande_data=demande_data,
+                                                  current_user_name=self.nom_utilisateur,
+                                                  user_roles=self.user_roles,
+                                                  callbacks=self.callbacks,
+                                                  est_selectionne=est_selectionne,
+                                                  details=details,
+                                                  est_deplie=est_deplie)
+                self._lignes_par_id[id_demande] = ligne
+            elif ligne.empreinte != empreinte_demande(demande_data, details is not None, est_deplie):
+                ligne.mettre_a_jour(demande_data, est_selectionne, details, est_deplie)
+            elif ligne.selection_var.get() != est_selectionne:
+                ligne.selection_var.set(est_selectionne)
+            ordre_voulu.append(ligne)
+
+        # On ne ré-empaquette qu'à partir de la première ligne dont la position a changé.
+        premier_ecart = 0
+        while (premier_ecart < min(len(ordre_voulu), len(self._ordre_lignes_affichees))
+               and ordre_voulu[premier_ecart] is self._ordre_lignes_affichees[premier_ecart]):
+            premier_ecart += 1
+        for ligne in self._ordre_lignes_affichees[premier_ecart:]:
+            ligne.pack_forget()
+        for ligne in ordre_voulu[premier_ecart:]:
+            ligne.pack(pady=5, padx=5, fill="x", expand=True)
+        self._ordre_lignes_affichees = ordre_voulu
+
+        while len(self._lignes_libres) > TAILLE_PAGE_LISTE:
+            self._lignes_libres.pop().destroy()
+
+        if demandes_page:
+            self.label_aucune_demande.pack_forget()
+        else:
+            self.label_aucune_demande.pack(pady=20)
+
+        ids_sans_details = [ligne.id_demande for ligne in ordre_voulu if ligne.est_deplie and ligne.details is None]
+        if ids_sans_details:
+            self._charger_details(ids_sans_details)
+
+        nb_demandes = len(self._demandes_affichees)
+        nb_pages = max(1, -(-nb_demandes // TAILLE_PAGE_LISTE))
+        self.label_pagination.configure(text=f"Page {self.page_courante + 1} / {nb_pages} ({nb_demandes} demande(s))")
+        self.bouton_page_precedente.configure(state="normal" if self.page_courante > 0 else "disabled")
+        self.bouton_page_suivante.configure(state="normal" if self.page_courante < nb_pages - 1 else "disabled")
+
+    def _details_a_jour(self, demande_resume):
+        details = self._details_par_id.get(demande_resume.get("id_demande"))
+        if details is not None and version_demande(details) == version_demande(demande_resume):
+            return details
+        return None
+
+    def _basculer_details(self, id_demande, est_deplie):
+        ligne = self._lignes_par_id.get(id_demande)
+        if est_deplie:
+            self._ids_deplies.add(id_demande)
+        else:
+            self._ids_deplies.discard(id_demande)
+            self._details_par_id.pop(id_demande, None)
+        if ligne is None:
+            return
+        details = self._details_a_jour(ligne.resume) if est_deplie else None
+        ligne.mettre_a_jour(ligne.resume, ligne.selection_var.get(), details, est_deplie)
+        if est_deplie and details is None:
+            self._charger_details([id_demande])
+
+    def _charger_details(self, ids_demandes):
+        """Charge en arrière-plan les demandes complètes (historique, pièces jointes) des lignes dépliées."""
+        ids_a_charger = [i for i in ids_demandes if i not in self._details_en_cours]
+        if not ids_a_charger:
+            return
+        self._details_en_cours.update(ids_a_charger)
+
+        def lire_details(id_demande):
+            # Une erreur (partage réseau indisponible...) ne doit pas laisser la ligne en chargement :
+            # la demande est libérée de _details_en_cours et sera relue au prochain dépliage.
+            try:
+                return self.remboursement_controller.get_demande_by_id(id_demande)
+            except Exception as e:
+                print(f"Erreur lors du chargement des détails de la demande {id_demande}: {e}")
+                return None
+
+        def task():
+            return {id_demande: lire_details(id_demande) for id_demande in ids_a_charger}
+
+        def on_complete(details_par_id):
+            self._details_en_cours.difference_update(ids_a_charger)
+            for id_demande, details in details_par_id.items():
+                ligne = self._lignes_par_id.get(id_demande)
+                if details is None or ligne is None:
+                    continue
+                self._details_par_id[id_demande] = details
+                # Une version plus récente que le résumé affiché attendra la synchronisation du résumé.
+                if (ligne.est_deplie and ligne.details is None
+                        and version_demande(details) == version_demande(ligne.resume)):
+                    ligne.mettre_a_jour(ligne.resume, ligne.selection_var.get(), details, True)
+
+        # La ligne affiche déjà « Chargement... » : inutile de masquer toute la fenêtre.
+        self.app_controller.run_threaded_task(task, on_complete, show_overlay=False)
+
+    def _changer_page(self, delta):
+        nb_pages = max(1, -(-len(self._demandes_affichees) // TAILLE_PAGE_LISTE))
+        nouvelle_page = min(max(self.page_courante + delta, 0), nb_pages - 1)
+        if nouvelle_page != self.page_courante:
+            self.page_courante = nouvelle_page
+            self._afficher_page()
+            self.scrollable_frame_demandes._parent_canvas.yview_moveto(0)
 
     def afficher_liste_demandes(self, force_reload=False):
         if self._is_refreshing:
+            # On ne perd pas la demande : elle sera rejouée avec l'état le plus récent à la fin du rafraîchissement.
+            self._rafraichissement_en_attente = True
+            self._rechargement_en_attente = self._rechargement_en_attente or force_reload
             return
         self._is_refreshing = True
 
@@ -277,32 +493,52 @@ class MainView(ctk.CTkFrame):
             return self._get_refreshed_and_sorted_data(force_reload)
 
         def on_complete(data):
-            self._render_demandes_list(data)
-            self._is_refreshing = False
+            if not self._rafraichissement_en_attente:
+                self._render_demandes_list(data)
+            self._terminer_rafraichissement()
 
         self.app_controller.run_threaded_task(task, on_complete)
 
+    def _terminer_rafraichissement(self):
+        """Libère le rafraîchissement en cours et relance celui demandé entre-temps (la dernière requête gagne)."""
+        self._is_refreshing = False
+        if self._rafraichissement_en_attente:
+            force_reload = self._rechargement_en_attente
+            self._rafraichissement_en_attente = False
+            self._rechargement_en_attente = False
+            self.afficher_liste_demandes(force_reload=force_reload)
+
+    def _basculer_selection(self, id_demande, est_selectionne):
+        if est_selectionne:
+            self.selection_ids.add(id_demande)
+        else:
+            self.selection_ids.discard(id_demande)
+        self._mettre_a_jour_boutons_lot()
+
+    def _ids_selectionnes_au_statut(self, statut):
+        return [d.get("id_demande") for d in self.remboursement_controller.get_demandes_par_statut(statut)
+                if d.get("id_demande") in self.selection_ids]
+
+    def _mettre_a_jour_boutons_lot(self):
+        self.selection_ids = set(self._ids_selectionnes_au_statut(STATUT_TROP_PERCU_CONSTATE)
+                                 + self._ids_selectionnes_au_statut(STATUT_VALIDEE))
+        if self.bouton_lot_valider:
+            nb = len(self._ids_selectionnes_au_statut(STATUT_TROP_PERCU_CONSTATE))
+            self.bouton_lot_valider.configure(text=f"Valider la sélection ({nb})",
+                                              state="normal" if nb else "disabled")
+        if self.bouton_lot_paiement:
+            nb = len(self._ids_selectionnes_au_statut(STATUT_VALIDEE))
+            self.bouton_lot_paiement.configure(text=f"Confirmer paiements ({nb})",
+                                               state="normal" if nb else "disabled")
+
     def _update_notification_badge(self):
-        count = sum(1 for d in self.all_demandes_cache if self._is_active_for_user(d))
+        count = self._file_actions.nombre_en_attente()
         if count > 0:
             self.notification_badge.configure(text=str(count))
             self.notification_badge.place(in_=self.bouton_rafraichir, relx=1.0, rely=0.0, anchor="ne")
         else:
             self.notification_badge.place_forget()
 
-    def _is_active_for_user(self, demande):
-        current_status = demande.get("statut")
-        cree_par_user = demande.get("cree_par")
-        if self.est_comptable_tresorerie() and current_status == STATUT_CREEE: return True
-        if (
-                self.nom_utilisateur == cree_par_user or self.est_admin()) and current_status == STATUT_REFUSEE_CONSTAT_TP: return True
-        if (
-                self.est_validateur_chef() or self.est_admin()) and current_status == STATUT_TROP_PERCU_CONSTATE: return True
-        if (
-                self.est_comptable_tresorerie() or self.est_admin()) and current_status == STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO: return True
-        if (self.est_comptable_fournisseur() or self.est_admin()) and current_status == STATUT_VALIDEE: return True
-        return False
-
     def est_admin(self):
         return "admin" in self.user_roles
 
@@ -320,10 +556,22 @@ class MainView(ctk.CTkFrame):
 
     def _set_sort(self, sort_choice):
         self.current_sort = sort_choice
+        self.page_courante = 0
         self.afficher_liste_demandes()
 
     def _set_filter(self, filter_choice):
         self.current_filter = filter_choice
+        self.page_courante = 0
+        self.afficher_liste_demandes()
+
+    def _on_search_change(self):
+        if self._recherche_job_id:
+            self.after_cancel(self._recherche_job_id)
+        self._recherche_job_id = self.after(DELAI_RECHERCHE_MS, self._lancer_recherche)
+
+    def _lancer_recherche(self):
+        self._recherche_job_id = None
+        self.page_courante = 0
         self.afficher_liste_demandes()
 
     def _clear_search(self):
@@ -332,6 +580,13 @@ class MainView(ctk.CTkFrame):
     def _on_archive_toggle(self):
         self.afficher_liste_demandes(force_reload=True)
 
+    def _recharger_depuis_disque(self):
+        # Le rechargement complet couvre les changements du journal encore en cours d'application.
+        self.app_controller.planificateur.annuler(CLE_TACHE_CHANGEMENTS)
+        self._ids_changements_en_attente.clear()
+        self.remboursement_controller.invalider_depot()
+        self.afficher_liste_demandes(force_reload=True)
+
     def _open_help_view(self):
         HelpView(self, self.nom_utilisateur, self.user_roles)
 
@@ -349,16 +604,57 @@ class MainView(ctk.CTkFrame):
 
     def _check_for_data_updates(self):
         try:
-            current_mtime = os.path.getmtime(
-                REMBOURSEMENTS_JSON_DIR) if os.path.exists(REMBOURSEMENTS_JSON_DIR) else 0
-            if current_mtime != self._last_known_remboursements_mtime:
-                self.afficher_liste_demandes(force_reload=True)
+            if not self._is_refreshing:
+                ids_modifies, reinitialise = self.remboursement_controller.lire_changements()
+                current_mtime = os.path.getmtime(
+                    REMBOURSEMENTS_JSON_DIR) if os.path.exists(REMBOURSEMENTS_JSON_DIR) else 0
+                if reinitialise:
+                    self._recharger_depuis_disque()
+                elif ids_modifies:
+                    self._last_known_remboursements_mtime = current_mtime
+                    self._appliquer_changements(ids_modifies)
+                elif current_mtime != self._last_known_remboursements_mtime:
+                    # Modification non journalisée (ex: poste avec une ancienne version) : rechargement complet.
+                    self._recharger_depuis_disque()
         except Exception as e:
             print(f"Erreur lors du polling : {e}")
         finally:
             if self.winfo_exists(): self._polling_job_id = self.after(POLLING_INTERVAL_MS,
                                                                       self._check_for_data_updates)
 
+    def _appliquer_changements(self, ids_modifies):
+        """
+        Recharge uniquement les demandes citées dans le journal et les reporte dans le cache.
+        Un nouvel appel remplace la tâche précédente non terminée, dont il reprend les ids.
+        """
+        self._ids_changements_en_attente.update(ids_modifies)
+        ids_a_rafraichir = list(self._ids_changements_en_attente)
+
+        def task():
+            return self.remboursement_controller.rafraichir_demandes(ids_a_rafraichir)
+
+        def on_complete(demandes_modifiees):
+            self._ids_changements_en_attente.difference_update(ids_a_rafraichir)
+            cache_par_id = {d.get("id_demande"): d for d in self.all_demandes_cache}
+            cles_tri = dict(self._cles_tri)
+            for id_demande, demande in demandes_modifiees.items():
+                if demande is None or (demande.get("is_archived") and not self.include_archives.get()):
+                    cache_par_id.pop(id_demande, None)
+                    cles_tri.pop(id_demande, None)
+                    self._index_recherche.retirer(id_demande)
+                    self._file_actions.retirer(id_demande)
+                else:
+                    cache_par_id[id_demande] = demande
+                    cles_tri[id_demande] = _cles_de_tri(demande)
+                    self._index_recherche.mettre_a_jour(demande)
+                    self._file_actions.mettre_a_jour(demande)
+            self._cles_tri = cles_tri
+            self.all_demandes_cache = list(cache_par_id.values())
+            self._version_donnees += 1
+            self.afficher_liste_demandes()
+
+        self.app_controller.run_threaded_task(task, on_complete, cle=CLE_TACHE_CHANGEMENTS, show_overlay=False)
+
     def _open_profile_view(self):
         def task():
             return user_model.obtenir_info_utilisateur(self.nom_utilisateur)
@@ -386,30 +682,48 @@ class MainView(ctk.CTkFrame):
 
     def _action_voir_pj(self, demande_id, rel_path):
         def task():
-            return self.remboursement_controller.get_viewable_attachment_path(demande_id, rel_path)
+            return self.remboursement_controller.lire_piece_jointe(demande_id, rel_path)
 
         def on_complete(result):
-            chemin_pj, temp_dir = result
-            if chemin_pj and os.path.exists(chemin_pj):
-                DocumentViewerWindow(self, chemin_pj, f"Aperçu - {os.path.basename(rel_path)}",
-                                     temp_dir_to_clean=temp_dir)
+            chemin_pj, donnees = result
+            titre = f"Aperçu - {os.path.basename(rel_path)}"
+            if donnees is not None:
+                DocumentViewerWindow(self, os.path.basename(rel_path), titre, donnees=donnees)
+            elif chemin_pj and os.path.exists(chemin_pj):
+                DocumentViewerWindow(self, chemin_pj, titre)
             else:
                 self.app_controller.show_toast(f"Fichier non trouvé : {rel_path}", "error")
-                if temp_dir: archive_utils.cleanup_temp_dir(temp_dir)
 
         self.app_controller.run_threaded_task(task, on_complete)
 
+    def _action_vignette_pj(self, demande_id, rel_path, largeur, on_vignette):
+        def task():
+            chemin_pj, donnees = self.remboursement_controller.lire_piece_jointe(demande_id, rel_path)
+            if donnees is not None:
+                return obtenir_vignette(donnees, largeur, os.path.basename(rel_path))
+            return obtenir_vignette(chemin_pj, largeur) if chemin_pj and os.path.exists(chemin_pj) else None
+
+        def on_complete(vignette):
+            if vignette is not None:
+                on_vignette(vignette)
+
+        self.app_controller.run_threaded_task(task, on_complete, priorite=PRIORITE_NORMALE, show_overlay=False)
+
     def _action_telecharger_pj(self, demande_id, rel_path):
         def task():
-            return self.remboursement_controller.get_viewable_attachment_path(demande_id, rel_path)
+            return self.remboursement_controller.lire_piece_jointe(demande_id, rel_path)
 
         def on_complete(result):
-            chemin_pj, temp_dir = result
-            if not chemin_pj:
+            chemin_pj, donnees = result
+            if not chemin_pj and donnees is None:
                 self.app_controller.show_toast(f"Fichier non trouvé ou impossible à extraire : {rel_path}", "error")
                 return
 
-            succes, message = self.remboursement_controller.telecharger_copie_piece_jointe(chemin_pj, temp_dir)
+            if donnees is not None:
+                succes, message = self.remboursement_controller.telecharger_copie_piece_jointe(
+                    os.path.basename(rel_path), None, donnees=donnees)
+            else:
+                succes, message = self.remboursement_controller.telecharger_copie_piece_jointe(chemin_pj, None)
             if succes:
                 self.app_controller.show_toast(message, 'success')
             elif "annulé" not in message.lower():
@@ -436,10 +750,62 @@ class MainView(ctk.CTkFrame):
             else:
                 self.app_controller.show_toast(result['message'], 'success')
                 self._render_demandes_list(result['data'])
-            self._is_refreshing = False
+            self._terminer_rafraichissement()
+
+        self.app_controller.run_threaded_task(combined_task, on_complete)
+
+    def _perform_batch_workflow_action(self, batch_task_function):
+        if self._is_refreshing:
+            return
+        self._is_refreshing = True
+
+        def combined_task():
+            resultats = batch_task_function()
+            refreshed_data = self._get_refreshed_and_sorted_data(force_reload=True)
+            return {'resultats': resultats, 'data': refreshed_data}
+
+        def on_complete(result):
+            resultats = result['resultats']
+            echecs = [(id_demande, message) for id_demande, succes, message in resultats if not succes]
+            nb_succes = len(resultats) - len(echecs)
+            for id_demande, succes, _ in resultats:
+                if succes:
+                    self.selection_ids.discard(id_demande)
+            if echecs:
+                details = "\n".join(f"- {id_demande}: {message}" for id_demande, message in echecs[:5])
+                if len(echecs) > 5:
+                    details += f"\n... et {len(echecs) - 5} autre(s)."
+                self.app_controller.show_toast(
+                    f"{nb_succes} demande(s) traitée(s), {len(echecs)} échec(s) :\n{details}", 'warning')
+            else:
+                self.app_controller.show_toast(f"{nb_succes} demande(s) traitée(s) avec succès.", 'success')
+            self._render_demandes_list(result['data'])
+            self._terminer_rafraichissement()
 
         self.app_controller.run_threaded_task(combined_task, on_complete)
 
+    def _action_lot_valider(self):
+        ids_demandes = self._ids_selectionnes_au_statut(STATUT_TROP_PERCU_CONSTATE)
+        if not ids_demandes:
+            return
+        dialog = CommentDialog(self, title=f"Validation de {len(ids_demandes)} demande(s)",
+                               prompt="Voulez-vous ajouter un commentaire ?", is_mandatory=False)
+        commentaire = dialog.get_comment()
+        if commentaire is not None:
+            self._perform_batch_workflow_action(
+                lambda: self.remboursement_controller.jdurousset_valider_demandes_par_lot(ids_demandes, commentaire))
+
+    def _action_lot_confirmer_paiement(self):
+        ids_demandes = self._ids_selectionnes_au_statut(STATUT_VALIDEE)
+        if not ids_demandes:
+            return
+        dialog = CommentDialog(self, title=f"Confirmation de {len(ids_demandes)} paiement(s)",
+                               prompt="Voulez-vous ajouter un commentaire ?", is_mandatory=False)
+        commentaire = dialog.get_comment()
+        if commentaire is not None:
+            self._perform_batch_workflow_action(
+                lambda: self.remboursement_controller.pdiop_confirmer_paiements_par_lot(ids_demandes, commentaire))
+
     def _action_mlupo_accepter(self, id_demande):
         from views.dialogs.acceptation_constat_dialog import AcceptationConstatDialog
         AcceptationConstatDialog(self, self.remboursement_controller, id_demande, self.app_controller)
@@ -520,7 +886,7 @@ class MainView(ctk.CTkFrame):
                     def on_complete(result):
                         self.app_controller.show_toast(result['message'], 'info')
                         self._render_demandes_list(result['data'])
-                        self._is_refreshing = False
+                        self._terminer_rafraichissement()
 
                     self.app_controller.run_threaded_task(combined_task, on_complete)
             except ValueError:
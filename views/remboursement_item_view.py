@@ -7,6 +7,8 @@ from config.settings import (
     STATUT_VALIDEE, STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO,
     STATUT_ANNULEE, STATUT_PAIEMENT_EFFECTUE
 )
+from models.remboursement_workflow import statut_requiert_action
+from models.remboursement_resume import version_demande
 
 COULEUR_ACTIVE_POUR_UTILISATEUR = "#1E4D2B"
 COULEUR_DEMANDE_TERMINEE = "#2E4374"
@@ -17,16 +19,60 @@ COULEUR_BORDURE_ANNULEE = "#9D0208"
 COULEUR_BORDURE_DEFAUT = "gray40"
 
 
+def empreinte_demande(demande_data, details_charges: bool = False, est_deplie: bool = False) -> tuple:
+    """Résumé des champs affichés par une ligne : deux empreintes égales donnent le même rendu."""
+    return (
+        demande_data.get("id_demande"),
+        demande_data.get("statut"),
+        version_demande(demande_data),
+        demande_data.get("derniere_modification_par"),
+        demande_data.get("is_archived", False),
+        details_charges,
+        est_deplie
+    )
+
+
+def _formater_date(valeur) -> str:
+    if isinstance(valeur, str):
+        try:
+            return str(datetime.datetime.fromisoformat(valeur))
+        except ValueError:
+            return valeur
+    return str(valeur) if valeur else 'N/A'
+
+
 class RemboursementItemView(ctk.CTkFrame):
-    def __init__(self, master, demande_data: dict, current_user_name: str, user_roles: list, callbacks: dict):
+    def __init__(self, master, demande_data, current_user_name: str, user_roles: list, callbacks: dict,
+                 est_selectionne: bool = False, details: dict | None = None, est_deplie: bool = False):
+        """
+        demande_data est le résumé de la demande (DemandeResume) ; details, la demande complète
+        (historique, pièces jointes) si elle est déjà chargée. Repliée, la ligne n'affiche que le résumé.
+        """
         super().__init__(master, border_width=1, corner_radius=5)
 
-        self.demande_data = demande_data
         self.current_user_name = current_user_name
         self.user_roles = user_roles
         self.callbacks = callbacks
-        self.id_demande = self.demande_data.get("id_demande")
+        self.selection_var = ctk.BooleanVar(value=est_selectionne)
+        self._definir_donnees(demande_data, details, est_deplie)
+
+        self._setup_item_colors_and_ui()
 
+    def _definir_donnees(self, demande_data, details: dict | None, est_deplie: bool):
+        self.resume = demande_data
+        self.details = details
+        self.est_deplie = est_deplie
+        self.demande_data = details if details is not None else demande_data
+        self.id_demande = demande_data.get("id_demande")
+        self.empreinte = empreinte_demande(demande_data, details is not None, est_deplie)
+
+    def mettre_a_jour(self, demande_data, est_selectionne: bool = False, details: dict | None = None,
+                      est_deplie: bool = False):
+        """Réutilise ce cadre pour afficher une autre demande (ou une nouvelle version de la même)."""
+        self._definir_donnees(demande_data, details, est_deplie)
+        self.selection_var.set(est_selectionne)
+        for widget in self.winfo_children():
+            widget.destroy()
         self._setup_item_colors_and_ui()
 
     def _est_admin(self) -> bool:
@@ -42,20 +88,15 @@ class RemboursementItemView(ctk.CTkFrame):
         return "comptable_fournisseur" in self.user_roles
 
     def _is_active_for_user(self):
-        current_status = self.demande_data.get("statut")
-        cree_par_user = self.demande_data.get("cree_par")
+        return statut_requiert_action(self.demande_data.get("statut"), self.demande_data.get("cree_par"),
+                                      self.current_user_name, self.user_roles)
 
-        if self._est_comptable_tresorerie() and current_status == STATUT_CREEE:
-            return True
-        if (
-                self.current_user_name == cree_par_user or self._est_admin()) and current_status == STATUT_REFUSEE_CONSTAT_TP:
-            return True
-        if (self._est_validateur_chef() or self._est_admin()) and current_status == STATUT_TROP_PERCU_CONSTATE:
-            return True
-        if (
-                self._est_comptable_tresorerie() or self._est_admin()) and current_status == STATUT_REFUSEE_VALIDATION_CORRECTION_MLUPO:
+    def est_selectionnable_pour_lot(self) -> bool:
+        """Les validations et confirmations de paiement peuvent être traitées par lot."""
+        statut = self.demande_data.get("statut")
+        if (self._est_validateur_chef() or self._est_admin()) and statut == STATUT_TROP_PERCU_CONSTATE:
             return True
-        if (self._est_comptable_fournisseur() or self._est_admin()) and current_status == STATUT_VALIDEE:
+        if (self._est_comptable_fournisseur() or self._est_admin()) and statut == STATUT_VALIDEE:
             return True
         return False
 
@@ -112,16 +153,51 @@ class RemboursementItemView(ctk.CTkFrame):
             val_label.grid(row=row_idx_info, column=1, sticky="ew", padx=(5, 2), pady=(2, 2))
             row_idx_info += 1
 
-        add_basic_info_row("Patient:",
-                           f"{self.demande_data.get('nom', 'N/A')} {self.demande_data.get('prenom', 'N/A')}")
-        add_basic_info_row("Réf. Facture:", self.demande_data.get('reference_facture', 'N/A'))
-        add_basic_info_row("Montant:", f"{self.demande_data.get('montant_demande', 0.0):.2f} €")
-        add_basic_info_row("Créée le:", self.demande_data.get('date_creation', 'N/A'))
-        add_basic_info_row("Modifiée par:", self.demande_data.get('derniere_modification_par', 'N/A'))
-        add_basic_info_row("Statut Actuel:", self.demande_data.get('statut', 'Non défini'))
-        if self.demande_data.get('date_paiement_effectue'):
-            add_basic_info_row("Paiement le:", self.demande_data['date_paiement_effectue'], text_color="lightgreen")
+        add_basic_info_row("Patient:", f"{self.resume.get('nom', 'N/A')} {self.resume.get('prenom', 'N/A')}")
+        add_basic_info_row("Réf. Facture:", self.resume.get('reference_facture', 'N/A'))
+        add_basic_info_row("Montant:", f"{self.resume.get('montant_demande', 0.0):.2f} €")
+        add_basic_info_row("Créée le:", _formater_date(self.resume.get('date_creation')))
+        add_basic_info_row("Modifiée par:", self.resume.get('derniere_modification_par', 'N/A'))
+        add_basic_info_row("Statut Actuel:", self.resume.get('statut', 'Non défini'))
+        if self.resume.get('date_paiement_effectue'):
+            add_basic_info_row("Paiement le:", _formater_date(self.resume.get('date_paiement_effectue')),
+                               text_color="lightgreen")
+
+        if 'basculer_details' in self.callbacks:
+            texte_bascule = "▾ Masquer les détails" if self.est_deplie else "▸ Afficher les détails"
+            ctk.CTkButton(basic_info_frame, text=texte_bascule, width=160, fg_color="gray30", hover_color="gray25",
+                          command=lambda: self.callbacks['basculer_details'](self.id_demande, not self.est_deplie)
+                          ).grid(row=row_idx_info, column=0, columnspan=2, sticky="w", padx=(5, 2), pady=(4, 2))
+
+        if self.est_deplie:
+            self._build_details_content(content_frame)
+
+        statut_actuel = self.demande_data.get("statut")
+        buttons_to_add = self._get_workflow_buttons(statut_actuel)
+        if buttons_to_add:
+            workflow_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
+            workflow_frame.grid(row=1, column=0, columnspan=3, pady=(8, 4), sticky="ew")
+            workflow_frame.grid_columnconfigure(1, weight=1)
+            if self.est_selectionnable_pour_lot() and 'basculer_selection' in self.callbacks:
+                ctk.CTkCheckBox(workflow_frame, text="Sélectionner", variable=self.selection_var,
+                                command=lambda: self.callbacks['basculer_selection'](
+                                    self.id_demande, self.selection_var.get())).grid(row=0, column=0, padx=(8, 0),
+                                                                                      sticky="w")
+            inner_buttons_frame = ctk.CTkFrame(workflow_frame, fg_color="transparent")
+            inner_buttons_frame.grid(row=0, column=1)
+            btn_width_action = 150
+            for text, command, fg_color, hover_color in buttons_to_add:
+                ctk.CTkButton(inner_buttons_frame, text=text, width=btn_width_action, fg_color=fg_color,
+                              hover_color=hover_color, command=command).pack(side="left", padx=5)
 
+        if self._est_admin():
+            admin_actions_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
+            admin_actions_frame.grid(row=2, column=0, columnspan=3, pady=(4, 8), sticky="e")
+            self._populate_admin_buttons(admin_actions_frame, statut_actuel)
+
+    def _build_details_content(self, content_frame):
+        """Historique et documents : construits seulement quand la ligne est dépliée."""
+        label_font_info = ctk.CTkFont(weight="bold", size=12)
         historique_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
         historique_frame.grid(row=0, column=1, sticky="nsew", padx=(5, 5), pady=5)
         ctk.CTkLabel(historique_frame, text="Historique/Commentaires:", font=label_font_info).pack(anchor="w",
@@ -132,7 +208,9 @@ class RemboursementItemView(ctk.CTkFrame):
         historique = self.demande_data.get('historique_statuts', [])
         hist_text_box.configure(state="normal")
         hist_text_box.delete("1.0", "end")
-        if historique:
+        if self.details is None:
+            hist_text_box.insert("end", "Chargement de l'historique...")
+        elif historique:
             for entree_hist in reversed(historique):
                 hist_text_box.insert("end",
                                      f"{entree_hist.get('date', 'N/A')} - {entree_hist.get('par', 'Système')}:\n")
@@ -148,26 +226,12 @@ class RemboursementItemView(ctk.CTkFrame):
         action_buttons_frame.grid(row=0, column=2, sticky="nsew", padx=(5, 8), pady=5)
         self._populate_documents_buttons(action_buttons_frame)
 
-        statut_actuel = self.demande_data.get("statut")
-        buttons_to_add = self._get_workflow_buttons(statut_actuel)
-        if buttons_to_add:
-            workflow_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
-            workflow_frame.grid(row=1, column=0, columnspan=3, pady=(8, 4), sticky="ew")
-            workflow_frame.grid_columnconfigure(0, weight=1)
-            inner_buttons_frame = ctk.CTkFrame(workflow_frame, fg_color="transparent")
-            inner_buttons_frame.grid(row=0, column=0)
-            btn_width_action = 150
-            for text, command, fg_color, hover_color in buttons_to_add:
-                ctk.CTkButton(inner_buttons_frame, text=text, width=btn_width_action, fg_color=fg_color,
-                              hover_color=hover_color, command=command).pack(side="left", padx=5)
-
-        if self._est_admin():
-            admin_actions_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
-            admin_actions_frame.grid(row=2, column=0, columnspan=3, pady=(4, 8), sticky="e")
-            self._populate_admin_buttons(admin_actions_frame, statut_actuel)
-
     def _populate_documents_buttons(self, parent_frame):
         parent_frame.grid_columnconfigure(0, weight=1)
+        if self.details is None:
+            ctk.CTkLabel(parent_frame, text="Chargement des documents...",
+                         font=ctk.CTkFont(size=12, slant="italic")).pack(fill="x", pady=2, padx=5, anchor="w")
+            return
         btn_width_action = 140
         btn_width_dl = 40
 
@@ -0,0 +1,135 @@
+# views/tiled_image_view.py
+import math
+import tkinter
+import customtkinter as ctk
+from PIL import Image, ImageTk
+from utils.image_utils import charger_image_reduite, echelle_max_image, ouvrir_image
+from utils.task_scheduler import PRIORITE_INTERFACE
+
+TAILLE_TUILE = 512
+# Tuiles gardées autour de la zone visible, pour que le défilement ne découvre pas de zone vide.
+MARGE_TUILES = 1
+
+
+class TiledImageView(ctk.CTkFrame):
+    """
+    Affiche une grande image par tuiles, au zoom courant : seules les tuiles proches de la zone visible
+    existent en mémoire. Les tuiles sont découpées dans une copie de l'image décodée à la plus petite
+    résolution suffisante pour ce zoom (chargée hors du thread Tk) ; en attendant, la copie précédente sert.
+    """
+
+    def __init__(self, master, source: str | bytes, app_controller, **kwargs):
+        """source : chemin de l'image, ou son contenu (pièce lue dans une archive)."""
+        super().__init__(master, **kwargs)
+        self.source = source
+        self.app_controller = app_controller
+        with ouvrir_image(source) as img:
+            self.taille_originale = img.size
+        # Échelle maximale décodable sans dépasser le plafond mémoire ; au-delà, la copie est agrandie.
+        self._echelle_max = echelle_max_image(img.width, img.height)
+        self.zoom = 1.0
+        self._source = None
+        self._echelle_source = 0.0
+        self._tuiles = {}
+        self._affichage_planifie = False
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.canvas = tkinter.Canvas(self, highlightthickness=0, borderwidth=0,
+                                     bg=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkFrame"]["fg_color"]))
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        barre_v = ctk.CTkScrollbar(self, orientation="vertical", command=self._defiler_y)
+        barre_v.grid(row=0, column=1, sticky="ns")
+        barre_h = ctk.CTkScrollbar(self, orientation="horizontal", command=self._defiler_x)
+        barre_h.grid(row=1, column=0, sticky="ew")
+        self.canvas.configure(yscrollcommand=barre_v.set, xscrollcommand=barre_h.set)
+
+        self.canvas.bind("<Configure>", lambda e: self._planifier_affichage())
+        self.canvas.bind("<MouseWheel>", lambda e: self._defiler_y("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self._defiler_y("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self._defiler_y("scroll", 1, "units"))
+
+    def _cle_source(self) -> str:
+        return f"source_image_{id(self)}"
+
+    def zoom_ajuste(self, largeur_vue: int, hauteur_vue: int) -> float:
+        largeur, hauteur = self.taille_originale
+        return max(0.01, min(1.0, largeur_vue / largeur, hauteur_vue / hauteur))
+
+    def definir_zoom(self, zoom: float):
+        self.zoom = zoom
+        largeur, hauteur = self.taille_originale
+        self.canvas.configure(scrollregion=(0, 0, math.ceil(largeur * zoom), math.ceil(hauteur * zoom)))
+        self._vider_tuiles()
+        echelle_utile = min(zoom, self._echelle_max)
+        if self._echelle_source < echelle_utile * 0.99 or self._echelle_source > 2 * echelle_utile:
+            # Copie trop petite (flou) ou bien plus grande que nécessaire (mémoire) : on en décode une autre.
+            self.app_controller.run_threaded_task(
+                lambda: charger_image_reduite(self.source, echelle_utile),
+                lambda resultat: self._on_source_chargee(zoom, resultat),
+                priorite=PRIORITE_INTERFACE, cle=self._cle_source(), show_overlay=self._source is None)
+        self._planifier_affichage()
+
+    def _on_source_chargee(self, zoom: float, resultat):
+        if not self.winfo_exists():
+            return
+        self._source, self._echelle_source = resultat
+        if zoom == self.zoom:
+            self._vider_tuiles()
+            self._planifier_affichage()
+
+    def _defiler_y(self, *args):
+        self.canvas.yview(*args)
+        self._planifier_affichage()
+
+    def _defiler_x(self, *args):
+        self.canvas.xview(*args)
+        self._planifier_affichage()
+
+    def _vider_tuiles(self):
+        self.canvas.delete("tuile")
+        self._tuiles.clear()
+
+    def _planifier_affichage(self):
+        if not self._affichage_planifie:
+            self._affichage_planifie = True
+            self.after_idle(self._afficher_tuiles_visibles)
+
+    def _afficher_tuiles_visibles(self):
+        self._affichage_planifie = False
+        if self._source is None or not self.winfo_exists():
+            return
+        largeur_totale = math.ceil(self.taille_originale[0] * self.zoom)
+        hauteur_totale = math.ceil(self.taille_originale[1] * self.zoom)
+        gauche, haut = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        col_min = max(0, int(gauche // TAILLE_TUILE) - MARGE_TUILES)
+        lig_min = max(0, int(haut // TAILLE_TUILE) - MARGE_TUILES)
+        col_max = min((largeur_totale - 1) // TAILLE_TUILE,
+                      int((gauche + self.canvas.winfo_width()) // TAILLE_TUILE) + MARGE_TUILES)
+        lig_max = min((hauteur_totale - 1) // TAILLE_TUILE,
+                      int((haut + self.canvas.winfo_height()) // TAILLE_TUILE) + MARGE_TUILES)
+
+        hors_zone = [p for p in self._tuiles if not (col_min <= p[0] <= col_max and lig_min <= p[1] <= lig_max)]
+        for position in hors_zone:
+            self.canvas.delete(self._tuiles.pop(position)[1])
+
+        rapport = self._echelle_source / self.zoom
+        for lig in range(lig_min, lig_max + 1):
+            for col in range(col_min, col_max + 1):
+                if (col, lig) in self._tuiles:
+                    continue
+                x0, y0 = col * TAILLE_TUILE, lig * TAILLE_TUILE
+                x1, y1 = min(x0 + TAILLE_TUILE, largeur_totale), min(y0 + TAILLE_TUILE, hauteur_totale)
+                zone = (int(x0 * rapport), int(y0 * rapport),
+                        max(int(x0 * rapport) + 1, min(self._source.width, math.ceil(x1 * rapport))),
+                        max(int(y0 * rapport) + 1, min(self._source.height, math.ceil(y1 * rapport))))
+                tuile = self._source.resize((x1 - x0, y1 - y0), Image.Resampling.BILINEAR, box=zone)
+                photo = ImageTk.PhotoImage(tuile)
+                item = self.canvas.create_image(x0, y0, anchor="nw", image=photo, tags="tuile")
+                self._tuiles[(col, lig)] = (photo, item)
+
+    def destroy(self):
+        self.app_controller.planificateur.annuler(self._cle_source())
+        self._tuiles.clear()
+        self._source = None
+        super().destroy()